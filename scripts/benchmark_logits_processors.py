@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright 2021 The HuggingFace Team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# This script times `NoRepeatNGramLogitsProcessor` and `NoBadWordsLogitsProcessor` over a simulated decoding loop
+# against the previous implementations, which looped in Python over the hypotheses, and checks that both ban the
+# same tokens.
+#
+# Usage:
+#
+#   python scripts/benchmark_logits_processors.py --num_beams 8 --ngram_size 3 --max_length 512
+
+import argparse
+import timeit
+
+import torch
+
+from transformers.generation_logits_process import (
+    NoBadWordsLogitsProcessor,
+    NoRepeatNGramLogitsProcessor,
+    _calc_banned_ngram_tokens,
+)
+
+
+def previous_no_repeat_ngram(ngram_size, input_ids, scores):
+    num_batch_hypotheses = scores.shape[0]
+    cur_len = input_ids.shape[-1]
+    banned_batch_tokens = _calc_banned_ngram_tokens(ngram_size, input_ids, num_batch_hypotheses, cur_len)
+
+    for i, banned_tokens in enumerate(banned_batch_tokens):
+        scores[i, banned_tokens] = -float("inf")
+
+    return scores
+
+
+def previous_no_bad_words(bad_words_ids, input_ids, scores):
+    banned_mask_list = []
+    for idx, prev_input_ids_slice in enumerate(input_ids.tolist()):
+        for banned_token_seq in bad_words_ids:
+            prefix = banned_token_seq[:-1]
+            if len(prefix) <= len(prev_input_ids_slice) and prev_input_ids_slice[-len(prefix) :] == prefix:
+                banned_mask_list.append([idx, banned_token_seq[-1]])
+    if not banned_mask_list:
+        return scores
+
+    banned_mask = torch.LongTensor(banned_mask_list)
+    indices = torch.ones(len(banned_mask))
+    banned_mask = torch.sparse.LongTensor(banned_mask.t(), indices, scores.size()).to(scores.device).to_dense().bool()
+    return scores.masked_fill(banned_mask, -float("inf"))
+
+
+def decoding_loop(processor, input_ids, scores, prompt_length):
+    # the processors see the hypotheses grow by one token per step
+    for cur_len in range(prompt_length, input_ids.shape[-1] + 1):
+        processor(input_ids[:, :cur_len], scores.clone())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_beams", type=int, default=8)
+    parser.add_argument("--ngram_size", type=int, default=3)
+    parser.add_argument("--max_length", type=int, default=512)
+    parser.add_argument("--prompt_length", type=int, default=16)
+    parser.add_argument("--vocab_size", type=int, default=50257)
+    parser.add_argument("--num_bad_words", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--device", type=str, default="cpu")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    # a small alphabet makes repeated ngrams, and therefore bans, frequent
+    input_ids = torch.randint(100, (args.num_beams, args.max_length), device=args.device)
+    scores = torch.randn(args.num_beams, args.vocab_size, device=args.device)
+    bad_words_ids = [torch.randint(100, (length,)).tolist() for length in torch.randint(2, 5, (args.num_bad_words,))]
+
+    benchmarks = {
+        f"no_repeat_ngram_size={args.ngram_size}": (
+            NoRepeatNGramLogitsProcessor(args.ngram_size),
+            lambda ids, s: previous_no_repeat_ngram(args.ngram_size, ids, s),
+        ),
+        f"bad_words_ids ({args.num_bad_words} words)": (
+            NoBadWordsLogitsProcessor(bad_words_ids, eos_token_id=None),
+            lambda ids, s: previous_no_bad_words(bad_words_ids, ids, s),
+        ),
+    }
+
+    print(f"{args.num_beams} hypotheses, decoding from {args.prompt_length} to {args.max_length} tokens")
+    for name, (processor, previous_processor) in benchmarks.items():
+        for cur_len in range(args.prompt_length, args.max_length + 1, 64):
+            expected = previous_processor(input_ids[:, :cur_len], scores.clone())
+            if not torch.equal(processor(input_ids[:, :cur_len], scores.clone()), expected):
+                raise ValueError(f"{name}: the banned tokens differ at length {cur_len}")
+
+        times = []
+        for fn in [previous_processor, processor]:
+            times.append(
+                min(
+                    timeit.repeat(
+                        lambda: decoding_loop(fn, input_ids, scores, args.prompt_length),
+                        number=1,
+                        repeat=args.repeat,
+                    )
+                )
+            )
+        print(f"{name}: previous {times[0]:.3f}s, current {times[1]:.3f}s ({times[0] / times[1]:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
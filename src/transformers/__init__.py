@@ -99,15 +99,19 @@ _import_structure = {
         "MODEL_CARD_NAME",
         "PYTORCH_PRETRAINED_BERT_CACHE",
         "PYTORCH_TRANSFORMERS_CACHE",
+        "SAFE_WEIGHTS_INDEX_NAME",
+        "SAFE_WEIGHTS_NAME",
         "SPIECE_UNDERLINE",
         "TF2_WEIGHTS_NAME",
         "TF_WEIGHTS_NAME",
         "TRANSFORMERS_CACHE",
+        "WEIGHTS_INDEX_NAME",
         "WEIGHTS_NAME",
         "TensorType",
         "add_end_docstrings",
         "add_start_docstrings",
         "cached_path",
+        "cached_paths",
         "is_apex_available",
         "is_datasets_available",
         "is_faiss_available",
@@ -125,6 +129,7 @@ _import_structure = {
         "is_torch_tpu_available",
         "is_vision_available",
     ],
+    "generation_streamers": ["BaseStreamer", "TextIteratorStreamer", "TextStreamer"],
     "hf_argparser": ["HfArgumentParser"],
     "integrations": [
         "is_comet_available",
@@ -539,6 +544,7 @@ if is_torch_available():
         "TextDatasetForNextSentencePrediction",
     ]
     _import_structure["generation_beam_search"] = ["BeamScorer", "BeamSearchScorer"]
+    _import_structure["generation_continuous_batching"] = ["ContinuousBatchingScheduler", "GenerationRequest"]
     _import_structure["generation_logits_process"] = [
         "ForcedBOSTokenLogitsProcessor",
         "ForcedEOSTokenLogitsProcessor",
@@ -556,6 +562,7 @@ if is_torch_available():
         "TopKLogitsWarper",
         "TopPLogitsWarper",
     ]
+    _import_structure["generation_static_cache"] = ["StaticCache", "StaticCacheLayer"]
     _import_structure["generation_stopping_criteria"] = [
         "MaxLengthCriteria",
         "MaxTimeCriteria",
@@ -2010,15 +2017,19 @@ if TYPE_CHECKING:
         MODEL_CARD_NAME,
         PYTORCH_PRETRAINED_BERT_CACHE,
         PYTORCH_TRANSFORMERS_CACHE,
+        SAFE_WEIGHTS_INDEX_NAME,
+        SAFE_WEIGHTS_NAME,
         SPIECE_UNDERLINE,
         TF2_WEIGHTS_NAME,
         TF_WEIGHTS_NAME,
         TRANSFORMERS_CACHE,
+        WEIGHTS_INDEX_NAME,
         WEIGHTS_NAME,
         TensorType,
         add_end_docstrings,
         add_start_docstrings,
         cached_path,
+        cached_paths,
         is_apex_available,
         is_datasets_available,
         is_faiss_available,
@@ -2036,6 +2047,7 @@ if TYPE_CHECKING:
         is_torch_tpu_available,
         is_vision_available,
     )
+    from .generation_streamers import BaseStreamer, TextIteratorStreamer, TextStreamer
     from .hf_argparser import HfArgumentParser
 
     # Integrations
@@ -2394,6 +2406,7 @@ if TYPE_CHECKING:
             TextDatasetForNextSentencePrediction,
         )
         from .generation_beam_search import BeamScorer, BeamSearchScorer
+        from .generation_continuous_batching import ContinuousBatchingScheduler, GenerationRequest
         from .generation_logits_process import (
             ForcedBOSTokenLogitsProcessor,
             ForcedEOSTokenLogitsProcessor,
@@ -2411,6 +2424,7 @@ if TYPE_CHECKING:
             TopKLogitsWarper,
             TopPLogitsWarper,
         )
+        from .generation_static_cache import StaticCache, StaticCacheLayer
         from .generation_stopping_criteria import (
             MaxLengthCriteria,
             MaxTimeCriteria,
@@ -23,6 +23,7 @@ from typing import Callable, Optional
 
 from ..configuration_utils import PretrainedConfig
 from ..file_utils import is_py3nvml_available, is_torch_available
+from ..models.auto.configuration_auto import AutoConfig
 from ..models.auto.modeling_auto import MODEL_MAPPING, MODEL_WITH_LM_HEAD_MAPPING
 from ..utils import logging
 from .benchmark_utils import (
@@ -79,6 +80,9 @@ class PyTorchBenchmark(Benchmark):
         return self._measure_memory(_train)
 
     def _prepare_inference_func(self, model_name: str, batch_size: int, sequence_length: int) -> Callable[[], None]:
+        if self.args.generate_new_tokens > 0:
+            return self._prepare_generate_func(model_name, batch_size, sequence_length)
+
         config = self.config_dict[model_name]
 
         if self.args.torchscript:
@@ -136,6 +140,53 @@ class PyTorchBenchmark(Benchmark):
         _forward = encoder_decoder_forward if config.is_encoder_decoder else encoder_forward
         return _forward
 
+    def _prepare_generate_func(self, model_name: str, batch_size: int, sequence_length: int) -> Callable[[], None]:
+        config = self.config_dict[model_name]
+
+        # how fast assisted generation is depends on how often the assistant agrees with the model, so that both are
+        # loaded with their pretrained weights, and so is the model when benchmarked without assistant for comparison
+        model = MODEL_WITH_LM_HEAD_MAPPING[config.__class__].from_pretrained(model_name, config=config)
+        models = [model]
+        assistant_model = None
+        if self.args.assistant_model is not None:
+            if batch_size != 1:
+                raise ValueError(f"Assisted generation only supports a batch size of 1, but is {batch_size}.")
+            assistant_config = AutoConfig.from_pretrained(self.args.assistant_model)
+            assistant_model = MODEL_WITH_LM_HEAD_MAPPING[assistant_config.__class__].from_pretrained(
+                self.args.assistant_model, config=assistant_config
+            )
+            models.append(assistant_model)
+
+        for model_to_prepare in models:
+            model_to_prepare.eval()
+            model_to_prepare.to(self.args.device)
+            if self.args.fp16:
+                if not self.args.is_gpu:
+                    raise ValueError("Mixed precision is possible only for GPU.")
+                model_to_prepare.half()
+
+        input_ids = torch.randint(
+            config.vocab_size, (batch_size, sequence_length), dtype=torch.long, device=self.args.device
+        )
+        # the same number of tokens is generated by every run
+        max_length = (1 if config.is_encoder_decoder else sequence_length) + self.args.generate_new_tokens
+        pad_token_id = config.pad_token_id if config.pad_token_id is not None else config.eos_token_id
+
+        def generate():
+            with torch.no_grad():
+                outputs = model.generate(
+                    input_ids,
+                    max_length=max_length,
+                    min_length=max_length,
+                    num_beams=1,
+                    do_sample=False,
+                    pad_token_id=pad_token_id,
+                    assistant_model=assistant_model,
+                )
+            return outputs
+
+        return generate
+
     def _prepare_train_func(self, model_name: str, batch_size: int, sequence_length: int) -> Callable[[], None]:
         config = self.config_dict[model_name]
 
@@ -15,7 +15,7 @@
 # limitations under the License.
 
 from dataclasses import dataclass, field
-from typing import Tuple
+from typing import Optional, Tuple
 
 from ..file_utils import cached_property, is_torch_available, is_torch_tpu_available, torch_required
 from ..utils import logging
@@ -61,6 +61,8 @@ class PyTorchBenchmarkArguments(BenchmarkArguments):
         self.torchscript = kwargs.pop("torchscript", self.torchscript)
         self.torch_xla_tpu_print_metrics = kwargs.pop("torch_xla_tpu_print_metrics", self.torch_xla_tpu_print_metrics)
         self.fp16_opt_level = kwargs.pop("fp16_opt_level", self.fp16_opt_level)
+        self.generate_new_tokens = kwargs.pop("generate_new_tokens", self.generate_new_tokens)
+        self.assistant_model = kwargs.pop("assistant_model", self.assistant_model)
         super().__init__(**kwargs)
 
     torchscript: bool = field(default=False, metadata={"help": "Trace the models using torchscript"})
@@ -74,6 +76,25 @@ class PyTorchBenchmarkArguments(BenchmarkArguments):
             )
         },
     )
+    generate_new_tokens: int = field(
+        default=0,
+        metadata={
+            "help": (
+                "If > 0, benchmark inference as greedy `generate` of this many new tokens after a prompt of "
+                "`sequence_length` tokens instead of a single forward pass. The models are then loaded with their "
+                "pretrained weights."
+            )
+        },
+    )
+    assistant_model: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": (
+                "Model checkpoint assisting the greedy generation of the benchmarked models when "
+                "`generate_new_tokens` > 0. Only supports a batch size of 1."
+            )
+        },
+    )
 
     @cached_property
     @torch_required
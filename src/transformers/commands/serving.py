@@ -12,10 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import time
 from argparse import ArgumentParser, Namespace
-from typing import Any, List, Optional
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 
 from ..pipelines import SUPPORTED_TASKS, TASK_ALIASES, Pipeline, pipeline
+from ..pipelines.base import pad_collate_fn
 from ..utils import logging
 from . import BaseTransformersCLICommand
 
@@ -53,7 +59,159 @@ def serve_command_factory(args: Namespace):
         tokenizer=args.tokenizer,
         device=args.device,
     )
-    return ServeCommand(nlp, args.host, args.port, args.workers)
+    return ServeCommand(
+        nlp,
+        args.host,
+        args.port,
+        args.workers,
+        max_batch_size=args.max_batch_size,
+        max_wait_time=args.max_wait_time,
+    )
+
+
+class DynamicBatcher:
+    """
+    Queues the inputs of concurrent requests and runs them through :obj:`pipeline` in batches of up to
+    :obj:`max_batch_size` inputs, padded by the pipeline, waiting at most :obj:`max_wait_time` seconds after the first
+    queued request for others to join its batch. The pipeline runs in a worker thread so that requests keep being
+    queued meanwhile.
+
+    With a :obj:`max_batch_size` of 1, each request is run on its own exactly like a call of :obj:`pipeline`.
+    Otherwise, the inputs of all the requests of a batch are passed as a single list, so that a request for a single
+    input gets the output the pipeline returns for that input in a list.
+
+    Args:
+        pipeline (:class:`~transformers.Pipeline`):
+            The pipeline running the batches.
+        max_batch_size (:obj:`int`, `optional`, defaults to 1):
+            The maximum number of inputs in a batch.
+        max_wait_time (:obj:`float`, `optional`, defaults to 0.005):
+            The maximum time in seconds a request waits for other requests to fill its batch.
+        num_latencies (:obj:`int`, `optional`, defaults to 1000):
+            The number of most recent request latencies the latency metrics are computed on.
+    """
+
+    def __init__(
+        self, pipeline: Pipeline, max_batch_size: int = 1, max_wait_time: float = 0.005, num_latencies: int = 1000
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"`max_batch_size` has to be a positive integer, but is {max_batch_size}.")
+        if max_batch_size > 1:
+            # fails early if the pipeline cannot pad its inputs
+            pad_collate_fn(pipeline.tokenizer, pipeline.feature_extractor)
+
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+
+        self.num_requests = 0
+        self.batch_size_histogram = {}
+        self.latencies = deque(maxlen=num_latencies)
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        """
+        Starts batching the queued requests on the running event loop.
+        """
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_event_loop().create_task(self._batch_loop())
+
+    async def stop(self):
+        """
+        Stops batching the queued requests.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def __call__(self, inputs: Any) -> Any:
+        """
+        Queues :obj:`inputs` and returns the output of the pipeline for them once their batch has run.
+        """
+        if self._task is None:
+            raise RuntimeError("The batcher has to be started before queuing requests.")
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((inputs, future, time.perf_counter()))
+        return await future
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Returns the current queue depth, the number of requests served, the histogram of the number of inputs per batch
+        and the mean, median, 90th and 99th percentiles and maximum of the most recent request latencies in seconds.
+        """
+        latency = {}
+        if len(self.latencies) > 0:
+            latencies = np.array(self.latencies)
+            latency = {
+                "mean": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p90": float(np.percentile(latencies, 90)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+            }
+        return {
+            "queue_depth": self.queue_depth,
+            "num_requests": self.num_requests,
+            "batch_size_histogram": dict(self.batch_size_histogram),
+            "latency": latency,
+        }
+
+    async def _batch_loop(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            requests = [await self._queue.get()]
+            num_inputs = _num_inputs(requests[0][0])
+            deadline = loop.time() + self.max_wait_time
+            while num_inputs < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                requests.append(request)
+                num_inputs += _num_inputs(request[0])
+
+            self.batch_size_histogram[num_inputs] = self.batch_size_histogram.get(num_inputs, 0) + 1
+            try:
+                outputs = await loop.run_in_executor(None, self._run_batch, [inputs for inputs, _, _ in requests])
+            except Exception as e:
+                for _, future, _ in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, start_time), output in zip(requests, outputs):
+                if not future.done():
+                    future.set_result(output)
+                self.latencies.append(time.perf_counter() - start_time)
+                self.num_requests += 1
+
+    def _run_batch(self, batch: List[Any]) -> List[Any]:
+        if self.max_batch_size == 1:
+            return [self.pipeline(inputs) for inputs in batch]
+
+        flat_inputs = []
+        for inputs in batch:
+            flat_inputs.extend(inputs if isinstance(inputs, list) else [inputs])
+        flat_outputs = self.pipeline(flat_inputs, batch_size=min(len(flat_inputs), self.max_batch_size))
+
+        outputs = []
+        for inputs in batch:
+            num_inputs = _num_inputs(inputs)
+            outputs.append(flat_outputs[:num_inputs] if isinstance(inputs, list) else flat_outputs[0])
+            flat_outputs = flat_outputs[num_inputs:]
+        return outputs
+
+
+def _num_inputs(inputs: Any) -> int:
+    return len(inputs) if isinstance(inputs, list) else 1
 
 
 class ServeModelInfoResult(BaseModel):
@@ -89,6 +247,17 @@ class ServeForwardResult(BaseModel):
     output: Any
 
 
+class ServeMetricsResult(BaseModel):
+    """
+    Batching metrics model
+    """
+
+    queue_depth: int
+    num_requests: int
+    batch_size_histogram: Dict[int, int]
+    latency: Dict[str, float]
+
+
 class ServeCommand(BaseTransformersCLICommand):
     @staticmethod
     def register_subcommand(parser: ArgumentParser):
@@ -119,11 +288,32 @@ class ServeCommand(BaseTransformersCLICommand):
             default=-1,
             help="Indicate the device to run onto, -1 indicates CPU, >= 0 indicates GPU (default: -1)",
         )
+        serve_parser.add_argument(
+            "--max_batch_size",
+            type=int,
+            default=1,
+            help="Maximum number of inputs of concurrent /forward requests run as a single padded batch.",
+        )
+        serve_parser.add_argument(
+            "--max_wait_time",
+            type=float,
+            default=0.005,
+            help="Maximum time in seconds a /forward request waits for other requests to fill its batch.",
+        )
         serve_parser.set_defaults(func=serve_command_factory)
 
-    def __init__(self, pipeline: Pipeline, host: str, port: int, workers: int):
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        host: str,
+        port: int,
+        workers: int,
+        max_batch_size: int = 1,
+        max_wait_time: float = 0.005,
+    ):
 
         self._pipeline = pipeline
+        self._batcher = DynamicBatcher(pipeline, max_batch_size=max_batch_size, max_wait_time=max_wait_time)
 
         self.host = host
         self.port = port
@@ -167,7 +357,16 @@ class ServeCommand(BaseTransformersCLICommand):
                         response_class=JSONResponse,
                         methods=["POST"],
                     ),
+                    APIRoute(
+                        "/metrics",
+                        self.metrics,
+                        response_model=ServeMetricsResult,
+                        response_class=JSONResponse,
+                        methods=["GET"],
+                    ),
                 ],
+                on_startup=[self._batcher.start],
+                on_shutdown=[self._batcher.stop],
                 timeout=600,
             )
 
@@ -224,8 +423,15 @@ class ServeCommand(BaseTransformersCLICommand):
             return ServeForwardResult(output=[], attention=[])
 
         try:
-            # Forward through the model
-            output = self._pipeline(inputs)
+            # Forward through the model, batched with the concurrent requests
+            output = await self._batcher(inputs)
             return ServeForwardResult(output=output)
         except Exception as e:
             raise HTTPException(500, {"error": str(e)})
+
+    def metrics(self):
+        """
+        Batching metrics: the number of queued requests, the number of requests served, the histogram of the number of
+        inputs per batch and the latencies of the most recent requests in seconds.
+        """
+        return ServeMetricsResult(**self._batcher.metrics())
@@ -28,13 +28,16 @@ import subprocess
 import sys
 import tarfile
 import tempfile
+import threading
+import time
 import types
 from collections import OrderedDict, UserDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import ExitStack, contextmanager
 from dataclasses import fields
 from enum import Enum
 from functools import partial, wraps
-from hashlib import sha256
+from hashlib import sha1, sha256
 from pathlib import Path
 from types import ModuleType
 from typing import Any, BinaryIO, ContextManager, Dict, List, Optional, Tuple, Union
@@ -254,6 +257,9 @@ SESSION_ID = uuid4().hex
 DISABLE_TELEMETRY = os.getenv("DISABLE_TELEMETRY", False) in ENV_VARS_TRUE_VALUES
 
 WEIGHTS_NAME = "pytorch_model.bin"
+WEIGHTS_INDEX_NAME = "pytorch_model.bin.index.json"
+SAFE_WEIGHTS_NAME = "model.safetensors"
+SAFE_WEIGHTS_INDEX_NAME = "model.safetensors.index.json"
 TF2_WEIGHTS_NAME = "tf_model.h5"
 TF_WEIGHTS_NAME = "model.ckpt"
 FLAX_WEIGHTS_NAME = "flax_model.msgpack"
@@ -279,6 +285,14 @@ _default_endpoint = "https://moon-staging.huggingface.co" if _staging_mode else
 HUGGINGFACE_CO_RESOLVE_ENDPOINT = os.environ.get("HUGGINGFACE_CO_RESOLVE_ENDPOINT", _default_endpoint)
 HUGGINGFACE_CO_PREFIX = HUGGINGFACE_CO_RESOLVE_ENDPOINT + "/{model_id}/resolve/{revision}/{filename}"
 
+# Maximum number of files, or parts of a large file, downloaded at the same time
+DOWNLOAD_MAX_WORKERS = int(os.environ.get("TRANSFORMERS_DOWNLOAD_WORKERS", 8))
+# Files bigger than this are downloaded in parts of this size over several connections
+DOWNLOAD_PART_SIZE = 64 * 2 ** 20
+DOWNLOAD_CHUNK_SIZE = 2 ** 20
+DOWNLOAD_MAX_RETRIES = 5
+DOWNLOAD_TIMEOUT = 60
+
 # This is the version of torch required to run torch.fx features and torch.onnx with dictionary inputs.
 TORCH_FX_REQUIRED_VERSION = version.parse("1.9")
 TORCH_ONNX_DICT_INPUTS_MINIMUM_VERSION = version.parse("1.8")
@@ -1253,7 +1267,7 @@ def add_code_sample_docstrings(
     config_class=None,
     mask=None,
     model_cls=None,
-    modality=None
+    modality=None,
 ):
     def docstring_decorator(fn):
         # model_class defaults to function's class if not specified otherwise
@@ -1542,6 +1556,120 @@ def cached_path(
     return output_path
 
 
+def cached_paths(urls_or_filenames, return_exceptions=False, **kwargs) -> List:
+    """
+    Runs :func:`cached_path` on several URLs or local paths at the same time, with up to :obj:`DOWNLOAD_MAX_WORKERS`
+    threads, so that the files needed by a model are downloaded concurrently.
+
+    Args:
+        urls_or_filenames (:obj:`List[str]`):
+            The URLs or local paths to resolve.
+        return_exceptions (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether to return the exception raised for a file in place of its path instead of raising it.
+        kwargs:
+            Passed along to :func:`cached_path`.
+
+    Returns:
+        :obj:`List`: The local paths of the files (or the exceptions raised), in the order of
+        :obj:`urls_or_filenames`.
+    """
+    urls_or_filenames = list(urls_or_filenames)
+
+    def _cached_path(url_or_filename):
+        try:
+            return cached_path(url_or_filename, **kwargs)
+        except Exception as err:
+            if return_exceptions:
+                return err
+            raise
+
+    if len(urls_or_filenames) <= 1 or DOWNLOAD_MAX_WORKERS <= 1:
+        return [_cached_path(url_or_filename) for url_or_filename in urls_or_filenames]
+    with ThreadPoolExecutor(max_workers=min(DOWNLOAD_MAX_WORKERS, len(urls_or_filenames))) as executor:
+        return list(executor.map(_cached_path, urls_or_filenames))
+
+
+def convert_file_size_to_int(size: Union[int, str]) -> int:
+    """
+    Converts a size expressed as a string with digits and a unit (like :obj:`"5MB"`) to an integer (in bytes).
+
+    Args:
+        size (:obj:`int` or :obj:`str`): The size to convert. Will be directly returned if an :obj:`int`.
+
+    Example::
+
+        >>> convert_file_size_to_int("1MiB")
+        1048576
+    """
+    if isinstance(size, int):
+        return size
+    units = {"GIB": 2 ** 30, "MIB": 2 ** 20, "KIB": 2 ** 10, "GB": 10 ** 9, "MB": 10 ** 6, "KB": 10 ** 3}
+    for unit, factor in units.items():
+        if size.upper().endswith(unit):
+            return int(float(size[: -len(unit)]) * factor)
+    raise ValueError(f"`size` should be an integer or a string like '5GB', '100MB' or '1GiB', but is {size}.")
+
+
+def get_checkpoint_shard_files(
+    pretrained_model_name_or_path,
+    index_filename,
+    cache_dir=None,
+    force_download=False,
+    proxies=None,
+    resume_download=False,
+    local_files_only=False,
+    use_auth_token=None,
+    user_agent=None,
+    revision=None,
+    mirror=None,
+) -> Tuple[List[str], Dict]:
+    """
+    For a sharded checkpoint, reads the index (resolved at :obj:`index_filename`) and downloads, if necessary, all the
+    shards of the checkpoint.
+
+    Returns:
+        :obj:`Tuple[List[str], Dict]`: The list of the local paths of the shards (in the order of the index) and the
+        metadata of the index, with the list of all the weight names of the checkpoint added under
+        :obj:`"all_checkpoint_keys"`.
+    """
+    with open(index_filename, "r", encoding="utf-8") as f:
+        index = json.load(f)
+
+    shard_filenames = sorted(set(index["weight_map"].values()))
+    sharded_metadata = index["metadata"]
+    sharded_metadata["all_checkpoint_keys"] = list(index["weight_map"].keys())
+
+    # The shards of a local checkpoint are next to its index
+    if os.path.isdir(pretrained_model_name_or_path):
+        return [os.path.join(pretrained_model_name_or_path, f) for f in shard_filenames], sharded_metadata
+
+    shard_urls = [
+        hf_bucket_url(pretrained_model_name_or_path, filename=shard_filename, revision=revision, mirror=mirror)
+        for shard_filename in shard_filenames
+    ]
+    cached_filenames = cached_paths(
+        shard_urls,
+        return_exceptions=True,
+        cache_dir=cache_dir,
+        force_download=force_download,
+        proxies=proxies,
+        resume_download=resume_download,
+        local_files_only=local_files_only,
+        use_auth_token=use_auth_token,
+        user_agent=user_agent,
+    )
+    for shard_filename, cached_filename in zip(shard_filenames, cached_filenames):
+        if isinstance(cached_filename, EnvironmentError):
+            raise EnvironmentError(
+                f"{pretrained_model_name_or_path} does not appear to have the file {shard_filename} which is "
+                "required according to the checkpoint index."
+            ) from cached_filename
+        elif isinstance(cached_filename, Exception):
+            raise cached_filename
+
+    return cached_filenames, sharded_metadata
+
+
 def define_sagemaker_information():
     try:
         instance_data = requests.get(os.environ["ECS_CONTAINER_METADATA_URI"]).json()
@@ -1591,31 +1719,243 @@ def http_user_agent(user_agent: Union[Dict, str, None] = None) -> str:
     return ua
 
 
+_http_session = None
+_http_session_pid = None
+_http_session_lock = threading.Lock()
+# Caps the number of connections opened at the same time by all the downloads of the process
+_download_slots = threading.BoundedSemaphore(max(DOWNLOAD_MAX_WORKERS, 1))
+
+
+def _get_http_session() -> requests.Session:
+    """
+    Returns the :obj:`requests.Session` shared by all the requests of the process, so that connections to the same host
+    are reused instead of being opened for every file.
+    """
+    global _http_session, _http_session_pid
+    with _http_session_lock:
+        # A session (and its connections) must not be shared with a forked process
+        if _http_session is None or _http_session_pid != os.getpid():
+            pool_size = max(DOWNLOAD_MAX_WORKERS, 1)
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session, _http_session_pid = session, os.getpid()
+        return _http_session
+
+
+def _wait_before_retry(url: str, retries: int, position: int, err: Exception):
+    if retries > DOWNLOAD_MAX_RETRIES:
+        raise err
+    logger.warning(f"Download of {url} interrupted ({err}), resuming from byte {position}.")
+    time.sleep(min(0.5 * 2 ** (retries - 1), 8))
+
+
 def http_get(url: str, temp_file: BinaryIO, proxies=None, resume_size=0, headers: Optional[Dict[str, str]] = None):
     """
-    Download remote file. Do not gobble up errors.
+    Download remote file. Do not gobble up errors, except dropped connections which are retried up to
+    :obj:`DOWNLOAD_MAX_RETRIES` times, resuming from the last byte received.
     """
-    headers = copy.deepcopy(headers)
-    if resume_size > 0:
-        headers["Range"] = f"bytes={resume_size}-"
-    r = requests.get(url, stream=True, proxies=proxies, headers=headers)
-    r.raise_for_status()
-    content_length = r.headers.get("Content-Length")
-    total = resume_size + int(content_length) if content_length is not None else None
+    headers = copy.deepcopy(headers) if headers is not None else {}
+    session = _get_http_session()
+    progress = None
+    retries = 0
+    while True:
+        if resume_size > 0:
+            headers["Range"] = f"bytes={resume_size}-"
+        try:
+            with _download_slots, session.get(
+                url, stream=True, proxies=proxies, headers=headers, timeout=DOWNLOAD_TIMEOUT
+            ) as r:
+                r.raise_for_status()
+                if resume_size > 0 and r.status_code != 206:
+                    # The server ignored the range and sends the whole file again
+                    temp_file.seek(0)
+                    temp_file.truncate()
+                    resume_size = 0
+                content_length = r.headers.get("Content-Length")
+                total = resume_size + int(content_length) if content_length is not None else None
+                if progress is None:
+                    progress = tqdm(
+                        unit="B",
+                        unit_scale=True,
+                        unit_divisor=1024,
+                        total=total,
+                        initial=resume_size,
+                        desc="Downloading",
+                        disable=bool(logging.get_verbosity() == logging.NOTSET),
+                    )
+                elif resume_size == 0:
+                    progress.reset(total=total)
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if chunk:  # filter out keep-alive new chunks
+                        progress.update(len(chunk))
+                        temp_file.write(chunk)
+                        resume_size += len(chunk)
+                if total is not None and resume_size < total:
+                    raise requests.exceptions.ChunkedEncodingError(f"Connection closed after {resume_size} bytes")
+            break
+        except (requests.exceptions.SSLError, requests.exceptions.ProxyError):
+            raise
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.Timeout,
+        ) as err:
+            retries += 1
+            _wait_before_retry(url, retries, resume_size, err)
+    progress.close()
+
+
+def http_get_in_parts(
+    url: str,
+    filename: str,
+    size: int,
+    proxies=None,
+    headers: Optional[Dict[str, str]] = None,
+    resume_size: int = 0,
+    parts_file: Optional[str] = None,
+):
+    """
+    Download a remote file of :obj:`size` bytes to :obj:`filename` in parts of :obj:`DOWNLOAD_PART_SIZE` bytes, fetched
+    with range requests over up to :obj:`DOWNLOAD_MAX_WORKERS` connections. A dropped connection only resumes the part
+    it was downloading.
+
+    The first :obj:`resume_size` bytes of :obj:`filename` are considered already downloaded. If :obj:`parts_file` is
+    passed, the parts completed are recorded in it, and the ones it lists are skipped, so that an interrupted download
+    can be resumed.
+    """
+    session = _get_http_session()
+    part_size = DOWNLOAD_PART_SIZE
+    num_parts = (size + part_size - 1) // part_size
+    done = {i for i in range(num_parts) if min((i + 1) * part_size, size) <= resume_size}
+    if parts_file is not None and os.path.exists(parts_file) and os.path.exists(filename):
+        try:
+            with open(parts_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state["size"] == size and state["part_size"] == part_size:
+                done.update(state["done"])
+        except (ValueError, KeyError):
+            logger.info(f"Ignoring the corrupted download state {parts_file}.")
+
+    # Allocate the whole file so that each part is written at its offset
+    with open(filename, "ab") as f:
+        f.truncate(size)
+
     progress = tqdm(
         unit="B",
         unit_scale=True,
         unit_divisor=1024,
-        total=total,
-        initial=resume_size,
+        total=size,
+        initial=sum(min((i + 1) * part_size, size) - i * part_size for i in done),
         desc="Downloading",
         disable=bool(logging.get_verbosity() == logging.NOTSET),
     )
-    for chunk in r.iter_content(chunk_size=1024):
-        if chunk:  # filter out keep-alive new chunks
-            progress.update(len(chunk))
-            temp_file.write(chunk)
-    progress.close()
+    stop = threading.Event()
+    state_lock = threading.Lock()
+
+    def download_part(index):
+        position = index * part_size
+        end = min(position + part_size, size)
+        part_headers = copy.deepcopy(headers) if headers is not None else {}
+        retries = 0
+        with open(filename, "r+b") as f:
+            f.seek(position)
+            while position < end:
+                if stop.is_set():
+                    return
+                part_headers["Range"] = f"bytes={position}-{end - 1}"
+                try:
+                    with _download_slots, session.get(
+                        url, stream=True, proxies=proxies, headers=part_headers, timeout=DOWNLOAD_TIMEOUT
+                    ) as r:
+                        r.raise_for_status()
+                        if r.status_code != 206:
+                            raise EnvironmentError(f"The server of {url} does not support range requests.")
+                        for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            if stop.is_set():
+                                return
+                            chunk = chunk[: end - position]
+                            f.write(chunk)
+                            position += len(chunk)
+                            progress.update(len(chunk))
+                            if position >= end:
+                                break
+                    if position < end:
+                        raise requests.exceptions.ChunkedEncodingError(f"Connection closed at byte {position}")
+                except (requests.exceptions.SSLError, requests.exceptions.ProxyError):
+                    raise
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout,
+                ) as err:
+                    retries += 1
+                    _wait_before_retry(url, retries, position, err)
+        with state_lock:
+            done.add(index)
+            if parts_file is not None:
+                with open(parts_file, "w", encoding="utf-8") as f:
+                    json.dump({"size": size, "part_size": part_size, "done": sorted(done)}, f)
+
+    todo = [i for i in range(num_parts) if i not in done]
+    try:
+        with ThreadPoolExecutor(max_workers=max(min(DOWNLOAD_MAX_WORKERS, len(todo)), 1)) as executor:
+            futures = [executor.submit(download_part, i) for i in todo]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        progress.close()
+
+
+def _supports_range_requests(url: str, proxies=None, headers: Optional[Dict[str, str]] = None) -> bool:
+    headers = copy.deepcopy(headers) if headers is not None else {}
+    headers["Range"] = "bytes=0-0"
+    try:
+        with _get_http_session().get(
+            url, stream=True, proxies=proxies, headers=headers, timeout=DOWNLOAD_TIMEOUT
+        ) as r:
+            return r.status_code == 206
+    except requests.exceptions.RequestException:
+        return False
+
+
+def verify_checksum(filename: str, etag: str, url: Optional[str] = None):
+    """
+    Checks the content of :obj:`filename` against :obj:`etag` when it is a digest of the file, which is the case on
+    huggingface.co: the sha256 of the file for files stored with git-lfs, the sha1 of the git blob for the others.
+    Other ETags cannot be checked and are ignored.
+
+    Raises:
+        :obj:`EnvironmentError`: If the content of the file does not match the digest.
+    """
+    if etag.startswith("W/"):
+        # Weak ETags are not digests of the content
+        return
+    digest = etag.strip('"').lower()
+    if re.fullmatch(r"[0-9a-f]{64}", digest):
+        hashers = [sha256()]
+    elif re.fullmatch(r"[0-9a-f]{40}", digest):
+        blob_header = f"blob {os.path.getsize(filename)}\0".encode()
+        hashers = [sha1(blob_header), sha1()]
+    else:
+        return
+
+    with open(filename, "rb") as f:
+        for chunk in iter(partial(f.read, DOWNLOAD_CHUNK_SIZE), b""):
+            for hasher in hashers:
+                hasher.update(chunk)
+    if all(hasher.hexdigest() != digest for hasher in hashers):
+        raise EnvironmentError(
+            f"The file downloaded from {url or filename} does not match its checksum {digest}, it may have been "
+            "corrupted during the download. Please try again."
+        )
 
 
 def get_from_cache(
@@ -1657,9 +1997,12 @@ def get_from_cache(
 
     url_to_download = url
     etag = None
+    size = None
     if not local_files_only:
         try:
-            r = requests.head(url, headers=headers, allow_redirects=False, proxies=proxies, timeout=etag_timeout)
+            r = _get_http_session().head(
+                url, headers=headers, allow_redirects=False, proxies=proxies, timeout=etag_timeout
+            )
             r.raise_for_status()
             etag = r.headers.get("X-Linked-Etag") or r.headers.get("ETag")
             # We favor a custom header indicating the etag of the linked resource, and
@@ -1675,6 +2018,12 @@ def get_from_cache(
             # between the HEAD and the GET (unlikely, but hey).
             if 300 <= r.status_code <= 399:
                 url_to_download = r.headers["Location"]
+            # The size of the file, to decide whether to download it in parts. In case of a redirect, the
+            # Content-Length is the one of the redirection.
+            size = r.headers.get("X-Linked-Size")
+            if size is None and not 300 <= r.status_code <= 399:
+                size = r.headers.get("Content-Length")
+            size = int(size) if size is not None else None
         except (requests.exceptions.SSLError, requests.exceptions.ProxyError):
             # Actually raise for those subclasses of ConnectionError
             raise
@@ -1697,7 +2046,7 @@ def get_from_cache(
             matching_files = [
                 file
                 for file in fnmatch.filter(os.listdir(cache_dir), filename.split(".")[0] + ".*")
-                if not file.endswith(".json") and not file.endswith(".lock")
+                if not file.endswith((".json", ".lock", ".incomplete", ".parts"))
             ]
             if len(matching_files) > 0:
                 return os.path.join(cache_dir, matching_files[-1])
@@ -1730,8 +2079,22 @@ def get_from_cache(
             # Even if returning early like here, the lock will be released.
             return cache_path
 
+        incomplete_path = cache_path + ".incomplete"
+        # Records the parts of `incomplete_path` already downloaded when downloading in parts
+        parts_path = cache_path + ".parts"
+        in_parts = (
+            size is not None
+            and size > DOWNLOAD_PART_SIZE
+            and DOWNLOAD_MAX_WORKERS > 1
+            and _supports_range_requests(url_to_download, proxies=proxies, headers=headers)
+        )
+        if os.path.exists(parts_path) and not (resume_download and in_parts and os.path.exists(incomplete_path)):
+            # The incomplete file was allocated to its full size and can only be resumed in parts
+            os.remove(parts_path)
+            if os.path.exists(incomplete_path):
+                os.remove(incomplete_path)
+
         if resume_download:
-            incomplete_path = cache_path + ".incomplete"
 
             @contextmanager
             def _resumable_file_manager() -> "io.BufferedWriter":
@@ -1739,7 +2102,7 @@ def get_from_cache(
                     yield f
 
             temp_file_manager = _resumable_file_manager
-            if os.path.exists(incomplete_path):
+            if os.path.exists(incomplete_path) and not os.path.exists(parts_path):
                 resume_size = os.stat(incomplete_path).st_size
             else:
                 resume_size = 0
@@ -1752,10 +2115,39 @@ def get_from_cache(
         with temp_file_manager() as temp_file:
             logger.info(f"{url} not found in cache or force_download set to True, downloading to {temp_file.name}")
 
-            http_get(url_to_download, temp_file, proxies=proxies, resume_size=resume_size, headers=headers)
+            if not in_parts:
+                http_get(url_to_download, temp_file, proxies=proxies, resume_size=resume_size, headers=headers)
+
+        if in_parts:
+            try:
+                http_get_in_parts(
+                    url_to_download,
+                    temp_file.name,
+                    size,
+                    proxies=proxies,
+                    headers=headers,
+                    resume_size=resume_size,
+                    parts_file=parts_path if resume_download else None,
+                )
+            except BaseException:
+                # Only keep a partial download if it can be resumed
+                if not resume_download:
+                    os.remove(temp_file.name)
+                raise
+
+        try:
+            verify_checksum(temp_file.name, etag, url=url)
+        except EnvironmentError:
+            # A corrupted file cannot be resumed
+            os.remove(temp_file.name)
+            if os.path.exists(parts_path):
+                os.remove(parts_path)
+            raise
 
         logger.info(f"storing {url} in cache at {cache_path}")
         os.replace(temp_file.name, cache_path)
+        if os.path.exists(parts_path):
+            os.remove(parts_path)
 
         # NamedTemporaryFile creates a file with hardwired 0600 perms (ignoring umask), so fixing it.
         umask = os.umask(0o666)
@@ -170,15 +170,16 @@ class BeamSearchScorer(BeamScorer):
         self.num_beam_groups = num_beam_groups
         self.group_size = self.num_beams // self.num_beam_groups
 
+        self.batch_size = batch_size
+
         self._is_init = False
-        self._beam_hyps = [
-            BeamHypotheses(
-                num_beams=self.num_beams,
-                length_penalty=self.length_penalty,
-                early_stopping=self.do_early_stopping,
-            )
-            for _ in range(batch_size)
-        ]
+        self._beam_hyps = BeamHypotheses(
+            batch_size=batch_size,
+            num_beams=self.num_beams,
+            length_penalty=self.length_penalty,
+            early_stopping=self.do_early_stopping,
+            device=self.device,
+        )
         self._done = torch.tensor([False for _ in range(batch_size)], dtype=torch.bool, device=self.device)
 
         if not isinstance(num_beams, int) or num_beams <= 1:
@@ -213,7 +214,7 @@ class BeamSearchScorer(BeamScorer):
         eos_token_id: Optional[int] = None,
     ) -> Tuple[torch.Tensor]:
         cur_len = input_ids.shape[-1]
-        batch_size = len(self._beam_hyps)
+        batch_size = self.batch_size
         if not (batch_size == (input_ids.shape[0] // self.group_size)):
             if self.num_beam_groups > 1:
                 raise ValueError(
@@ -226,59 +227,50 @@ class BeamSearchScorer(BeamScorer):
                     f"{self.group_size} is expected by the beam scorer."
                 )
 
+        if (eos_token_id is None or pad_token_id is None) and self._done.any():
+            raise ValueError("Generated beams >= num_beams -> eos_token_id and pad_token have to be defined")
+
         device = input_ids.device
-        next_beam_scores = torch.zeros((batch_size, self.group_size), dtype=next_scores.dtype, device=device)
-        next_beam_tokens = torch.zeros((batch_size, self.group_size), dtype=next_tokens.dtype, device=device)
-        next_beam_indices = torch.zeros((batch_size, self.group_size), dtype=next_indices.dtype, device=device)
-
-        for batch_idx, beam_hyp in enumerate(self._beam_hyps):
-            if self._done[batch_idx]:
-                if self.num_beams < len(beam_hyp):
-                    raise ValueError(f"Batch can only be done if at least {self.num_beams} beams have been generated")
-                if eos_token_id is None or pad_token_id is None:
-                    raise ValueError("Generated beams >= num_beams -> eos_token_id and pad_token have to be defined")
-                # pad the batch
-                next_beam_scores[batch_idx, :] = 0
-                next_beam_tokens[batch_idx, :] = pad_token_id
-                next_beam_indices[batch_idx, :] = 0
-                continue
-
-            # next tokens for this sentence
-            beam_idx = 0
-            for beam_token_rank, (next_token, next_score, next_index) in enumerate(
-                zip(next_tokens[batch_idx], next_scores[batch_idx], next_indices[batch_idx])
-            ):
-                batch_beam_idx = batch_idx * self.group_size + next_index
-                # add to generated hypotheses if end of sentence
-                if (eos_token_id is not None) and (next_token.item() == eos_token_id):
-                    # if beam_token does not belong to top num_beams tokens, it should not be added
-                    is_beam_token_worse_than_top_num_beams = beam_token_rank >= self.group_size
-                    if is_beam_token_worse_than_top_num_beams:
-                        continue
-                    beam_hyp.add(
-                        input_ids[batch_beam_idx].clone(),
-                        next_score.item(),
-                    )
-                else:
-                    # add next predicted token since it is not eos_token
-                    next_beam_scores[batch_idx, beam_idx] = next_score
-                    next_beam_tokens[batch_idx, beam_idx] = next_token
-                    next_beam_indices[batch_idx, beam_idx] = batch_beam_idx
-                    beam_idx += 1
-
-                # once the beam for next step is full, don't add more tokens to it.
-                if beam_idx == self.group_size:
-                    break
-
-            if beam_idx < self.group_size:
-                raise ValueError(
-                    f"At most {self.group_size} tokens in {next_tokens[batch_idx]} can be equal to `eos_token_id: {eos_token_id}`. Make sure {next_tokens[batch_idx]} are corrected."
-                )
+        done = self._done.to(device)
+        num_candidates = next_tokens.shape[-1]
+        batch_beam_indices = next_indices + torch.arange(batch_size, device=device).unsqueeze(-1) * self.group_size
+        if eos_token_id is not None:
+            is_eos = next_tokens == eos_token_id
+        else:
+            is_eos = torch.zeros_like(next_tokens, dtype=torch.bool)
 
-            # Check if we are done so that we can save a pad step if all(done)
-            self._done[batch_idx] = self._done[batch_idx] or beam_hyp.is_done(
-                next_scores[batch_idx].max().item(), cur_len
+        # the next beams are the best `group_size` candidates that are not the eos token
+        non_eos_rank = (~is_eos).long().cumsum(dim=-1) - 1
+        is_next_beam = ~is_eos & (non_eos_rank < self.group_size)
+        if ((is_next_beam.sum(dim=-1) < self.group_size) & ~done).any():
+            batch_idx = int(((is_next_beam.sum(dim=-1) < self.group_size) & ~done).long().argmax())
+            raise ValueError(
+                f"At most {self.group_size} tokens in {next_tokens[batch_idx]} can be equal to `eos_token_id: {eos_token_id}`. Make sure {next_tokens[batch_idx]} are corrected."
             )
+        candidate_ranks = torch.arange(num_candidates, device=device).expand_as(next_tokens)
+        next_beam_candidates = torch.where(is_next_beam, candidate_ranks, candidate_ranks + num_candidates)
+        next_beam_candidates = next_beam_candidates.topk(self.group_size, dim=-1, largest=False).values
+        # the batches that are done may lack non eos candidates, their next beams are padded below
+        next_beam_candidates = next_beam_candidates % num_candidates
+
+        next_beam_scores = next_scores.gather(-1, next_beam_candidates)
+        next_beam_tokens = next_tokens.gather(-1, next_beam_candidates)
+        next_beam_indices = batch_beam_indices.gather(-1, next_beam_candidates)
+
+        # pad the batches that are done
+        next_beam_scores = next_beam_scores.masked_fill(done.unsqueeze(-1), 0)
+        next_beam_indices = next_beam_indices.masked_fill(done.unsqueeze(-1), 0)
+        if pad_token_id is not None:
+            next_beam_tokens = next_beam_tokens.masked_fill(done.unsqueeze(-1), pad_token_id)
+
+        # the eos tokens among the best `group_size` candidates finish their hypothesis
+        is_finished = is_eos[:, : self.group_size] & ~done.unsqueeze(-1)
+        self._beam_hyps.add(
+            input_ids[batch_beam_indices[:, : self.group_size]], next_scores[:, : self.group_size], is_finished
+        )
+
+        # Check if we are done so that we can save a pad step if all(done)
+        self._done = self._done | self._beam_hyps.is_done(next_scores.max(dim=-1).values, cur_len).to(self.device)
 
         return UserDict(
             {
@@ -298,52 +290,40 @@ class BeamSearchScorer(BeamScorer):
         pad_token_id: Optional[int] = None,
         eos_token_id: Optional[int] = None,
     ) -> Tuple[torch.LongTensor]:
-        batch_size = len(self._beam_hyps)
-
-        # finalize all open beam hypotheses and add to generated hypotheses
-        for batch_idx, beam_hyp in enumerate(self._beam_hyps):
-            if self._done[batch_idx]:
-                continue
+        batch_size = self.batch_size
+        device = input_ids.device
 
-            # all open beam hypotheses are added to the beam hypothesis
-            # beam hypothesis class automatically keeps the best beams
-            for beam_id in range(self.num_beams):
-                batch_beam_idx = batch_idx * self.num_beams + beam_id
-                final_score = final_beam_scores[batch_beam_idx].item()
-                final_tokens = input_ids[batch_beam_idx]
-                beam_hyp.add(final_tokens, final_score)
+        # all open beam hypotheses are added to the beam hypotheses of the batches that are not done, which
+        # automatically keep the best beams
+        self._beam_hyps.add(
+            input_ids.view(batch_size, self.num_beams, -1),
+            final_beam_scores.view(batch_size, self.num_beams),
+            ~self._done.to(device).unsqueeze(-1).expand(batch_size, self.num_beams),
+        )
 
         # select the best hypotheses
-        sent_lengths = input_ids.new(batch_size * self.num_beam_hyps_to_keep)
-        best = []
-        best_scores = torch.zeros(batch_size * self.num_beam_hyps_to_keep, device=self.device, dtype=torch.float32)
-
-        # retrieve best hypotheses
-        for i, beam_hyp in enumerate(self._beam_hyps):
-            sorted_hyps = sorted(beam_hyp.beams, key=lambda x: x[0])
-            for j in range(self.num_beam_hyps_to_keep):
-                best_hyp_tuple = sorted_hyps.pop()
-                best_score = best_hyp_tuple[0]
-                best_hyp = best_hyp_tuple[1]
-                sent_lengths[self.num_beam_hyps_to_keep * i + j] = len(best_hyp)
-
-                # append to lists
-                best.append(best_hyp)
-                best_scores[i * self.num_beam_hyps_to_keep + j] = best_score
+        best_hyps, best_scores, sent_lengths = self._beam_hyps.get_best(self.num_beam_hyps_to_keep)
+        best_hyps = best_hyps.view(batch_size * self.num_beam_hyps_to_keep, -1).to(device)
+        best_scores = best_scores.view(-1).to(device=self.device, dtype=torch.float32)
+        sent_lengths = sent_lengths.view(-1).to(device)
 
         # prepare for adding eos
         sent_max_len = min(sent_lengths.max().item() + 1, max_length)
-        decoded: torch.LongTensor = input_ids.new(batch_size * self.num_beam_hyps_to_keep, sent_max_len)
         # shorter batches are padded if needed
         if sent_lengths.min().item() != sent_lengths.max().item():
             assert pad_token_id is not None, "`pad_token_id` has to be defined"
-            decoded.fill_(pad_token_id)
+        positions = torch.arange(sent_max_len, device=device).unsqueeze(0)
+        decoded = input_ids.new_full((batch_size * self.num_beam_hyps_to_keep, sent_max_len), pad_token_id or 0)
 
         # fill with hypotheses and eos_token_id if the latter fits in
-        for i, hypo in enumerate(best):
-            decoded[i, : sent_lengths[i]] = hypo
-            if sent_lengths[i] < max_length:
-                decoded[i, sent_lengths[i]] = eos_token_id
+        num_hyp_tokens = min(best_hyps.shape[-1], sent_max_len)
+        is_hyp_token = positions[:, :num_hyp_tokens] < sent_lengths.unsqueeze(-1)
+        decoded[:, :num_hyp_tokens] = torch.where(
+            is_hyp_token, best_hyps[:, :num_hyp_tokens], decoded[:, :num_hyp_tokens]
+        )
+        if eos_token_id is not None:
+            is_eos = (positions == sent_lengths.unsqueeze(-1)) & (sent_lengths.unsqueeze(-1) < max_length)
+            decoded = decoded.masked_fill(is_eos, eos_token_id)
         return UserDict(
             {
                 "sequences": decoded,
@@ -353,47 +333,146 @@ class BeamSearchScorer(BeamScorer):
 
 
 class BeamHypotheses:
-    def __init__(self, num_beams: int, length_penalty: float, early_stopping: bool):
-        """
-        Initialize n-best list of hypotheses.
-        """
+    """
+    n-best lists of finished hypotheses for all the batches, stored as tensors so that hypotheses can be added to all
+    the batches at once.
+
+    A hypothesis is only added to a full list if it is better than the worst one, which it then replaces. Scores are
+    kept in float64 to compare hypotheses exactly like Python floats do.
+
+    Args:
+        batch_size (:obj:`int`):
+            The number of n-best lists.
+        num_beams (:obj:`int`):
+            The number of hypotheses kept per batch.
+        length_penalty (:obj:`float`):
+            Exponential penalty to the length of the hypotheses.
+        early_stopping (:obj:`bool`):
+            Whether a batch is done as soon as :obj:`num_beams` hypotheses are finished.
+        device (:obj:`torch.device`, `optional`):
+            The device on which the tensors are allocated.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        num_beams: int,
+        length_penalty: float,
+        early_stopping: bool,
+        device: Optional[torch.device] = None,
+    ):
         self.length_penalty = length_penalty
         self.early_stopping = early_stopping
         self.num_beams = num_beams
-        self.beams = []
-        self.worst_score = 1e9
+        self.batch_size = batch_size
+
+        self.scores = torch.zeros((batch_size, num_beams), dtype=torch.float64, device=device)
+        # order in which the hypotheses were added, to break ties between equal scores
+        self.insertion_ids = torch.zeros((batch_size, num_beams), dtype=torch.long, device=device)
+        self.lengths = torch.zeros((batch_size, num_beams), dtype=torch.long, device=device)
+        # grown on demand, only the first `lengths` tokens of each hypothesis are meaningful
+        self.tokens = torch.zeros((batch_size, num_beams, 0), dtype=torch.long, device=device)
+        self.num_hyps = torch.zeros(batch_size, dtype=torch.long, device=device)
+        self._num_added = 0
 
-    def __len__(self):
+    @property
+    def worst_score(self) -> torch.DoubleTensor:
         """
-        Number of hypotheses in the list.
+        :obj:`torch.DoubleTensor` of shape :obj:`(batch_size,)`: The score of the worst hypothesis of each batch, or
+        1e9 for the batches without hypotheses.
         """
-        return len(self.beams)
+        is_hyp = torch.arange(self.num_beams, device=self.scores.device) < self.num_hyps.unsqueeze(-1)
+        return self.scores.masked_fill(~is_hyp, 1e9).min(dim=-1).values
 
-    def add(self, hyp: torch.LongTensor, sum_logprobs: float):
+    def add(self, hyps: torch.LongTensor, sum_logprobs: torch.FloatTensor, mask: Optional[torch.BoolTensor] = None):
         """
-        Add a new hypothesis to the list.
+        Adds new hypotheses, in the order of their second dimension.
+
+        Args:
+            hyps (:obj:`torch.LongTensor` of shape :obj:`(batch_size, num_hyps, sequence_length)`):
+                The tokens of the hypotheses.
+            sum_logprobs (:obj:`torch.FloatTensor` of shape :obj:`(batch_size, num_hyps)`):
+                The sum of the log probabilities of the tokens of each hypothesis.
+            mask (:obj:`torch.BoolTensor` of shape :obj:`(batch_size, num_hyps)`, `optional`):
+                Which of the hypotheses to add.
         """
-        score = sum_logprobs / (hyp.shape[-1] ** self.length_penalty)
-        if len(self) < self.num_beams or score > self.worst_score:
-            self.beams.append((score, hyp))
-            if len(self) > self.num_beams:
-                sorted_next_scores = sorted([(s, idx) for idx, (s, _) in enumerate(self.beams)])
-                del self.beams[sorted_next_scores[0][1]]
-                self.worst_score = sorted_next_scores[1][0]
-            else:
-                self.worst_score = min(score, self.worst_score)
+        if mask is not None and not mask.any():
+            return
+
+        device = self.scores.device
+        hyps, sum_logprobs = hyps.to(device), sum_logprobs.to(device)
+        mask = torch.ones_like(sum_logprobs, dtype=torch.bool) if mask is None else mask.to(device)
+        hyp_length = hyps.shape[-1]
+        if hyp_length > self.tokens.shape[-1]:
+            new_tokens = self.tokens.new_zeros(
+                (self.batch_size, self.num_beams, max(hyp_length, 2 * self.tokens.shape[-1]))
+            )
+            new_tokens[:, :, : self.tokens.shape[-1]] = self.tokens
+            self.tokens = new_tokens
+
+        batch_indices = torch.arange(self.batch_size, device=device)
+        scores = sum_logprobs.double() / (hyp_length ** self.length_penalty)
+        # the hypotheses are added one column at a time to all the batches, skipping the columns without any
+        for i in mask.any(dim=0).nonzero().view(-1).tolist():
+            is_full = self.num_hyps >= self.num_beams
+            is_added = mask[:, i] & (~is_full | (scores[:, i] > self.worst_score))
+
+            # a hypothesis is added to the first free slot, or replaces the worst hypothesis (the oldest one if several
+            # have the worst score)
+            is_worst = self.scores == self.worst_score.unsqueeze(-1)
+            worst_slot = self.insertion_ids.masked_fill(~is_worst, self._num_added + 1).argmin(dim=-1)
+            slot = torch.where(is_full, worst_slot, self.num_hyps.clamp(max=self.num_beams - 1))
+
+            self._num_added += 1
+            self._update_slot(batch_indices, slot, is_added, self.scores, scores[:, i])
+            self._update_slot(batch_indices, slot, is_added, self.insertion_ids, self._num_added)
+            self._update_slot(batch_indices, slot, is_added, self.lengths, hyp_length)
+            slot_tokens = self.tokens[batch_indices, slot]
+            new_slot_tokens = slot_tokens.clone()
+            new_slot_tokens[:, :hyp_length] = hyps[:, i]
+            self.tokens[batch_indices, slot] = torch.where(is_added.unsqueeze(-1), new_slot_tokens, slot_tokens)
+            self.num_hyps = self.num_hyps + (is_added & ~is_full).long()
+
+    @staticmethod
+    def _update_slot(batch_indices, slot, is_added, tensor, value):
+        tensor[batch_indices, slot] = torch.where(
+            is_added, torch.as_tensor(value, dtype=tensor.dtype, device=tensor.device), tensor[batch_indices, slot]
+        )
 
-    def is_done(self, best_sum_logprobs: float, cur_len: int) -> bool:
+    def is_done(self, best_sum_logprobs: torch.FloatTensor, cur_len: int) -> torch.BoolTensor:
         """
         If there are enough hypotheses and that none of the hypotheses being generated can become better than the worst
         one in the heap, then we are done with this sentence.
+
+        Return:
+            :obj:`torch.BoolTensor` of shape :obj:`(batch_size,)`: Whether each batch is done.
         """
+        is_full = self.num_hyps >= self.num_beams
+        if self.early_stopping:
+            return is_full
+        cur_score = best_sum_logprobs.to(self.scores.device).double() / cur_len ** self.length_penalty
+        return is_full & (self.worst_score >= cur_score)
 
-        if len(self) < self.num_beams:
-            return False
-        elif self.early_stopping:
-            return True
-        else:
-            cur_score = best_sum_logprobs / cur_len ** self.length_penalty
-            ret = self.worst_score >= cur_score
-            return ret
+    def get_best(self, num_hyps: int) -> Tuple[torch.LongTensor, torch.DoubleTensor, torch.LongTensor]:
+        """
+        Return:
+            :obj:`Tuple[torch.LongTensor, torch.DoubleTensor, torch.LongTensor]`: The tokens, scores and lengths of the
+            :obj:`num_hyps` best hypotheses of each batch, sorted by decreasing score and, for equal scores, from the
+            most recently added one.
+        """
+        is_hyp = torch.arange(self.num_beams, device=self.scores.device) < self.num_hyps.unsqueeze(-1)
+        scores = self.scores.masked_fill(~is_hyp, -float("inf"))
+        # rank of each slot, all the keys being distinct thanks to the insertion ids
+        is_better = (scores.unsqueeze(1) > scores.unsqueeze(2)) | (
+            (scores.unsqueeze(1) == scores.unsqueeze(2))
+            & (self.insertion_ids.unsqueeze(1) > self.insertion_ids.unsqueeze(2))
+        )
+        ranks = is_better.sum(dim=-1)
+        best_slots = ranks.argsort(dim=-1)[:, :num_hyps]
+
+        batch_indices = torch.arange(self.batch_size, device=self.scores.device).unsqueeze(-1)
+        return (
+            self.tokens[batch_indices, best_slots],
+            self.scores[batch_indices, best_slots],
+            self.lengths[batch_indices, best_slots],
+        )
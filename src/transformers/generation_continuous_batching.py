@@ -0,0 +1,381 @@
+# coding=utf-8
+# Copyright 2021 The HuggingFace Inc. team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import torch
+from torch import nn
+
+from .generation_logits_process import LogitsProcessorList
+from .generation_stopping_criteria import MaxLengthCriteria, StoppingCriteriaList
+from .utils import logging
+
+
+logger = logging.get_logger(__name__)
+
+
+@dataclass
+class GenerationRequest:
+    """
+    A single prompt handled by a :class:`~transformers.ContinuousBatchingScheduler`.
+
+    Args:
+        request_id (:obj:`int`):
+            Identifier returned by :meth:`~transformers.ContinuousBatchingScheduler.add_request`.
+        input_ids (:obj:`torch.LongTensor` of shape :obj:`(sequence_length,)`):
+            The unpadded prompt.
+        logits_processor (:obj:`LogitsProcessorList`):
+            Processors applied to the scores of this request only.
+        stopping_criteria (:obj:`StoppingCriteriaList`):
+            Criteria evaluated on the sequence of this request only.
+        logits_warper (:obj:`LogitsProcessorList`, `optional`):
+            If set, the next token is sampled from the warped distribution, otherwise it is picked greedily.
+        sequences (:obj:`torch.LongTensor` of shape :obj:`(sequence_length,)`):
+            The generated sequence. For decoder-only models it includes the prompt, for encoder-decoder models it
+            starts with the ``decoder_start_token_id``, exactly like the output of
+            :meth:`~transformers.generation_utils.GenerationMixin.generate`.
+        finished (:obj:`bool`):
+            Whether generation is done for this request.
+    """
+
+    request_id: int
+    input_ids: torch.LongTensor
+    logits_processor: LogitsProcessorList = field(default_factory=LogitsProcessorList)
+    stopping_criteria: StoppingCriteriaList = field(default_factory=StoppingCriteriaList)
+    logits_warper: Optional[LogitsProcessorList] = None
+    sequences: Optional[torch.LongTensor] = None
+    finished: bool = False
+
+
+class _Cohort:
+    """
+    A group of running requests decoded with a single forward pass. ``input_ids`` is left-padded for decoder-only
+    models, ``model_kwargs`` holds the ``past``, ``attention_mask`` and (for encoder-decoder models)
+    ``encoder_outputs`` of the rows, in the same order as ``requests``.
+    """
+
+    def __init__(self, requests: List[GenerationRequest], input_ids: torch.LongTensor, model_kwargs: Dict[str, Any]):
+        self.requests = requests
+        self.input_ids = input_ids
+        self.model_kwargs = model_kwargs
+
+    def __len__(self):
+        return len(self.requests)
+
+
+def _map_past(past, fn):
+    if isinstance(past, torch.Tensor):
+        return fn(past)
+    return tuple(_map_past(past_state, fn) for past_state in past)
+
+
+def _zip_past(past_a, past_b, fn):
+    if isinstance(past_a, torch.Tensor):
+        return fn(past_a, past_b)
+    return tuple(_zip_past(state_a, state_b, fn) for state_a, state_b in zip(past_a, past_b))
+
+
+def _left_pad_past(past_state, length):
+    pad = length - past_state.shape[-2]
+    if pad == 0:
+        return past_state
+    return nn.functional.pad(past_state, (0, 0, pad, 0))
+
+
+class ContinuousBatchingScheduler:
+    r"""
+    Request-level scheduler that runs greedy or multinomial decoding over a changing set of prompts. Between two
+    decoding steps, finished rows are evicted from the batch (and from ``past_key_values``) and waiting prompts are
+    admitted into the freed slots, so short requests never wait on long ones.
+
+    For decoder-only models, newly admitted prompts are prefilled in one forward pass and then merged into the running
+    batch by left-padding the cache and the attention mask. This requires the model to derive its position ids from
+    the attention mask in :obj:`prepare_inputs_for_generation` (e.g. GPT-2, GPT-Neo), like batched :obj:`generate`
+    does. For encoder-decoder models the decoder positions depend on the cache length, so prompts admitted at the same
+    step form a cohort that is decoded in its own forward pass until all its rows are evicted.
+
+    Args:
+        model (:class:`~transformers.PreTrainedModel`):
+            A model with a language modeling head that returns :obj:`past_key_values`.
+        max_batch_size (:obj:`int`, `optional`, defaults to 8):
+            Maximum number of requests decoded concurrently.
+        pad_token_id (:obj:`int`, `optional`):
+            The id of the `padding` token. Defaults to ``model.config.pad_token_id``, then to :obj:`eos_token_id`.
+        eos_token_id (:obj:`int`, `optional`):
+            The id of the `end-of-sequence` token. Defaults to ``model.config.eos_token_id``.
+
+    Examples::
+
+        >>> from transformers import AutoTokenizer, AutoModelForCausalLM, ContinuousBatchingScheduler
+
+        >>> tokenizer = AutoTokenizer.from_pretrained("gpt2")
+        >>> model = AutoModelForCausalLM.from_pretrained("gpt2")
+        >>> scheduler = ContinuousBatchingScheduler(model, max_batch_size=4)
+
+        >>> for prompt in ["Hello, my dog is", "The capital of France"]:
+        ...     scheduler.add_request(tokenizer(prompt, return_tensors="pt").input_ids[0], max_new_tokens=20)
+
+        >>> for request in scheduler:
+        ...     print(request.request_id, tokenizer.decode(request.sequences))
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = 8,
+        pad_token_id: Optional[int] = None,
+        eos_token_id: Optional[int] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"`max_batch_size` has to be a strictly positive integer, but is {max_batch_size}")
+
+        self.model = model
+        self.config = model.config
+        self.max_batch_size = max_batch_size
+        self.eos_token_id = eos_token_id if eos_token_id is not None else self.config.eos_token_id
+        pad_token_id = pad_token_id if pad_token_id is not None else self.config.pad_token_id
+        if pad_token_id is None and self.eos_token_id is not None:
+            logger.warning(f"Setting `pad_token_id` to `eos_token_id`:{self.eos_token_id} for open-end generation.")
+            pad_token_id = self.eos_token_id
+        if pad_token_id is None:
+            raise ValueError("Make sure that `pad_token_id` or `eos_token_id` is defined.")
+        self.pad_token_id = pad_token_id
+
+        self._waiting = deque()
+        self._cohorts: List[_Cohort] = []
+        self._next_request_id = 0
+
+    @property
+    def num_waiting_requests(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def num_running_requests(self) -> int:
+        return sum(len(cohort) for cohort in self._cohorts)
+
+    def has_unfinished_requests(self) -> bool:
+        return self.num_waiting_requests > 0 or self.num_running_requests > 0
+
+    def add_request(
+        self,
+        input_ids: torch.LongTensor,
+        max_new_tokens: Optional[int] = None,
+        logits_processor: Optional[LogitsProcessorList] = None,
+        stopping_criteria: Optional[StoppingCriteriaList] = None,
+        logits_warper: Optional[LogitsProcessorList] = None,
+    ) -> int:
+        """
+        Queues a prompt. It is admitted into the running batch as soon as a slot is free.
+
+        Args:
+            input_ids (:obj:`torch.LongTensor` of shape :obj:`(sequence_length,)`):
+                The unpadded prompt.
+            max_new_tokens (:obj:`int`, `optional`):
+                The maximum number of tokens to generate. If neither :obj:`max_new_tokens` nor a
+                :class:`~transformers.MaxLengthCriteria` in :obj:`stopping_criteria` is given,
+                ``model.config.max_length`` is used.
+            logits_processor (:obj:`LogitsProcessorList`, `optional`):
+                Processors applied to the scores of this request at each step.
+            stopping_criteria (:obj:`StoppingCriteriaList`, `optional`):
+                Criteria evaluated on the sequence of this request at each step.
+            logits_warper (:obj:`LogitsProcessorList`, `optional`):
+                If given, tokens are sampled from the warped distribution instead of being picked greedily.
+
+        Return:
+            :obj:`int`: The id of the request.
+        """
+        if input_ids.dim() == 2 and input_ids.shape[0] == 1:
+            input_ids = input_ids[0]
+        if input_ids.dim() != 1:
+            raise ValueError("`input_ids` should be a single unpadded prompt of shape `(sequence_length,)`.")
+
+        stopping_criteria = StoppingCriteriaList(stopping_criteria if stopping_criteria is not None else [])
+        if max_new_tokens is not None:
+            start_length = 1 if self.config.is_encoder_decoder else input_ids.shape[-1]
+            stopping_criteria.append(MaxLengthCriteria(max_length=start_length + max_new_tokens))
+        elif stopping_criteria.max_length is None:
+            stopping_criteria.append(MaxLengthCriteria(max_length=self.config.max_length))
+
+        request = GenerationRequest(
+            request_id=self._next_request_id,
+            input_ids=input_ids,
+            logits_processor=logits_processor if logits_processor is not None else LogitsProcessorList(),
+            stopping_criteria=stopping_criteria,
+            logits_warper=logits_warper,
+        )
+        self._next_request_id += 1
+        self._waiting.append(request)
+        return request.request_id
+
+    def _admit(self):
+        num_free_slots = self.max_batch_size - self.num_running_requests
+        if num_free_slots <= 0 or len(self._waiting) == 0:
+            return
+
+        requests = [self._waiting.popleft() for _ in range(min(num_free_slots, len(self._waiting)))]
+        device = self.model.device
+        max_prompt_length = max(request.input_ids.shape[-1] for request in requests)
+        # prompts are left-padded so that the last column always holds the last prompt token
+        input_ids = torch.full((len(requests), max_prompt_length), self.pad_token_id, dtype=torch.long, device=device)
+        attention_mask = torch.zeros_like(input_ids)
+        for i, request in enumerate(requests):
+            prompt_length = request.input_ids.shape[-1]
+            input_ids[i, max_prompt_length - prompt_length :] = request.input_ids.to(device)
+            attention_mask[i, max_prompt_length - prompt_length :] = 1
+
+        model_kwargs = {"attention_mask": attention_mask}
+        if self.config.is_encoder_decoder:
+            model_kwargs = self.model._prepare_encoder_decoder_kwargs_for_generation(input_ids, model_kwargs)
+            input_ids = self.model._prepare_decoder_input_ids_for_generation(input_ids)
+            for i, request in enumerate(requests):
+                request.sequences = input_ids[i]
+        else:
+            for request in requests:
+                request.sequences = request.input_ids.to(device)
+        model_kwargs["use_cache"] = True
+
+        self._cohorts.append(_Cohort(requests, input_ids, model_kwargs))
+
+    def _select_next_tokens(self, cohort: _Cohort, next_token_logits: torch.FloatTensor) -> torch.LongTensor:
+        next_token_scores = next_token_logits
+        if any(len(request.logits_processor) > 0 for request in cohort.requests):
+            next_token_scores = next_token_logits.clone()
+            for i, request in enumerate(cohort.requests):
+                if len(request.logits_processor) > 0:
+                    next_token_scores[i : i + 1] = request.logits_processor(
+                        request.sequences[None], next_token_scores[i : i + 1]
+                    )
+
+        next_tokens = torch.argmax(next_token_scores, dim=-1)
+        for i, request in enumerate(cohort.requests):
+            if request.logits_warper is not None:
+                row_scores = request.logits_warper(request.sequences[None], next_token_scores[i : i + 1])
+                probs = nn.functional.softmax(row_scores, dim=-1)
+                next_tokens[i] = torch.multinomial(probs, num_samples=1)[0, 0]
+        return next_tokens
+
+    def _decode_step(self, cohort: _Cohort) -> List[bool]:
+        model_inputs = self.model.prepare_inputs_for_generation(cohort.input_ids, **cohort.model_kwargs)
+        outputs = self.model(**model_inputs, return_dict=True)
+        next_tokens = self._select_next_tokens(cohort, outputs.logits[:, -1, :])
+
+        cohort.input_ids = torch.cat([cohort.input_ids, next_tokens[:, None]], dim=-1)
+        cohort.model_kwargs = self.model._update_model_kwargs_for_generation(
+            outputs, cohort.model_kwargs, is_encoder_decoder=self.config.is_encoder_decoder
+        )
+        if cohort.model_kwargs["past"] is None:
+            raise ValueError(f"{self.model.__class__.__name__} has to return `past_key_values` to be scheduled.")
+
+        if self.eos_token_id is not None:
+            is_eos = next_tokens.eq(self.eos_token_id).tolist()
+        else:
+            is_eos = [False] * len(cohort)
+
+        finished = []
+        for request, next_token, request_is_eos in zip(cohort.requests, next_tokens, is_eos):
+            request.sequences = torch.cat([request.sequences, next_token[None]])
+            request.finished = request_is_eos or request.stopping_criteria(request.sequences[None], None)
+            finished.append(request.finished)
+        return finished
+
+    def _evict(self, cohort: _Cohort, finished: List[bool]):
+        keep = [i for i, is_finished in enumerate(finished) if not is_finished]
+        cohort.requests = [cohort.requests[i] for i in keep]
+        if len(keep) == 0:
+            return
+
+        keep_idx = torch.tensor(keep, dtype=torch.long, device=cohort.input_ids.device)
+        cohort.input_ids = cohort.input_ids.index_select(0, keep_idx)
+        model_kwargs = cohort.model_kwargs
+        model_kwargs["past"] = _map_past(
+            model_kwargs["past"], lambda past_state: past_state.index_select(0, keep_idx.to(past_state.device))
+        )
+        model_kwargs["attention_mask"] = model_kwargs["attention_mask"].index_select(0, keep_idx)
+        if self.config.is_encoder_decoder:
+            encoder_outputs = model_kwargs["encoder_outputs"]
+            encoder_outputs["last_hidden_state"] = encoder_outputs.last_hidden_state.index_select(
+                0, keep_idx.to(encoder_outputs.last_hidden_state.device)
+            )
+        else:
+            # drop the columns that only held padding for the evicted rows
+            num_padding_columns = int(model_kwargs["attention_mask"].cumsum(-1).eq(0).all(0).sum())
+            if num_padding_columns > 0:
+                cohort.input_ids = cohort.input_ids[:, num_padding_columns:]
+                model_kwargs["attention_mask"] = model_kwargs["attention_mask"][:, num_padding_columns:]
+                model_kwargs["past"] = _map_past(
+                    model_kwargs["past"], lambda past_state: past_state[..., num_padding_columns:, :]
+                )
+
+    def _merge(self, cohort: _Cohort, other: _Cohort) -> _Cohort:
+        length = max(cohort.input_ids.shape[-1], other.input_ids.shape[-1])
+
+        def left_pad(tensor, value):
+            return nn.functional.pad(tensor, (length - tensor.shape[-1], 0), value=value)
+
+        input_ids = torch.cat(
+            [left_pad(cohort.input_ids, self.pad_token_id), left_pad(other.input_ids, self.pad_token_id)]
+        )
+        attention_mask = torch.cat(
+            [left_pad(cohort.model_kwargs["attention_mask"], 0), left_pad(other.model_kwargs["attention_mask"], 0)]
+        )
+        # the cache lags one position behind `input_ids`: the last token has not been fed to the model yet
+        past = _zip_past(
+            cohort.model_kwargs["past"],
+            other.model_kwargs["past"],
+            lambda state_a, state_b: torch.cat(
+                [_left_pad_past(state_a, length - 1), _left_pad_past(state_b, length - 1)]
+            ),
+        )
+        model_kwargs = cohort.model_kwargs
+        model_kwargs["attention_mask"] = attention_mask
+        model_kwargs["past"] = past
+        return _Cohort(cohort.requests + other.requests, input_ids, model_kwargs)
+
+    @torch.no_grad()
+    def step(self) -> List[GenerationRequest]:
+        """
+        Admits waiting prompts into the free slots, runs one decoding step over all running requests and evicts the
+        ones that are done.
+
+        Return:
+            :obj:`List[GenerationRequest]`: The requests that finished during this step.
+        """
+        self._admit()
+
+        done = []
+        for cohort in self._cohorts:
+            finished = self._decode_step(cohort)
+            done.extend(request for request, is_finished in zip(cohort.requests, finished) if is_finished)
+            self._evict(cohort, finished)
+        self._cohorts = [cohort for cohort in self._cohorts if len(cohort) > 0]
+
+        if not self.config.is_encoder_decoder and len(self._cohorts) > 1:
+            cohort = self._cohorts[0]
+            for other in self._cohorts[1:]:
+                cohort = self._merge(cohort, other)
+            self._cohorts = [cohort]
+
+        return done
+
+    def __iter__(self) -> Iterator[GenerationRequest]:
+        """
+        Steps until every queued request is done, yielding each request as soon as it finishes. New requests can be
+        added while iterating.
+        """
+        while self.has_unfinished_requests():
+            for request in self.step():
+                yield request
@@ -16,7 +16,7 @@
 import inspect
 import math
 from abc import ABC
-from typing import Callable, Iterable, List, Optional
+from typing import Callable, Iterable, List, Optional, Tuple
 
 import numpy as np
 import torch
@@ -293,12 +293,19 @@ class NoRepeatNGramLogitsProcessor(LogitsProcessor):
         self.ngram_size = ngram_size
 
     def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
-        num_batch_hypotheses = scores.shape[0]
         cur_len = input_ids.shape[-1]
-        banned_batch_tokens = _calc_banned_ngram_tokens(self.ngram_size, input_ids, num_batch_hypotheses, cur_len)
+        if cur_len < self.ngram_size:
+            # no ngram has been generated yet
+            return scores
 
-        for i, banned_tokens in enumerate(banned_batch_tokens):
-            scores[i, banned_tokens] = -float("inf")
+        # view of all the ngrams of each hypothesis, of shape (num_hypos, num_ngrams, ngram_size), whose rows follow
+        # the beams since `input_ids` has been reordered with them
+        ngrams = input_ids.unfold(1, self.ngram_size, 1)
+        # ban the last token of each ngram that starts with the last `ngram_size - 1` generated tokens
+        prev_tokens = input_ids[:, cur_len - self.ngram_size + 1 :]
+        matches = (ngrams[:, :, :-1] == prev_tokens.unsqueeze(1)).all(dim=-1)
+        hypo_idx, ngram_idx = matches.nonzero(as_tuple=True)
+        scores[hypo_idx, ngrams[hypo_idx, ngram_idx, -1]] = -float("inf")
 
         return scores
 
@@ -381,6 +388,8 @@ class NoBadWordsLogitsProcessor(LogitsProcessor):
                 self.bad_words_id_length_greater_than_1.append(word)
 
         self.static_bad_words_mask: Optional[torch.LongTensor] = None
+        # bad words of several tokens, grouped by length, as tensors of shape (num_bad_words, length)
+        self.bad_words_groups: Optional[List[torch.LongTensor]] = None
 
         for banned_token_seq in self.bad_words_id_length_greater_than_1:
             if len(banned_token_seq) == 0:
@@ -390,9 +399,15 @@ class NoBadWordsLogitsProcessor(LogitsProcessor):
 
         if self.static_bad_words_mask is None and len(self.bad_words_id_length_1) > 0:
             self.static_bad_words_mask = self._calc_static_bad_word_mask(scores)
+        if self.bad_words_groups is None:
+            self.bad_words_groups = self._calc_bad_words_groups(scores)
 
-        dynamic_banned_tokens = self._calc_banned_bad_words_ids(input_ids.tolist())
-        scores = self._set_scores_to_inf_for_banned_tokens(scores, dynamic_banned_tokens)
+        if self.static_bad_words_mask is not None:
+            scores = scores.masked_fill(self.static_bad_words_mask, -float("inf"))
+
+        hypo_idx, banned_tokens = self._calc_banned_bad_words_ids(input_ids)
+        if len(hypo_idx) > 0:
+            scores = scores.index_put((hypo_idx, banned_tokens), scores.new_tensor(-float("inf")))
 
         return scores
 
@@ -401,76 +416,47 @@ class NoBadWordsLogitsProcessor(LogitsProcessor):
         static_bad_words_mask[self.bad_words_id_length_1] = 1
         return static_bad_words_mask.unsqueeze(0).to(scores.device).bool()
 
-    def _tokens_match(self, prev_tokens: List[int], tokens: List[int]) -> bool:
-        if len(tokens) == 0:
-            # if bad word tokens is just one token always ban it
-            return True
-        elif len(tokens) > len(prev_tokens):
-            # if bad word tokens are longer then prev input_ids they can't be equal
-            return False
-        else:
-            return prev_tokens[-len(tokens) :] == tokens
-
-    def _calc_banned_bad_words_ids(self, prev_input_ids: List[List[int]]) -> Iterable[int]:
-        banned_tokens = []
-        for prev_input_ids_slice in prev_input_ids:
-            banned_tokens_slice = []
-            for banned_token_seq in self.bad_words_id_length_greater_than_1:
-                if self._tokens_match(prev_input_ids_slice, banned_token_seq[:-1]):
-                    banned_tokens_slice.append(banned_token_seq[-1])
-
-            banned_tokens.append(banned_tokens_slice)
-
-        return banned_tokens
-
-    def _set_scores_to_inf_for_banned_tokens(
-        self, scores: torch.Tensor, banned_tokens: List[List[int]]
-    ) -> torch.Tensor:
-        """
-        Modifies the scores in place by setting the banned token positions to `-inf`. Banned token is expected to be a
-        list of list of banned tokens to ban in the format [[batch index, vocabulary position],...
-
-        Args:
-            scores: logits distribution of shape (batch size, vocabulary size)
-            banned_tokens: list of list of tokens to ban of length (batch_size)
-        """
-        banned_mask_list = []
-        for idx, batch_banned_tokens in enumerate(banned_tokens):
-            for token in batch_banned_tokens:
-                # Eliminates invalid bad word IDs that are over the vocabulary size.
-                if token <= scores.shape[1]:
-                    banned_mask_list.append([idx, token])
-                else:
-                    logger.error(
-                        f"An invalid bad word ID is defined: {token}. This ID is not contained in the "
-                        f"vocabulary, and is therefore ignored."
-                    )
-        if not banned_mask_list and self.static_bad_words_mask is None:
-            return scores
-
-        else:
-            if banned_mask_list:
-                banned_mask = torch.LongTensor(banned_mask_list)
-                indices = torch.ones(len(banned_mask))
-                # A sparse tensor is generated from a list of coordinates: [[0, 1], [0, 2], [2, 0]]. A conversion to dense tensor generates:
-                # [ 0  1  1 ]
-                # [ 0  0  0 ]
-                # [ 1  0  0 ]
-
-                banned_mask = (
-                    torch.sparse.LongTensor(banned_mask.t(), indices, scores.size())
-                    .to(scores.device)
-                    .to_dense()
-                    .bool()
+    def _calc_bad_words_groups(self, scores: torch.FloatTensor) -> List[torch.LongTensor]:
+        bad_words_by_length = {}
+        for banned_token_seq in self.bad_words_id_length_greater_than_1:
+            # Eliminates invalid bad word IDs that are over the vocabulary size.
+            if banned_token_seq[-1] >= scores.shape[1]:
+                logger.error(
+                    f"An invalid bad word ID is defined: {banned_token_seq[-1]}. This ID is not contained in the "
+                    f"vocabulary, and is therefore ignored."
                 )
+                continue
+            bad_words_by_length.setdefault(len(banned_token_seq), []).append(banned_token_seq)
+        return [
+            torch.tensor(bad_words, dtype=torch.long, device=scores.device)
+            for _, bad_words in sorted(bad_words_by_length.items())
+        ]
 
-                if self.static_bad_words_mask is not None:
-                    banned_mask = torch.bitwise_or(banned_mask, self.static_bad_words_mask)
-            else:
-                banned_mask = self.static_bad_words_mask
+    def _calc_banned_bad_words_ids(self, input_ids: torch.LongTensor) -> Tuple[torch.LongTensor, torch.LongTensor]:
+        """
+        Finds the bad words whose tokens but the last end a hypothesis. Only the last tokens of each hypothesis are
+        compared, with all the bad words of the same length at once.
 
-            scores = scores.masked_fill(banned_mask, -float("inf"))
-            return scores
+        Return:
+            :obj:`Tuple[torch.LongTensor, torch.LongTensor]`: The indices of the hypotheses and of the tokens to ban.
+        """
+        cur_len = input_ids.shape[-1]
+        hypo_indices, banned_tokens = [], []
+        for bad_words in self.bad_words_groups:
+            prefix_length = bad_words.shape[1] - 1
+            if prefix_length > cur_len:
+                # bad words are grouped by increasing length
+                break
+            # of shape (batch_size, num_bad_words)
+            matches = (input_ids[:, None, cur_len - prefix_length :] == bad_words[None, :, :-1]).all(dim=-1)
+            hypo_idx, bad_word_idx = matches.nonzero(as_tuple=True)
+            hypo_indices.append(hypo_idx)
+            banned_tokens.append(bad_words[bad_word_idx, -1])
+
+        if len(hypo_indices) == 0:
+            empty = input_ids.new_zeros((0,))
+            return empty, empty
+        return torch.cat(hypo_indices), torch.cat(banned_tokens)
 
 
 class PrefixConstrainedLogitsProcessor(LogitsProcessor):
@@ -0,0 +1,148 @@
+# coding=utf-8
+# Copyright 2021 The HuggingFace Inc. team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional, Tuple
+
+import torch
+
+from .configuration_utils import PretrainedConfig
+
+
+class StaticCacheLayer:
+    """
+    The keys and values of one self-attention layer, stored in buffers of shape :obj:`(batch_size, num_heads,
+    max_length, head_dim)`.
+
+    Indexing the layer like the :obj:`(key, value)` tuple of the default cache returns views on the positions filled so
+    far, so that code reading :obj:`layer_past[0].shape[-2]` keeps working.
+    """
+
+    def __init__(self, key_cache: torch.Tensor, value_cache: torch.Tensor):
+        self.key_cache = key_cache
+        self.value_cache = value_cache
+        # second pair of buffers, allocated on the first call to `reorder`
+        self._key_buffer = None
+        self._value_buffer = None
+        self.seq_length = 0
+
+    @property
+    def max_length(self) -> int:
+        return self.key_cache.shape[-2]
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        return (self.key_cache, self.value_cache)[index][:, :, : self.seq_length]
+
+    def update(self, key: torch.Tensor, value: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Writes :obj:`key` and :obj:`value`, of shape :obj:`(batch_size, num_heads, new_length, head_dim)`, after the
+        positions filled so far.
+
+        Return:
+            :obj:`Tuple[torch.Tensor, torch.Tensor]`: Views on the keys and values of all the positions filled so far,
+            including the new ones.
+        """
+        start, end = self.seq_length, self.seq_length + key.shape[-2]
+        if end > self.max_length:
+            raise ValueError(
+                f"The static cache was allocated for {self.max_length} positions, but {end} positions are needed. "
+                "Make sure `max_length` covers the prompt and the generated tokens."
+            )
+        self.key_cache[:, :, start:end] = key
+        self.value_cache[:, :, start:end] = value
+        self.seq_length = end
+        return self[0], self[1]
+
+    def reorder(self, beam_idx: torch.Tensor):
+        """
+        Reorders the batch dimension of the filled positions according to :obj:`beam_idx`. The result is written into
+        a second pair of buffers, which are then swapped with the current ones, so that no memory is allocated after
+        the first call.
+        """
+        if self._key_buffer is None:
+            self._key_buffer = torch.empty_like(self.key_cache)
+            self._value_buffer = torch.empty_like(self.value_cache)
+        beam_idx = beam_idx.to(self.key_cache.device)
+        length = self.seq_length
+        torch.index_select(self.key_cache[:, :, :length], 0, beam_idx, out=self._key_buffer[:, :, :length])
+        torch.index_select(self.value_cache[:, :, :length], 0, beam_idx, out=self._value_buffer[:, :, :length])
+        self.key_cache, self._key_buffer = self._key_buffer, self.key_cache
+        self.value_cache, self._value_buffer = self._value_buffer, self.value_cache
+
+
+class StaticCache:
+    """
+    Key/value cache for decoder-only models that allocates its buffers once, for the whole generation, instead of
+    growing the :obj:`past_key_values` tuples with :obj:`torch.cat` at each step.
+
+    The cache is passed as :obj:`past_key_values` and returned as is by the model, each attention layer writing its new
+    keys and values in place. It is created by :meth:`~transformers.generation_utils.GenerationMixin.generate` when
+    called with :obj:`use_static_cache=True` for models whose :obj:`supports_static_cache` attribute is set.
+
+    Like the :obj:`None` cache it replaces at the first step, an empty cache evaluates to :obj:`False`.
+
+    Args:
+        config (:class:`~transformers.PretrainedConfig`):
+            The configuration of the model, used to get the number of layers, heads and the hidden size.
+        batch_size (:obj:`int`):
+            The batch size, including the beams and returned sequences.
+        max_length (:obj:`int`):
+            The maximum number of positions, prompt included.
+        device (:obj:`torch.device`, `optional`):
+            The device on which the buffers are allocated.
+        dtype (:obj:`torch.dtype`, `optional`):
+            The dtype of the buffers, which should be the dtype of the model.
+    """
+
+    def __init__(
+        self,
+        config: PretrainedConfig,
+        batch_size: int,
+        max_length: int,
+        device: Optional[torch.device] = None,
+        dtype: Optional[torch.dtype] = None,
+    ):
+        num_heads = config.num_attention_heads
+        head_dim = config.hidden_size // num_heads
+        shape = (batch_size, num_heads, max_length, head_dim)
+        self.layers = [
+            StaticCacheLayer(
+                torch.zeros(shape, device=device, dtype=dtype), torch.zeros(shape, device=device, dtype=dtype)
+            )
+            for _ in range(config.num_hidden_layers)
+        ]
+
+    def __getitem__(self, layer_idx: int) -> StaticCacheLayer:
+        return self.layers[layer_idx]
+
+    def __iter__(self):
+        return iter(self.layers)
+
+    def __bool__(self) -> bool:
+        return self.get_seq_length() > 0
+
+    def get_seq_length(self) -> int:
+        """
+        Return:
+            :obj:`int`: The number of positions filled so far.
+        """
+        return self.layers[0].seq_length
+
+    def reorder_cache(self, beam_idx: torch.Tensor) -> "StaticCache":
+        """
+        Reorders the cache in place for beam search, see :meth:`StaticCacheLayer.reorder`.
+        """
+        for layer in self.layers:
+            layer.reorder(beam_idx)
+        return self
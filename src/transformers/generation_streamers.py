@@ -0,0 +1,214 @@
+# coding=utf-8
+# Copyright 2021 The HuggingFace Inc. team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from queue import Queue
+from typing import Callable, List, Optional
+
+
+class BaseStreamer:
+    """
+    Base class from which streamers passed to :meth:`~transformers.generation_utils.GenerationMixin.generate` should
+    inherit.
+
+    The generation loop first calls :meth:`put` with the prompt of shape :obj:`(1, sequence_length)`, then with each
+    new token as soon as it is selected, and finally calls :meth:`end`.
+    """
+
+    def put(self, value):
+        """Function that is called by :obj:`.generate()` to push new tokens."""
+        raise NotImplementedError()
+
+    def end(self):
+        """Function that is called by :obj:`.generate()` to signal the end of generation."""
+        raise NotImplementedError()
+
+
+class IncrementalDetokenizer:
+    """
+    Turns a stream of token ids into a stream of text without decoding the whole sequence at each step.
+
+    Only the tokens after the last emitted word boundary are decoded: the text of the window before and after adding
+    the new tokens is compared and the difference is emitted. Text ending with the unicode replacement character is held
+    back, since it means that a byte-level BPE or SentencePiece byte fallback token only carries part of a UTF-8
+    character and the next token will complete it.
+
+    Args:
+        tokenizer (:class:`~transformers.PreTrainedTokenizerBase`):
+            The tokenizer used to decode the tokens.
+        decode_kwargs (:obj:`dict`, `optional`):
+            Additional keyword arguments passed to the tokenizer's :obj:`decode` method.
+    """
+
+    def __init__(self, tokenizer, **decode_kwargs):
+        self.tokenizer = tokenizer
+        self.decode_kwargs = decode_kwargs
+        self.token_ids: List[int] = []
+        # text up to `read_offset` has been emitted, `prefix_offset` marks where the decoded window starts
+        self.prefix_offset = 0
+        self.read_offset = 0
+
+    def add_tokens(self, token_ids: List[int]) -> str:
+        """
+        Appends :obj:`token_ids` to the stream.
+
+        Return:
+            :obj:`str`: The text that became final with these tokens, possibly empty.
+        """
+        self.token_ids.extend(token_ids)
+        prefix_text = self.tokenizer.decode(
+            self.token_ids[self.prefix_offset : self.read_offset], **self.decode_kwargs
+        )
+        new_text = self.tokenizer.decode(self.token_ids[self.prefix_offset :], **self.decode_kwargs)
+
+        if len(new_text) > len(prefix_text) and not new_text.endswith("\ufffd"):
+            self.prefix_offset = self.read_offset
+            self.read_offset = len(self.token_ids)
+            return new_text[len(prefix_text) :]
+        return ""
+
+    def flush(self) -> str:
+        """
+        Return:
+            :obj:`str`: The text that was held back, waiting for more tokens.
+        """
+        prefix_text = self.tokenizer.decode(
+            self.token_ids[self.prefix_offset : self.read_offset], **self.decode_kwargs
+        )
+        new_text = self.tokenizer.decode(self.token_ids[self.prefix_offset :], **self.decode_kwargs)
+        self.prefix_offset = self.read_offset = len(self.token_ids)
+        return new_text[len(prefix_text) :]
+
+
+class TextStreamer(BaseStreamer):
+    """
+    Streamer that decodes the tokens as they are generated and passes the text to :obj:`on_text` (which prints it to
+    stdout by default). Only batches of size 1 are supported.
+
+    Args:
+        tokenizer (:class:`~transformers.PreTrainedTokenizerBase`):
+            The tokenizer used to decode the tokens.
+        skip_prompt (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether to skip the prompt, i.e. the first call to :meth:`put`.
+        on_text (:obj:`Callable[[str, bool], None]`, `optional`):
+            Called with each new piece of text and a flag set to :obj:`True` for the last call.
+        decode_kwargs (:obj:`dict`, `optional`):
+            Additional keyword arguments passed to the tokenizer's :obj:`decode` method, e.g.
+            :obj:`skip_special_tokens=True`.
+
+    Examples::
+
+        >>> from transformers import AutoModelForCausalLM, AutoTokenizer, TextStreamer
+
+        >>> tokenizer = AutoTokenizer.from_pretrained("gpt2")
+        >>> model = AutoModelForCausalLM.from_pretrained("gpt2")
+        >>> inputs = tokenizer(["An increasing sequence: one,"], return_tensors="pt")
+
+        >>> # the text is printed as soon as each token is generated
+        >>> _ = model.generate(**inputs, streamer=TextStreamer(tokenizer), max_new_tokens=20)
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        skip_prompt: bool = False,
+        on_text: Optional[Callable[[str, bool], None]] = None,
+        **decode_kwargs,
+    ):
+        self.tokenizer = tokenizer
+        self.skip_prompt = skip_prompt
+        self.decode_kwargs = decode_kwargs
+        if on_text is not None:
+            self.on_text = on_text
+        self.detokenizer = IncrementalDetokenizer(tokenizer, **decode_kwargs)
+        self.next_tokens_are_prompt = True
+
+    def put(self, value):
+        if hasattr(value, "tolist"):
+            value = value.tolist()
+        if len(value) > 0 and isinstance(value[0], list):
+            if len(value) > 1:
+                raise ValueError(f"{self.__class__.__name__} only supports batch size 1")
+            value = value[0]
+
+        if self.skip_prompt and self.next_tokens_are_prompt:
+            self.next_tokens_are_prompt = False
+            return
+        self.next_tokens_are_prompt = False
+
+        text = self.detokenizer.add_tokens(value)
+        if len(text) > 0:
+            self.on_text(text, stream_end=False)
+
+    def end(self):
+        text = self.detokenizer.flush()
+        self.detokenizer = IncrementalDetokenizer(self.tokenizer, **self.decode_kwargs)
+        self.next_tokens_are_prompt = True
+        self.on_text(text, stream_end=True)
+
+    def on_text(self, text: str, stream_end: bool = False):
+        print(text, flush=True, end="" if not stream_end else None)
+
+
+class TextIteratorStreamer(TextStreamer):
+    """
+    Streamer that stores the text in a queue, to be consumed by iterating over the streamer, typically while
+    :obj:`generate` runs in another thread.
+
+    Args:
+        tokenizer (:class:`~transformers.PreTrainedTokenizerBase`):
+            The tokenizer used to decode the tokens.
+        skip_prompt (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether to skip the prompt, i.e. the first call to :meth:`put`.
+        timeout (:obj:`float`, `optional`):
+            The timeout for the text queue. If :obj:`None`, the queue blocks until text is available.
+        decode_kwargs (:obj:`dict`, `optional`):
+            Additional keyword arguments passed to the tokenizer's :obj:`decode` method.
+
+    Examples::
+
+        >>> from threading import Thread
+        >>> from transformers import AutoModelForCausalLM, AutoTokenizer, TextIteratorStreamer
+
+        >>> tokenizer = AutoTokenizer.from_pretrained("gpt2")
+        >>> model = AutoModelForCausalLM.from_pretrained("gpt2")
+        >>> inputs = tokenizer(["An increasing sequence: one,"], return_tensors="pt")
+        >>> streamer = TextIteratorStreamer(tokenizer, skip_prompt=True)
+
+        >>> thread = Thread(target=model.generate, kwargs=dict(inputs, streamer=streamer, max_new_tokens=20))
+        >>> thread.start()
+        >>> for new_text in streamer:
+        ...     print(new_text, end="")
+    """
+
+    def __init__(self, tokenizer, skip_prompt: bool = False, timeout: Optional[float] = None, **decode_kwargs):
+        super().__init__(tokenizer, skip_prompt=skip_prompt, **decode_kwargs)
+        self.text_queue = Queue()
+        self.stop_signal = None
+        self.timeout = timeout
+
+    def on_text(self, text: str, stream_end: bool = False):
+        if len(text) > 0:
+            self.text_queue.put(text, timeout=self.timeout)
+        if stream_end:
+            self.text_queue.put(self.stop_signal, timeout=self.timeout)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        value = self.text_queue.get(timeout=self.timeout)
+        if value == self.stop_signal:
+            raise StopIteration()
+        return value
@@ -16,7 +16,7 @@
 
 import warnings
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import torch
 import torch.distributed as dist
@@ -43,6 +43,8 @@ from .generation_logits_process import (
 )
 
 from .generation_banned_words import BannedWordsMechanism
+from .generation_static_cache import StaticCache
+from .generation_streamers import BaseStreamer
 from .generation_stopping_criteria import (
     MaxLengthCriteria,
     MaxTimeCriteria,
@@ -52,6 +54,9 @@ from .generation_stopping_criteria import (
 from .utils import logging
 
 
+if TYPE_CHECKING:
+    from .modeling_utils import PreTrainedModel
+
 logger = logging.get_logger(__name__)
 
 
@@ -676,6 +681,10 @@ class GenerationMixin:
         forced_eos_token_id: Optional[int] = None,
         remove_invalid_values: Optional[bool] = None,
         synced_gpus: Optional[bool] = None,
+        streamer: Optional[BaseStreamer] = None,
+        use_static_cache: Optional[bool] = None,
+        assistant_model: Optional["PreTrainedModel"] = None,
+        num_assistant_tokens: Optional[int] = None,
         **model_kwargs,
     ) -> Union[GreedySearchOutput, SampleOutput, BeamSearchOutput, BeamSampleOutput, torch.LongTensor]:
         r"""
@@ -786,6 +795,22 @@ class GenerationMixin:
                 crash. Note that using ``remove_invalid_values`` can slow down generation.
             synced_gpus (:obj:`bool`, `optional`, defaults to :obj:`False`):
                 Whether to continue running the while loop until max_length (needed for ZeRO stage 3)
+            streamer (:class:`~transformers.BaseStreamer`, `optional`):
+                Streamer object that receives each new token as soon as it is generated, e.g. a
+                :class:`~transformers.TextStreamer`. Only supported for greedy search, sampling and beam search with a
+                batch size of 1. With beam search, tokens are streamed once every remaining hypothesis agrees on them.
+            use_static_cache (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether or not to allocate the past key/values once for :obj:`max_length` positions, as a
+                :class:`~transformers.StaticCache` written in place, instead of concatenating them at each step. Only
+                supported by models with :obj:`supports_static_cache` set, such as GPT-2, GPT-Neo and GPT-J.
+            assistant_model (:class:`~transformers.PreTrainedModel`, `optional`):
+                A smaller model sharing the vocabulary of this one, used for assisted (speculative) greedy decoding:
+                the assistant drafts :obj:`num_assistant_tokens` tokens that the model verifies in a single forward
+                pass, keeping the longest prefix it agrees with. The generated tokens are the ones of greedy search.
+                Only supported for greedy search with a batch size of 1. See
+                :meth:`~transformers.generation_utils.GenerationMixin.assisted_greedy_search`.
+            num_assistant_tokens (:obj:`int`, `optional`, defaults to 5):
+                The number of tokens the :obj:`assistant_model` drafts before each forward pass of the model.
 
             model_kwargs:
                 Additional model specific kwargs will be forwarded to the :obj:`forward` function of the model. If the
@@ -958,10 +983,46 @@ class GenerationMixin:
             raise ValueError(
                 "Diverse beam search cannot be used in sampling mode. Make sure that `do_sample` is set to `False`."
             )
+        if streamer is not None and not (is_greedy_gen_mode or is_sample_gen_mode or is_beam_gen_mode):
+            raise ValueError("`streamer` is only supported for greedy search, sampling and beam search.")
+        if assistant_model is not None:
+            if not is_greedy_gen_mode:
+                raise ValueError("`assistant_model` is only supported for greedy search.")
+            if use_static_cache:
+                raise ValueError("`assistant_model` cannot be used with `use_static_cache`.")
+            if banned_words:
+                raise ValueError("`assistant_model` cannot be used with `banned_words`.")
+            if assistant_model.config.vocab_size != self.config.vocab_size:
+                raise ValueError(
+                    f"The assistant model has a vocabulary of {assistant_model.config.vocab_size} tokens, but the "
+                    f"model has a vocabulary of {self.config.vocab_size} tokens."
+                )
 
         # set model_kwargs
         model_kwargs["use_cache"] = use_cache
 
+        if use_static_cache:
+            if not getattr(self, "supports_static_cache", False):
+                raise ValueError(f"{self.__class__.__name__} does not support `use_static_cache`.")
+            if use_cache is False:
+                raise ValueError("`use_static_cache=True` requires `use_cache` to be enabled.")
+            if getattr(self, "model_parallel", False):
+                raise ValueError("`use_static_cache` is not supported with model parallelism.")
+            # the cache is sized for the inputs once they are expanded below
+            if is_sample_gen_mode:
+                expand_size = num_return_sequences
+            elif is_beam_sample_gen_mode:
+                expand_size = num_beams * num_return_sequences
+            else:
+                expand_size = num_beams
+            model_kwargs["past"] = StaticCache(
+                self.config,
+                batch_size=input_ids.shape[0] * expand_size,
+                max_length=max_length,
+                device=input_ids.device,
+                dtype=self.dtype,
+            )
+
         # get distribution pre_processing samplers
         logits_processor = self._get_logits_processor(
             repetition_penalty=repetition_penalty,
@@ -989,6 +1050,31 @@ class GenerationMixin:
                     f"num_return_sequences has to be 1, but is {num_return_sequences} when doing greedy search."
                 )
 
+            if assistant_model is not None:
+                if self.config.is_encoder_decoder:
+                    # the assistant encodes the inputs with its own encoder
+                    assistant_encoder_outputs = assistant_model._prepare_encoder_decoder_kwargs_for_generation(
+                        encoder_input_ids, {"attention_mask": model_kwargs["attention_mask"]}
+                    )["encoder_outputs"]
+                else:
+                    assistant_encoder_outputs = None
+
+                # assisted greedy search
+                return self.assisted_greedy_search(
+                    input_ids,
+                    assistant_model=assistant_model,
+                    num_assistant_tokens=num_assistant_tokens if num_assistant_tokens is not None else 5,
+                    logits_processor=logits_processor,
+                    stopping_criteria=stopping_criteria,
+                    pad_token_id=pad_token_id,
+                    eos_token_id=eos_token_id,
+                    output_scores=output_scores,
+                    return_dict_in_generate=return_dict_in_generate,
+                    streamer=streamer,
+                    assistant_encoder_outputs=assistant_encoder_outputs,
+                    **model_kwargs,
+                )
+
             # greedy search
             return self.greedy_search(
                 input_ids,
@@ -1000,6 +1086,7 @@ class GenerationMixin:
                 output_scores=output_scores,
                 return_dict_in_generate=return_dict_in_generate,
                 synced_gpus=synced_gpus,
+                streamer=streamer,
                 **model_kwargs,
             )
 
@@ -1028,6 +1115,7 @@ class GenerationMixin:
                 output_scores=output_scores,
                 return_dict_in_generate=return_dict_in_generate,
                 synced_gpus=synced_gpus,
+                streamer=streamer,
                 **model_kwargs,
             )
 
@@ -1065,6 +1153,7 @@ class GenerationMixin:
                 output_scores=output_scores,
                 return_dict_in_generate=return_dict_in_generate,
                 synced_gpus=synced_gpus,
+                streamer=streamer,
                 **model_kwargs,
             )
 
@@ -1166,6 +1255,7 @@ class GenerationMixin:
         output_scores: Optional[bool] = None,
         return_dict_in_generate: Optional[bool] = None,
         synced_gpus: Optional[bool] = None,
+        streamer: Optional[BaseStreamer] = None,
         **model_kwargs,
     ) -> Union[GreedySearchOutput, torch.LongTensor]:
         r"""
@@ -1202,6 +1292,8 @@ class GenerationMixin:
                 Whether or not to return a :class:`~transformers.file_utils.ModelOutput` instead of a plain tuple.
             synced_gpus (:obj:`bool`, `optional`, defaults to :obj:`False`):
                 Whether to continue running the while loop until max_length (needed for ZeRO stage 3)
+            streamer (:class:`~transformers.BaseStreamer`, `optional`):
+                Streamer object that receives the prompt, then each new token as soon as it is selected.
             model_kwargs:
                 Additional model specific keyword arguments will be forwarded to the :obj:`forward` function of the
                 model. If model is an encoder-decoder model the kwargs should include :obj:`encoder_outputs`.
@@ -1286,6 +1378,11 @@ class GenerationMixin:
         banned_words_mechanism = BannedWordsMechanism(batch_size=batch_size,
                                                       banned_words=banned_words)
 
+        if streamer is not None:
+            if banned_words_mechanism():
+                raise ValueError("`streamer` cannot be used with `banned_words`, which can revert generated tokens.")
+            streamer.put(input_ids.cpu())
+
         while True:
 
             if synced_gpus:
@@ -1355,6 +1452,8 @@ class GenerationMixin:
 
             # update generated ids, model inputs, and length for next step
             input_ids = torch.cat([input_ids, next_tokens[:, None]], dim=-1)
+            if streamer is not None:
+                streamer.put(next_tokens.cpu())
             model_kwargs = self._update_model_kwargs_for_generation(
                 outputs, model_kwargs, is_encoder_decoder=self.config.is_encoder_decoder
             )
@@ -1371,6 +1470,9 @@ class GenerationMixin:
                 else:
                     this_peer_finished = True
 
+        if streamer is not None:
+            streamer.end()
+
         if return_dict_in_generate:
             if self.config.is_encoder_decoder:
                 return GreedySearchEncoderDecoderOutput(
@@ -1392,6 +1494,194 @@ class GenerationMixin:
         else:
             return input_ids
 
+    def assisted_greedy_search(
+        self,
+        input_ids: torch.LongTensor,
+        assistant_model: "PreTrainedModel",
+        num_assistant_tokens: int = 5,
+        logits_processor: Optional[LogitsProcessorList] = None,
+        stopping_criteria: Optional[StoppingCriteriaList] = None,
+        pad_token_id: Optional[int] = None,
+        eos_token_id: Optional[int] = None,
+        output_scores: Optional[bool] = None,
+        return_dict_in_generate: Optional[bool] = None,
+        streamer: Optional[BaseStreamer] = None,
+        assistant_encoder_outputs: Optional[ModelOutput] = None,
+        **model_kwargs,
+    ) -> Union[GreedySearchOutput, torch.LongTensor]:
+        r"""
+        Generates sequences for models with a language modeling head using greedy decoding assisted by a smaller
+        model. At each step, :obj:`assistant_model` greedily drafts up to :obj:`num_assistant_tokens` tokens, which are
+        all verified by a single forward pass of the model reusing its past key/values. The drafted tokens the model
+        agrees with are kept, followed by the token the model predicts after them, so that the generated tokens are
+        the ones of :meth:`~transformers.generation_utils.GenerationMixin.greedy_search` while the model runs fewer
+        forward passes.
+
+        Only a batch size of 1 is supported, and the model and the assistant have to store their past key/values as
+        tuples of tensors of shape :obj:`(batch_size, num_heads, sequence_length, embed_size_per_head)`, like GPT-2,
+        GPT-Neo, GPT-J, BART or T5.
+
+        Parameters:
+
+            input_ids (:obj:`torch.LongTensor` of shape :obj:`(1, sequence_length)`):
+                The sequence used as a prompt for the generation.
+            assistant_model (:class:`~transformers.PreTrainedModel`):
+                The model drafting the tokens. It has to share the vocabulary of the model.
+            num_assistant_tokens (:obj:`int`, `optional`, defaults to 5):
+                The number of tokens drafted by :obj:`assistant_model` before each forward pass of the model.
+            logits_processor (:obj:`LogitsProcessorList`, `optional`):
+                An instance of :class:`~transformers.LogitsProcessorList`. List of instances of class derived from
+                :class:`~transformers.LogitsProcessor` used to modify the prediction scores of the language modeling
+                head applied at each generation step, by the model and the assistant alike.
+            stopping_criteria (:obj:`StoppingCriteriaList`):
+                An instance of :class:`~transformers.StoppingCriteriaList`. List of instances of class derived from
+                :class:`~transformers.StoppingCriteria` used to tell if the generation loop should stop. It has to
+                include a :class:`~transformers.MaxLengthCriteria`.
+            pad_token_id (:obj:`int`, `optional`):
+                The id of the `padding` token.
+            eos_token_id (:obj:`int`, `optional`):
+                The id of the `end-of-sequence` token.
+            output_scores (:obj:`bool`, `optional`, defaults to `False`):
+                Whether or not to return the prediction scores. See ``scores`` under returned tensors for more details.
+            return_dict_in_generate (:obj:`bool`, `optional`, defaults to `False`):
+                Whether or not to return a :class:`~transformers.file_utils.ModelOutput` instead of a plain tuple.
+            streamer (:class:`~transformers.BaseStreamer`, `optional`):
+                Streamer object that receives the prompt, then each new token as soon as it is verified.
+            assistant_encoder_outputs (:class:`~transformers.file_utils.ModelOutput`, `optional`):
+                The outputs of the encoder of :obj:`assistant_model` for the inputs of the generation. Required if the
+                model is an encoder-decoder model.
+            model_kwargs:
+                Additional model specific keyword arguments will be forwarded to the :obj:`forward` function of the
+                model. If model is an encoder-decoder model the kwargs should include :obj:`encoder_outputs`.
+
+        Return:
+            :class:`~transformers.generation_utils.GreedySearchDecoderOnlyOutput`,
+            :class:`~transformers.generation_utils.GreedySearchEncoderDecoderOutput` or obj:`torch.LongTensor`: A
+            :obj:`torch.LongTensor` containing the generated tokens (default behaviour) or a
+            :class:`~transformers.generation_utils.GreedySearchDecoderOnlyOutput` if
+            ``model.config.is_encoder_decoder=False`` and ``return_dict_in_generate=True`` or a
+            :class:`~transformers.generation_utils.GreedySearchEncoderDecoderOutput` if
+            ``model.config.is_encoder_decoder=True``.
+
+        Examples::
+
+            >>> from transformers import AutoTokenizer, AutoModelForCausalLM
+
+            >>> tokenizer = AutoTokenizer.from_pretrained("gpt2-large")
+            >>> model = AutoModelForCausalLM.from_pretrained("gpt2-large")
+            >>> assistant_model = AutoModelForCausalLM.from_pretrained("distilgpt2")
+
+            >>> input_ids = tokenizer("Today is a beautiful day, and", return_tensors="pt").input_ids
+            >>> outputs = model.generate(input_ids, assistant_model=assistant_model, max_length=50)
+
+            >>> print("Generated:", tokenizer.batch_decode(outputs, skip_special_tokens=True))
+        """
+        # init values
+        logits_processor = logits_processor if logits_processor is not None else LogitsProcessorList()
+        stopping_criteria = stopping_criteria if stopping_criteria is not None else StoppingCriteriaList()
+        max_length = stopping_criteria.max_length
+        if max_length is None:
+            raise ValueError("`stopping_criteria` has to include a `MaxLengthCriteria` for assisted greedy search.")
+        if input_ids.shape[0] != 1:
+            raise ValueError(f"Assisted greedy search only supports a batch size of 1, but is {input_ids.shape[0]}.")
+        if self.config.is_encoder_decoder and assistant_encoder_outputs is None:
+            raise ValueError("`assistant_encoder_outputs` have to be defined for encoder-decoder models.")
+        if model_kwargs.pop("output_attentions", None) or model_kwargs.pop("output_hidden_states", None):
+            raise ValueError("Assisted greedy search cannot output attentions or hidden states.")
+
+        eos_token_id = eos_token_id if eos_token_id is not None else self.config.eos_token_id
+        output_scores = output_scores if output_scores is not None else self.config.output_scores
+        return_dict_in_generate = (
+            return_dict_in_generate if return_dict_in_generate is not None else self.config.return_dict_in_generate
+        )
+
+        # init scores tuple
+        scores = () if (return_dict_in_generate and output_scores) else None
+
+        # if model is an encoder-decoder, retrieve encoder attention weights and hidden states
+        if return_dict_in_generate and self.config.is_encoder_decoder:
+            encoder_attentions = model_kwargs["encoder_outputs"].get("attentions")
+            encoder_hidden_states = model_kwargs["encoder_outputs"].get("hidden_states")
+
+        # both models keep the past key/values of all the tokens but the last one
+        model_kwargs.pop("past", None)
+        model_kwargs["use_cache"] = True
+        past, past_length = None, 0
+        assistant_kwargs = {"attention_mask": model_kwargs.get("attention_mask"), "use_cache": True}
+        if assistant_encoder_outputs is not None:
+            assistant_kwargs["encoder_outputs"] = assistant_encoder_outputs
+        assistant_past, assistant_past_length = None, 0
+
+        cur_len = input_ids.shape[-1]
+        if streamer is not None:
+            streamer.put(input_ids.cpu())
+
+        while True:
+            # the assistant drafts the candidate tokens, leaving room for the token predicted by the model after them
+            candidate_ids = input_ids
+            for _ in range(min(num_assistant_tokens, max_length - cur_len - 1)):
+                assistant_outputs = _assisted_forward(
+                    assistant_model, candidate_ids, assistant_past, assistant_past_length, assistant_kwargs
+                )
+                assistant_past, assistant_past_length = assistant_outputs.past_key_values, candidate_ids.shape[-1]
+                next_tokens_scores = logits_processor(candidate_ids, assistant_outputs.logits[:, -1, :])
+                next_tokens = torch.argmax(next_tokens_scores, dim=-1)
+                candidate_ids = torch.cat([candidate_ids, next_tokens[:, None]], dim=-1)
+                if next_tokens.item() == eos_token_id:
+                    break
+            num_candidates = candidate_ids.shape[-1] - cur_len
+
+            # a single forward pass of the model predicts the token following each candidate
+            outputs = _assisted_forward(self, candidate_ids, past, past_length, model_kwargs)
+            new_logits = outputs.logits[:, -num_candidates - 1 :, :]
+
+            # keep the candidates matching the prediction of the model, then the token it predicts instead
+            is_done = False
+            for i in range(num_candidates + 1):
+                next_token_logits = new_logits[:, i, :]
+                if scores is not None:
+                    scores += (next_token_logits,)
+
+                next_tokens_scores = logits_processor(candidate_ids[:, : cur_len + i], next_token_logits)
+                next_tokens = torch.argmax(next_tokens_scores, dim=-1)
+                input_ids = torch.cat([input_ids, next_tokens[:, None]], dim=-1)
+                if streamer is not None:
+                    streamer.put(next_tokens.cpu())
+
+                is_done = next_tokens.item() == eos_token_id
+                if is_done or i == num_candidates or next_tokens.item() != candidate_ids[0, cur_len + i].item():
+                    break
+
+            # drop the past key/values of the rejected candidates
+            cur_len = input_ids.shape[-1]
+            past_length = cur_len - 1
+            past = _crop_past_key_values(outputs.past_key_values, past_length, self.config.is_encoder_decoder)
+            if assistant_past_length > cur_len - 1:
+                assistant_past_length = cur_len - 1
+                assistant_past = _crop_past_key_values(
+                    assistant_past, assistant_past_length, assistant_model.config.is_encoder_decoder
+                )
+
+            # stop when the sentence is finished, or if we exceed the maximum length
+            if is_done or stopping_criteria(input_ids, scores):
+                break
+
+        if streamer is not None:
+            streamer.end()
+
+        if return_dict_in_generate:
+            if self.config.is_encoder_decoder:
+                return GreedySearchEncoderDecoderOutput(
+                    sequences=input_ids,
+                    scores=scores,
+                    encoder_attentions=encoder_attentions,
+                    encoder_hidden_states=encoder_hidden_states,
+                )
+            else:
+                return GreedySearchDecoderOnlyOutput(sequences=input_ids, scores=scores)
+        else:
+            return input_ids
+
     def sample(
         self,
         input_ids: torch.LongTensor,
@@ -1406,6 +1696,7 @@ class GenerationMixin:
         output_scores: Optional[bool] = None,
         return_dict_in_generate: Optional[bool] = None,
         synced_gpus: Optional[bool] = None,
+        streamer: Optional[BaseStreamer] = None,
         **model_kwargs,
     ) -> Union[SampleOutput, torch.LongTensor]:
         r"""
@@ -1445,6 +1736,8 @@ class GenerationMixin:
                 Whether or not to return a :class:`~transformers.file_utils.ModelOutput` instead of a plain tuple.
             synced_gpus (:obj:`bool`, `optional`, defaults to :obj:`False`):
                 Whether to continue running the while loop until max_length (needed for ZeRO stage 3)
+            streamer (:class:`~transformers.BaseStreamer`, `optional`):
+                Streamer object that receives the prompt, then each new token as soon as it is selected.
             model_kwargs:
                 Additional model specific kwargs will be forwarded to the :obj:`forward` function of the model. If
                 model is an encoder-decoder model the kwargs should include :obj:`encoder_outputs`.
@@ -1532,6 +1825,10 @@ class GenerationMixin:
         cur_len = input_ids.shape[-1]
 
         this_peer_finished = False  # used by synced_gpus only
+
+        if streamer is not None:
+            streamer.put(input_ids.cpu())
+
         # auto-regressive generation
         while True:
 
@@ -1596,6 +1893,8 @@ class GenerationMixin:
 
             # update generated ids, model inputs, and length for next step
             input_ids = torch.cat([input_ids, next_tokens[:, None]], dim=-1)
+            if streamer is not None:
+                streamer.put(next_tokens.cpu())
             model_kwargs = self._update_model_kwargs_for_generation(
                 outputs, model_kwargs, is_encoder_decoder=self.config.is_encoder_decoder
             )
@@ -1612,6 +1911,9 @@ class GenerationMixin:
                 else:
                     this_peer_finished = True
 
+        if streamer is not None:
+            streamer.end()
+
         if return_dict_in_generate:
             if self.config.is_encoder_decoder:
                 return SampleEncoderDecoderOutput(
@@ -1647,6 +1949,7 @@ class GenerationMixin:
         output_scores: Optional[bool] = None,
         return_dict_in_generate: Optional[bool] = None,
         synced_gpus: Optional[bool] = None,
+        streamer: Optional[BaseStreamer] = None,
         **model_kwargs,
     ) -> Union[BeamSearchOutput, torch.LongTensor]:
         r"""
@@ -1686,6 +1989,9 @@ class GenerationMixin:
                 Whether or not to return a :class:`~transformers.file_utils.ModelOutput` instead of a plain tuple.
             synced_gpus (:obj:`bool`, `optional`, defaults to :obj:`False`):
                 Whether to continue running the while loop until max_length (needed for ZeRO stage 3)
+            streamer (:class:`~transformers.BaseStreamer`, `optional`):
+                Streamer object that receives the prompt, then each new token as soon as it is selected.
+                Tokens are streamed once every remaining beam hypothesis agrees on them.
             model_kwargs:
                 Additional model specific kwargs will be forwarded to the :obj:`forward` function of the model. If
                 model is an encoder-decoder model the kwargs should include :obj:`encoder_outputs`.
@@ -1780,7 +2086,7 @@ class GenerationMixin:
                 model_kwargs["encoder_outputs"].get("hidden_states") if output_hidden_states else None
             )
 
-        batch_size = len(beam_scorer._beam_hyps)
+        batch_size = beam_scorer.batch_size
         num_beams = beam_scorer.num_beams
 
         batch_beam_size, cur_len = input_ids.shape
@@ -1794,6 +2100,14 @@ class GenerationMixin:
         beam_scores[:, 1:] = -1e9
         beam_scores = beam_scores.view((batch_size * num_beams,))
 
+        if streamer is not None:
+            if batch_size > 1 or beam_scorer.num_beam_hyps_to_keep > 1:
+                raise ValueError(
+                    "`streamer` only supports beam search with a batch size of 1 and a single returned sequence."
+                )
+            streamer.put(input_ids[:1].cpu())
+            streamed_length = cur_len
+
         this_peer_finished = False  # used by synced_gpus only
         while True:
 
@@ -1884,6 +2198,12 @@ class GenerationMixin:
             # increase cur_len
             cur_len = cur_len + 1
 
+            if streamer is not None:
+                committed_length = _get_committed_beam_length(input_ids, beam_scorer._beam_hyps)
+                if committed_length > streamed_length:
+                    streamer.put(input_ids[0, streamed_length:committed_length].cpu())
+                    streamed_length = committed_length
+
             if beam_scorer.is_done or stopping_criteria(input_ids, scores):
                 if not synced_gpus:
                     break
@@ -1900,6 +2220,10 @@ class GenerationMixin:
             max_length=stopping_criteria.max_length,
         )
 
+        if streamer is not None:
+            streamer.put(sequence_outputs["sequences"][0, streamed_length:].cpu())
+            streamer.end()
+
         if return_dict_in_generate:
             if not output_scores:
                 sequence_outputs["sequence_scores"] = None
@@ -2083,7 +2407,7 @@ class GenerationMixin:
                 model_kwargs["encoder_outputs"].get("hidden_states") if output_hidden_states else None
             )
 
-        batch_size = len(beam_scorer._beam_hyps)
+        batch_size = beam_scorer.batch_size
         num_beams = beam_scorer.num_beams
 
         batch_beam_size, cur_len = input_ids.shape
@@ -2378,7 +2702,7 @@ class GenerationMixin:
                 model_kwargs["encoder_outputs"].get("hidden_states") if output_hidden_states else None
             )
 
-        batch_size = len(beam_scorer._beam_hyps)
+        batch_size = beam_scorer.batch_size
         num_beams = beam_scorer.num_beams
         num_beam_groups = beam_scorer.num_beam_groups
         num_sub_beams = num_beams // num_beam_groups
@@ -2571,6 +2895,64 @@ class GenerationMixin:
             return sequence_outputs["sequences"]
 
 
+def _get_committed_beam_length(input_ids: torch.LongTensor, beam_hyps) -> int:
+    """
+    Returns the length of the prefix shared by all running beams (:obj:`input_ids`) and all finished hypotheses of the
+    first batch in :obj:`beam_hyps`. Every hypothesis beam search can still return starts with this prefix.
+    """
+    agree = input_ids.eq(input_ids[:1]).all(dim=0)
+    length = input_ids.shape[-1] if agree.all() else int(agree.long().argmin())
+    num_hyps = int(beam_hyps.num_hyps[0])
+    if num_hyps > 0:
+        length = min(length, int(beam_hyps.lengths[0, :num_hyps].min()))
+        hyps = beam_hyps.tokens[0, :num_hyps, :length].to(input_ids.device)
+        mismatch = hyps.ne(input_ids[:1, :length]).any(dim=0).nonzero()
+        if len(mismatch) > 0:
+            length = int(mismatch[0])
+    return length
+
+
+def _assisted_forward(
+    model: "PreTrainedModel",
+    input_ids: torch.LongTensor,
+    past: Optional[Tuple[Tuple[torch.Tensor]]],
+    past_length: int,
+    model_kwargs: Dict[str, Any],
+) -> ModelOutput:
+    """
+    Runs :obj:`model` on the tokens of :obj:`input_ids` following the first :obj:`past_length` ones, whose keys and
+    values are in :obj:`past`.
+    """
+    model_kwargs = dict(model_kwargs)
+    attention_mask = model_kwargs.get("attention_mask")
+    if not model.config.is_encoder_decoder and attention_mask is not None:
+        # the attention mask of decoder-only models also covers the generated tokens
+        num_new_tokens = input_ids.shape[-1] - attention_mask.shape[-1]
+        model_kwargs["attention_mask"] = torch.cat(
+            [attention_mask, attention_mask.new_ones((attention_mask.shape[0], num_new_tokens))], dim=-1
+        )
+    model_inputs = model.prepare_inputs_for_generation(input_ids, **model_kwargs)
+    for key in ["input_ids", "decoder_input_ids", "position_ids", "token_type_ids"]:
+        value = model_inputs.get(key)
+        if isinstance(value, torch.Tensor) and value.shape[-1] == input_ids.shape[-1]:
+            model_inputs[key] = value[:, past_length:]
+    model_inputs["past_key_values"] = past
+    return model(**model_inputs, return_dict=True)
+
+
+def _crop_past_key_values(
+    past: Tuple[Tuple[torch.Tensor]], length: int, is_encoder_decoder: bool
+) -> Tuple[Tuple[torch.Tensor]]:
+    """
+    Keeps the self-attention keys and values of the first :obj:`length` tokens. The cross-attention keys and values of
+    encoder-decoder models follow the self-attention ones in each layer and are kept whole.
+    """
+    return tuple(
+        tuple(state[:, :, :length] if not is_encoder_decoder or i < 2 else state for i, state in enumerate(layer_past))
+        for layer_past in past
+    )
+
+
 def top_k_top_p_filtering(
     logits: torch.FloatTensor,
     top_k: int = 0,
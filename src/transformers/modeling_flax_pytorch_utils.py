@@ -26,6 +26,7 @@ import transformers
 from flax.serialization import from_bytes
 from flax.traverse_util import flatten_dict, unflatten_dict
 
+from .safetensors_utils import load_file as safe_load_file
 from .utils import logging
 
 
@@ -51,7 +52,10 @@ def load_pytorch_checkpoint_in_flax_state_dict(flax_model, pytorch_checkpoint_pa
     pt_path = os.path.abspath(pytorch_checkpoint_path)
     logger.info(f"Loading PyTorch weights from {pt_path}")
 
-    pt_state_dict = torch.load(pt_path, map_location="cpu")
+    if pt_path.endswith(".safetensors"):
+        pt_state_dict = safe_load_file(pt_path)
+    else:
+        pt_state_dict = torch.load(pt_path, map_location="cpu")
     logger.info(f"PyTorch checkpoint contains {sum(t.numel() for t in pt_state_dict.values()):,} parameters.")
 
     flax_state_dict = convert_pytorch_state_dict_to_flax(pt_state_dict, flax_model)
@@ -21,6 +21,7 @@ import re
 
 import numpy
 
+from .safetensors_utils import load_file as safe_load_file
 from .utils import logging
 
 
@@ -100,7 +101,10 @@ def load_pytorch_checkpoint_in_tf2_model(tf_model, pytorch_checkpoint_path, tf_i
     pt_path = os.path.abspath(pytorch_checkpoint_path)
     logger.info(f"Loading PyTorch weights from {pt_path}")
 
-    pt_state_dict = torch.load(pt_path, map_location="cpu")
+    if pt_path.endswith(".safetensors"):
+        pt_state_dict = safe_load_file(pt_path)
+    else:
+        pt_state_dict = torch.load(pt_path, map_location="cpu")
     logger.info(f"PyTorch checkpoint contains {sum(t.numel() for t in pt_state_dict.values()):,} parameters")
 
     return load_pytorch_weights_in_tf2_model(
@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import inspect
+import json
 import os
 import re
 import warnings
@@ -33,19 +34,26 @@ from .deepspeed import deepspeed_config, is_deepspeed_zero3_enabled
 from .file_utils import (
     DUMMY_INPUTS,
     FLAX_WEIGHTS_NAME,
+    SAFE_WEIGHTS_INDEX_NAME,
+    SAFE_WEIGHTS_NAME,
     TF2_WEIGHTS_NAME,
     TF_WEIGHTS_NAME,
+    WEIGHTS_INDEX_NAME,
     WEIGHTS_NAME,
     ModelOutput,
     PushToHubMixin,
     cached_path,
+    convert_file_size_to_int,
     copy_func,
+    get_checkpoint_shard_files,
     hf_bucket_url,
     is_offline_mode,
     is_remote_url,
     replace_return_docstrings,
 )
 from .generation_utils import GenerationMixin
+from .safetensors_utils import load_file as safe_load_file
+from .safetensors_utils import save_file as safe_save_file
 from .utils import logging
 from .utils.versions import require_version_core
 
@@ -72,6 +80,27 @@ def no_init_weights(_enable=True):
         _init_weights = True
 
 
+@contextmanager
+def init_empty_weights():
+    """
+    Context manager under which the parameters of the models are created on the meta device: they have a shape and a
+    dtype but no storage, so creating and initializing them costs nothing. Buffers are still created on CPU.
+    """
+    old_register_parameter = nn.Module.register_parameter
+
+    def register_empty_parameter(module, name, param):
+        old_register_parameter(module, name, param)
+        # a parameter already on the meta device is shared with another module and must stay the same object
+        if param is not None and param.device.type != "meta":
+            module._parameters[name] = nn.Parameter(param.to("meta"), requires_grad=param.requires_grad)
+
+    nn.Module.register_parameter = register_empty_parameter
+    try:
+        yield
+    finally:
+        nn.Module.register_parameter = old_register_parameter
+
+
 try:
     from torch.nn import Identity
 except ImportError:
@@ -142,6 +171,279 @@ def get_parameter_dtype(parameter: Union[nn.Module, GenerationMixin, "ModuleUtil
         return first_tuple[1].dtype
 
 
+def get_state_dict_dtype(state_dict: Dict[str, torch.Tensor]):
+    """
+    Returns the dtype of the first floating-point weight of :obj:`state_dict`, skipping the integer buffers (like
+    position ids) that can come before the weights.
+    """
+    for tensor in state_dict.values():
+        if tensor.is_floating_point():
+            return tensor.dtype
+
+    # if no floating-point weights are found, return the dtype of the first tensor
+    return next(iter(state_dict.values())).dtype
+
+
+# The names of the weight files written by `save_pretrained`, sharded or not, in any of the two formats.
+_WEIGHTS_FILE_PATTERN = re.compile(
+    r"^(pytorch_model(-\d{5}-of-\d{5})?\.bin|model(-\d{5}-of-\d{5})?\.safetensors)(\.index\.json)?$"
+)
+
+
+def shard_checkpoint(
+    state_dict: Dict[str, torch.Tensor], max_shard_size: Union[int, str] = "10GB", weights_name: str = WEIGHTS_NAME
+):
+    """
+    Splits a model state dictionary in sub-checkpoints so that the final size of each sub-checkpoint does not exceed a
+    given size.
+
+    The sub-checkpoints are determined by iterating through the :obj:`state_dict` in the order of its keys, so there is
+    no optimization made to make each sub-checkpoint as close as possible to the maximum size passed. For example, if
+    the limit is 10GB and we have weights of sizes [6GB, 6GB, 2GB, 6GB, 2GB, 2GB] they will get sharded as [6GB],
+    [6+2GB], [6+2+2GB] and not [6+2+2GB], [6+2GB], [6GB].
+
+    .. warning::
+
+        If one of the model's weight is bigger that :obj:`max_shard_size`, it will end up in its own sub-checkpoint
+        which will have a size greater than :obj:`max_shard_size`.
+
+    Args:
+        state_dict (:obj:`Dict[str, torch.Tensor]`): The state dictionary of a model to save.
+        max_shard_size (:obj:`int` or :obj:`str`, `optional`, defaults to :obj:`"10GB"`):
+            The maximum size of each sub-checkpoint. If expressed as a string, needs to be digits followed by a unit
+            (like :obj:`"5MB"`).
+        weights_name (:obj:`str`, `optional`, defaults to :obj:`"pytorch_model.bin"`):
+            The name of the checkpoint file, from which the names of the sub-checkpoints are derived.
+
+    Returns:
+        :obj:`Tuple[Dict[str, Dict[str, torch.Tensor]], Optional[Dict]]`: The sub-checkpoints by file name, and the
+        index mapping each weight name to the file it is saved in (:obj:`None` if there is only one sub-checkpoint).
+    """
+    max_shard_size = convert_file_size_to_int(max_shard_size)
+
+    sharded_state_dicts = []
+    current_block = {}
+    current_block_size = 0
+    total_size = 0
+
+    for key, weight in state_dict.items():
+        weight_size = weight.numel() * weight.element_size()
+
+        # If this weight is going to tip up over the maximal size, we split.
+        if current_block_size + weight_size > max_shard_size and len(current_block) > 0:
+            sharded_state_dicts.append(current_block)
+            current_block = {}
+            current_block_size = 0
+
+        current_block[key] = weight
+        current_block_size += weight_size
+        total_size += weight_size
+
+    # Add the last block
+    sharded_state_dicts.append(current_block)
+
+    # If we only have one shard, we return it
+    if len(sharded_state_dicts) == 1:
+        return {weights_name: sharded_state_dicts[0]}, None
+
+    # Otherwise, let's build the index
+    weight_map = {}
+    shards = {}
+    weights_prefix, weights_extension = os.path.splitext(weights_name)
+    for idx, shard in enumerate(sharded_state_dicts):
+        shard_file = f"{weights_prefix}-{idx + 1:05d}-of-{len(sharded_state_dicts):05d}{weights_extension}"
+        shards[shard_file] = shard
+        for key in shard.keys():
+            weight_map[key] = shard_file
+
+    index = {"metadata": {"total_size": total_size}, "weight_map": weight_map}
+    return shards, index
+
+
+def load_state_dict(checkpoint_file: Union[str, os.PathLike]):
+    """
+    Reads a PyTorch checkpoint file, returning properly formatted errors if they arise. Checkpoints in the safetensors
+    format are memory-mapped instead of being unpickled.
+    """
+    try:
+        if str(checkpoint_file).endswith(".safetensors"):
+            return safe_load_file(checkpoint_file)
+        return torch.load(checkpoint_file, map_location="cpu")
+    except Exception as e:
+        try:
+            with open(checkpoint_file) as f:
+                if f.read().startswith("version"):
+                    raise OSError(
+                        "You seem to have cloned a repository without having git-lfs installed. Please install "
+                        "git-lfs and run `git lfs install` followed by `git lfs pull` in the folder "
+                        "you cloned."
+                    )
+                else:
+                    raise ValueError from e
+        except (UnicodeDecodeError, ValueError):
+            raise OSError(
+                f"Unable to load weights from pytorch checkpoint file '{checkpoint_file}'. "
+                "If you tried to load a PyTorch model from a TF 2.0 checkpoint, please set from_tf=True."
+            )
+
+
+def _fix_key(key: str) -> str:
+    # Convert old format to new format if needed from a PyTorch state_dict
+    if "gamma" in key:
+        key = key.replace("gamma", "weight")
+    if "beta" in key:
+        key = key.replace("beta", "bias")
+    return key
+
+
+def _fix_state_dict_keys(state_dict: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    old_keys = [key for key in state_dict.keys() if _fix_key(key) != key]
+    for old_key in old_keys:
+        state_dict[_fix_key(old_key)] = state_dict.pop(old_key)
+    return state_dict
+
+
+def _load_state_dict_into_model(model_to_load: nn.Module, state_dict: Dict[str, torch.Tensor], start_prefix: str):
+    """
+    Copies the weights of :obj:`state_dict` in :obj:`model_to_load` and returns the list of error messages.
+    """
+    # copy state_dict so _load_from_state_dict can modify it
+    metadata = getattr(state_dict, "_metadata", None)
+    state_dict = state_dict.copy()
+    if metadata is not None:
+        state_dict._metadata = metadata
+
+    error_msgs = []
+
+    # PyTorch's `_load_from_state_dict` does not copy parameters in a module's descendants
+    # so we need to apply the function recursively.
+    # `state_dict` is passed as an argument rather than closed over: the recursive `load` is a reference cycle, which
+    # would otherwise keep the weights alive until the next garbage collection.
+    def load(module: nn.Module, state_dict, prefix=""):
+        local_metadata = {} if metadata is None else metadata.get(prefix[:-1], {})
+        args = (state_dict, prefix, local_metadata, True, [], [], error_msgs)
+        if is_deepspeed_zero3_enabled():
+            import deepspeed
+
+            # because zero3 puts placeholders in model params, this context
+            # manager gathers (unpartitions) the params of the current layer, then loads from
+            # the state dict and then re-partitions them again
+            with deepspeed.zero.GatheredParameters(list(module.parameters(recurse=False)), modifier_rank=0):
+                if torch.distributed.get_rank() == 0:
+                    module._load_from_state_dict(*args)
+        else:
+            module._load_from_state_dict(*args)
+
+        for name, child in module._modules.items():
+            if child is not None:
+                load(child, state_dict, prefix + name + ".")
+
+    load(model_to_load, state_dict, prefix=start_prefix)
+
+    return error_msgs
+
+
+def _load_state_dict_into_meta_model(model_to_load: nn.Module, state_dict: Dict[str, torch.Tensor], start_prefix: str):
+    """
+    Sets the weights of :obj:`state_dict` as the parameters and buffers of :obj:`model_to_load`, whose parameters are
+    usually on the meta device, and returns the list of error messages. The weights are cast to the dtype of the
+    tensors they replace, and are used without copy when they already have it.
+    """
+    error_msgs = []
+    for key, value in state_dict.items():
+        if not key.startswith(start_prefix):
+            continue
+        module_name, _, tensor_name = key[len(start_prefix) :].rpartition(".")
+        try:
+            module = model_to_load.get_submodule(module_name)
+        except AttributeError:
+            # unexpected key, reported as such by the caller
+            continue
+
+        if module._parameters.get(tensor_name) is not None:
+            old_value = module._parameters[tensor_name]
+        elif module._buffers.get(tensor_name) is not None:
+            old_value = module._buffers[tensor_name]
+        else:
+            continue
+        if old_value.shape != value.shape:
+            error_msgs.append(
+                f"size mismatch for {key}: copying a param with shape {value.shape} from checkpoint, the shape in "
+                f"current model is {old_value.shape}."
+            )
+            continue
+
+        value = value.to(old_value.dtype)
+        if tensor_name in module._parameters:
+            module._parameters[tensor_name] = nn.Parameter(value, requires_grad=old_value.requires_grad)
+        else:
+            module._buffers[tensor_name] = value
+
+    return error_msgs
+
+
+def _find_shared_parameters(model: nn.Module):
+    """
+    Returns the parameters of :obj:`model` used by several modules, each with the list of :obj:`(module, name)` using
+    it.
+    """
+    owners = {}
+    for module in model.modules():
+        for name, param in module._parameters.items():
+            if param is not None:
+                owners.setdefault(id(param), (param, []))[1].append((module, name))
+    return [(param, param_owners) for param, param_owners in owners.values() if len(param_owners) > 1]
+
+
+def _restore_shared_parameters(shared_parameters):
+    """
+    Shares again the parameters returned by :func:`_find_shared_parameters` that loading a checkpoint replaced in only
+    some of their modules.
+    """
+    for param, owners in shared_parameters:
+        new_params = [owner._parameters[name] for owner, name in owners if owner._parameters[name] is not param]
+        if len(new_params) > 0:
+            for owner, name in owners:
+                owner._parameters[name] = new_params[-1]
+
+
+def _init_meta_parameters(model: nn.Module):
+    """
+    Materializes the parameters of :obj:`model` still on the meta device after loading a checkpoint, and initializes
+    them like when the model is created: with the :obj:`reset_parameters` method of PyTorch layers, then with
+    :obj:`model._init_weights`. Other parameters are set to zero, like the buffers computed from parameters when the
+    model was created.
+    """
+    for module in model.modules():
+        for name, buffer in module.named_buffers(recurse=False):
+            if buffer.device.type == "meta":
+                module._buffers[name] = torch.zeros_like(buffer, device="cpu")
+
+        # like with `_fast_init`, the parameters of a `nn.ParameterList` are initialized by the module holding it
+        if isinstance(module, (nn.ParameterList, nn.ParameterDict)):
+            continue
+        params = dict(module.named_parameters(recurse=False))
+        for child_name, child in module.named_children():
+            if isinstance(child, (nn.ParameterList, nn.ParameterDict)):
+                params.update({f"{child_name}.{name}": param for name, param in child.named_parameters()})
+        if all(param.device.type != "meta" for param in params.values()):
+            continue
+
+        # the module is initialized as a whole, so we restore the loaded parameters after it
+        loaded_params = {name: param.detach().clone() for name, param in params.items() if param.device.type != "meta"}
+        for name, param in params.items():
+            if param.device.type == "meta":
+                owner_name, _, param_name = name.rpartition(".")
+                new_param = nn.Parameter(torch.zeros_like(param, device="cpu"), requires_grad=param.requires_grad)
+                module.get_submodule(owner_name)._parameters[param_name] = new_param
+        if hasattr(module, "reset_parameters"):
+            module.reset_parameters()
+        model._init_weights(module)
+        with torch.no_grad():
+            for name, value in loaded_params.items():
+                module.get_parameter(name).copy_(value)
+
+
 class ModuleUtilsMixin:
     """
     A few utilities for :obj:`torch.nn.Modules`, to be used as a mixin.
@@ -438,6 +740,8 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         - **base_model_prefix** (:obj:`str`) -- A string indicating the attribute associated to the base model in
           derived classes of the same architecture adding modules on top of the base model.
         - **is_parallelizable** (:obj:`bool`) -- A flag indicating whether this model supports model parallelization.
+        - **supports_static_cache** (:obj:`bool`) -- A flag indicating whether this model accepts a
+          :class:`~transformers.StaticCache` as :obj:`past_key_values`.
     """
     config_class = None
     base_model_prefix = ""
@@ -453,6 +757,7 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
 
     is_parallelizable = False
     supports_gradient_checkpointing = False
+    supports_static_cache = False
 
     @property
     def dummy_inputs(self) -> Dict[str, torch.Tensor]:
@@ -984,6 +1289,8 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         state_dict: Optional[dict] = None,
         save_function: Callable = torch.save,
         push_to_hub: bool = False,
+        max_shard_size: Union[int, str] = "10GB",
+        safe_serialization: bool = False,
         **kwargs,
     ):
         """
@@ -1014,6 +1321,16 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                     pushing to if it's an existing folder. Pass along :obj:`temp_dir=True` to use a temporary directory
                     instead.
 
+            max_shard_size (:obj:`int` or :obj:`str`, `optional`, defaults to :obj:`"10GB"`):
+                The maximum size for a checkpoint before being sharded. The checkpoints are then each of size lower
+                than this size, except for weights bigger than it, and an index mapping each weight name to its
+                checkpoint is saved in :obj:`pytorch_model.bin.index.json`. If expressed as a string, needs to be
+                digits followed by a unit (like :obj:`"5MB"`).
+            safe_serialization (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether or not to save the weights in :obj:`model.safetensors` rather than in
+                :obj:`pytorch_model.bin`. This format holds the raw bytes of the weights instead of a pickle, so
+                :meth:`~transformers.PreTrainedModel.from_pretrained` memory-maps it instead of unpickling it. Ignores
+                :obj:`save_function`.
             kwargs:
                 Additional key word arguments passed along to the
                 :meth:`~transformers.file_utils.PushToHubMixin.push_to_hub` method.
@@ -1051,11 +1368,36 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         if self._keys_to_ignore_on_save is not None:
             state_dict = {k: v for k, v in state_dict.items() if k not in self._keys_to_ignore_on_save}
 
+        # Shard the model if it is too big.
+        weights_name = SAFE_WEIGHTS_NAME if safe_serialization else WEIGHTS_NAME
+        shards, index = shard_checkpoint(state_dict, max_shard_size=max_shard_size, weights_name=weights_name)
+
+        # Clean the folder from a previous save, in either format, so that it can't be loaded instead of this one
+        for filename in os.listdir(save_directory):
+            full_filename = os.path.join(save_directory, filename)
+            if _WEIGHTS_FILE_PATTERN.match(filename) and os.path.isfile(full_filename) and filename not in shards:
+                os.remove(full_filename)
+
         # If we save using the predefined names, we can load using `from_pretrained`
-        output_model_file = os.path.join(save_directory, WEIGHTS_NAME)
-        save_function(state_dict, output_model_file)
+        for shard_file, shard in shards.items():
+            if safe_serialization:
+                safe_save_file(shard, os.path.join(save_directory, shard_file), metadata={"format": "pt"})
+            else:
+                save_function(shard, os.path.join(save_directory, shard_file))
 
-        logger.info(f"Model weights saved in {output_model_file}")
+        if index is None:
+            logger.info(f"Model weights saved in {os.path.join(save_directory, weights_name)}")
+        else:
+            save_index_file = os.path.join(
+                save_directory, SAFE_WEIGHTS_INDEX_NAME if safe_serialization else WEIGHTS_INDEX_NAME
+            )
+            with open(save_index_file, "w", encoding="utf-8") as f:
+                f.write(json.dumps(index, indent=2, sort_keys=True) + "\n")
+            logger.info(
+                f"The model is bigger than the maximum size per checkpoint ({max_shard_size}) and is going to be "
+                f"split in {len(shards)} checkpoint shards. You can find where each parameters has been saved in the "
+                f"index located at {save_index_file}."
+            )
 
         if push_to_hub:
             url = self._push_to_hub(repo, commit_message=commit_message)
@@ -1159,7 +1501,12 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 Whether or not to disable fast initialization.
             low_cpu_mem_usage(:obj:`bool`, `optional`, defaults to `:obj:`False`):
                 Tries to not use more than 1x model size in CPU memory (including peak memory) while loading the model.
-                This is an experimental feature and a subject to change at any moment.
+                The model is created with its parameters on the meta device, without allocating nor initializing them,
+                and the weights of the checkpoint, cast to :obj:`torch_dtype`, then become its parameters. Only the
+                parameters missing from the checkpoint are allocated and initialized. This is an experimental feature
+                and a subject to change at any moment. With a checkpoint saved with :obj:`safe_serialization=True`,
+                the weights of the model are then the memory-mapped checkpoint itself: they live in the page cache,
+                shared by all the processes loading the same checkpoint.
             torch_dtype (:obj:`str` or :obj:`torch.dtype`, `optional`):
                 Override the default ``torch.dtype`` and load the model under this dtype. If ``"auto"`` is passed the
                 dtype will be automatically derived from the model's weights.
@@ -1234,6 +1581,12 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
 
         from_pt = not (from_tf | from_flax)
 
+        if low_cpu_mem_usage:
+            # meta tensors are needed to create the model without allocating its parameters
+            require_version_core("torch>=1.9")
+            if is_deepspeed_zero3_enabled():
+                raise ValueError("low_cpu_mem_usage arg cannot be used with DeepSpeed ZeRO-3")
+
         user_agent = {"file_type": "model", "framework": "pytorch", "from_auto_class": from_auto_class}
         if from_pipeline is not None:
             user_agent["using_pipeline"] = from_pipeline
@@ -1262,6 +1615,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         else:
             model_kwargs = kwargs
 
+        # This variable will flag if we're loading a sharded checkpoint. In this case the archive file is just the
+        # index.
+        is_sharded = False
+        sharded_metadata = None
         # Load model
         if pretrained_model_name_or_path is not None:
             pretrained_model_name_or_path = str(pretrained_model_name_or_path)
@@ -1275,12 +1632,23 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 elif from_flax and os.path.isfile(os.path.join(pretrained_model_name_or_path, FLAX_WEIGHTS_NAME)):
                     # Load from a Flax checkpoint in priority if from_flax
                     archive_file = os.path.join(pretrained_model_name_or_path, FLAX_WEIGHTS_NAME)
+                elif os.path.isfile(os.path.join(pretrained_model_name_or_path, SAFE_WEIGHTS_NAME)):
+                    # Load from a PyTorch checkpoint in the safetensors format, which is memory-mapped
+                    archive_file = os.path.join(pretrained_model_name_or_path, SAFE_WEIGHTS_NAME)
+                elif os.path.isfile(os.path.join(pretrained_model_name_or_path, SAFE_WEIGHTS_INDEX_NAME)):
+                    # Load from a sharded PyTorch checkpoint in the safetensors format
+                    archive_file = os.path.join(pretrained_model_name_or_path, SAFE_WEIGHTS_INDEX_NAME)
+                    is_sharded = True
                 elif os.path.isfile(os.path.join(pretrained_model_name_or_path, WEIGHTS_NAME)):
                     # Load from a PyTorch checkpoint
                     archive_file = os.path.join(pretrained_model_name_or_path, WEIGHTS_NAME)
+                elif os.path.isfile(os.path.join(pretrained_model_name_or_path, WEIGHTS_INDEX_NAME)):
+                    # Load from a sharded PyTorch checkpoint
+                    archive_file = os.path.join(pretrained_model_name_or_path, WEIGHTS_INDEX_NAME)
+                    is_sharded = True
                 else:
                     raise EnvironmentError(
-                        f"Error no file named {[WEIGHTS_NAME, TF2_WEIGHTS_NAME, TF_WEIGHTS_NAME + '.index', FLAX_WEIGHTS_NAME]} found in "
+                        f"Error no file named {[WEIGHTS_NAME, WEIGHTS_INDEX_NAME, SAFE_WEIGHTS_NAME, SAFE_WEIGHTS_INDEX_NAME, TF2_WEIGHTS_NAME, TF_WEIGHTS_NAME + '.index', FLAX_WEIGHTS_NAME]} found in "
                         f"directory {pretrained_model_name_or_path} or `from_tf` and `from_flax` set to False."
                     )
             elif os.path.isfile(pretrained_model_name_or_path) or is_remote_url(pretrained_model_name_or_path):
@@ -1321,18 +1689,44 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                     user_agent=user_agent,
                 )
             except EnvironmentError as err:
-                logger.error(err)
-                msg = (
-                    f"Can't load weights for '{pretrained_model_name_or_path}'. Make sure that:\n\n"
-                    f"- '{pretrained_model_name_or_path}' is a correct model identifier listed on 'https://huggingface.co/models'\n"
-                    f"  (make sure '{pretrained_model_name_or_path}' is not a path to a local directory with something else, in that case)\n\n"
-                    f"- or '{pretrained_model_name_or_path}' is the correct path to a directory containing a file named one of {WEIGHTS_NAME}, {TF2_WEIGHTS_NAME}, {TF_WEIGHTS_NAME}\n\n"
-                )
+                resolved_archive_file = None
+                if from_pt and archive_file.endswith(WEIGHTS_NAME) and is_remote_url(archive_file):
+                    # The checkpoint may be sharded, in which case the repo has an index instead, or be saved in the
+                    # safetensors format
+                    for filename in [WEIGHTS_INDEX_NAME, SAFE_WEIGHTS_NAME, SAFE_WEIGHTS_INDEX_NAME]:
+                        other_archive_file = hf_bucket_url(
+                            pretrained_model_name_or_path, filename=filename, revision=revision, mirror=mirror
+                        )
+                        try:
+                            resolved_archive_file = cached_path(
+                                other_archive_file,
+                                cache_dir=cache_dir,
+                                force_download=force_download,
+                                proxies=proxies,
+                                resume_download=resume_download,
+                                local_files_only=local_files_only,
+                                use_auth_token=use_auth_token,
+                                user_agent=user_agent,
+                            )
+                        except EnvironmentError:
+                            continue
+                        archive_file = other_archive_file
+                        is_sharded = filename.endswith(".index.json")
+                        break
+
+                if resolved_archive_file is None:
+                    logger.error(err)
+                    msg = (
+                        f"Can't load weights for '{pretrained_model_name_or_path}'. Make sure that:\n\n"
+                        f"- '{pretrained_model_name_or_path}' is a correct model identifier listed on 'https://huggingface.co/models'\n"
+                        f"  (make sure '{pretrained_model_name_or_path}' is not a path to a local directory with something else, in that case)\n\n"
+                        f"- or '{pretrained_model_name_or_path}' is the correct path to a directory containing a file named one of {WEIGHTS_NAME}, {TF2_WEIGHTS_NAME}, {TF_WEIGHTS_NAME}\n\n"
+                    )
 
-                if revision is not None:
-                    msg += f"- or '{revision}' is a valid git identifier (branch name, a tag name, or a commit id) that exists for this model name as listed on its model page on 'https://huggingface.co/models'\n\n"
+                    if revision is not None:
+                        msg += f"- or '{revision}' is a valid git identifier (branch name, a tag name, or a commit id) that exists for this model name as listed on its model page on 'https://huggingface.co/models'\n\n"
 
-                raise EnvironmentError(msg)
+                    raise EnvironmentError(msg)
 
             if resolved_archive_file == archive_file:
                 logger.info(f"loading weights file {archive_file}")
@@ -1341,28 +1735,28 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         else:
             resolved_archive_file = None
 
+        # We'll need to download and cache each checkpoint shard if the checkpoint is sharded.
+        if is_sharded:
+            # resolved_archive_file becomes a list of files that point to the different checkpoint shards in this case.
+            resolved_archive_file, sharded_metadata = get_checkpoint_shard_files(
+                pretrained_model_name_or_path,
+                resolved_archive_file,
+                cache_dir=cache_dir,
+                force_download=force_download,
+                proxies=proxies,
+                resume_download=resume_download,
+                local_files_only=local_files_only,
+                use_auth_token=use_auth_token,
+                user_agent=user_agent,
+                revision=revision,
+                mirror=mirror,
+            )
+
         # load pt weights early so that we know which dtype to init the model under
         if from_pt:
-            if state_dict is None:
-                try:
-                    state_dict = torch.load(resolved_archive_file, map_location="cpu")
-                except Exception as e:
-                    try:
-                        with open(resolved_archive_file) as f:
-                            if f.read().startswith("version"):
-                                raise OSError(
-                                    "You seem to have cloned a repository without having git-lfs installed. Please install "
-                                    "git-lfs and run `git lfs install` followed by `git lfs pull` in the folder "
-                                    "you cloned."
-                                )
-                            else:
-                                raise ValueError from e
-                    except (UnicodeDecodeError, ValueError):
-                        raise OSError(
-                            f"Unable to load weights from pytorch checkpoint file for '{pretrained_model_name_or_path}' "
-                            f"at '{resolved_archive_file}'. "
-                            "If you tried to load a PyTorch model from a TF 2.0 checkpoint, please set from_tf=True."
-                        )
+            if state_dict is None and not is_sharded:
+                # Sharded checkpoints are loaded one shard at a time, once the model is instantiated
+                state_dict = load_state_dict(resolved_archive_file)
 
             # set dtype to instantiate the model under:
             # 1. If torch_dtype is not None, we use that dtype
@@ -1373,18 +1767,20 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             if torch_dtype is not None:
                 if isinstance(torch_dtype, str):
                     if torch_dtype == "auto":
-                        torch_dtype = next(iter(state_dict.values())).dtype
+                        if is_sharded and state_dict is None:
+                            # the first shard with floating-point weights is enough to know their dtype
+                            for shard_file in resolved_archive_file:
+                                torch_dtype = get_state_dict_dtype(load_state_dict(shard_file))
+                                if torch_dtype.is_floating_point:
+                                    break
+                        else:
+                            torch_dtype = get_state_dict_dtype(state_dict)
                     else:
                         raise ValueError(
                             f"`torch_dtype` can be either a `torch.dtype` or `auto`, but received {torch_dtype}"
                         )
                 dtype_orig = cls._set_default_torch_dtype(torch_dtype)
 
-            if low_cpu_mem_usage:
-                # save the keys
-                loaded_state_dict_keys = [k for k in state_dict.keys()]
-                del state_dict  # free CPU memory - will reload again later
-
         config.name_or_path = pretrained_model_name_or_path
 
         # Instantiate model.
@@ -1397,6 +1793,17 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             with deepspeed.zero.Init(config_dict_or_path=deepspeed_config()):
                 with no_init_weights(_enable=_fast_init):
                     model = cls(config, *model_args, **model_kwargs)
+        elif from_pt and low_cpu_mem_usage:
+            # the parameters are only materialized when loading the checkpoint, directly from its weights
+            try:
+                with no_init_weights(_enable=_fast_init), init_empty_weights():
+                    model = cls(config, *model_args, **model_kwargs)
+            except (NotImplementedError, RuntimeError):
+                # some layers compute with their parameters when created (e.g. weight normalization), which isn't
+                # possible on the meta device
+                logger.info(f"{cls.__name__} can't be created on the meta device, its parameters are allocated.")
+                with no_init_weights(_enable=_fast_init):
+                    model = cls(config, *model_args, **model_kwargs)
         else:
             with no_init_weights(_enable=_fast_init):
                 model = cls(config, *model_args, **model_kwargs)
@@ -1434,17 +1841,16 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 )
                 raise
         elif from_pt:
-
-            if low_cpu_mem_usage:
-                cls._load_state_dict_into_model_low_mem(model, loaded_state_dict_keys, resolved_archive_file)
-            else:
-                model, missing_keys, unexpected_keys, mismatched_keys, error_msgs = cls._load_state_dict_into_model(
-                    model,
-                    state_dict,
-                    pretrained_model_name_or_path,
-                    ignore_mismatched_sizes=ignore_mismatched_sizes,
-                    _fast_init=_fast_init,
-                )
+            model, missing_keys, unexpected_keys, mismatched_keys, error_msgs = cls._load_pretrained_model(
+                model,
+                state_dict,
+                resolved_archive_file,
+                pretrained_model_name_or_path,
+                ignore_mismatched_sizes=ignore_mismatched_sizes,
+                sharded_metadata=sharded_metadata,
+                _fast_init=_fast_init,
+                low_cpu_mem_usage=low_cpu_mem_usage,
+            )
 
         # make sure token embedding weights are still tied if needed
         model.tie_weights()
@@ -1464,29 +1870,25 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         return model
 
     @classmethod
-    def _load_state_dict_into_model(
-        cls, model, state_dict, pretrained_model_name_or_path, ignore_mismatched_sizes=False, _fast_init=True
+    def _load_pretrained_model(
+        cls,
+        model,
+        state_dict,
+        resolved_archive_file,
+        pretrained_model_name_or_path,
+        ignore_mismatched_sizes=False,
+        sharded_metadata=None,
+        _fast_init=True,
+        low_cpu_mem_usage=False,
     ):
-
-        # Convert old format to new format if needed from a PyTorch state_dict
-        old_keys = []
-        new_keys = []
-        for key in state_dict.keys():
-            new_key = None
-            if "gamma" in key:
-                new_key = key.replace("gamma", "weight")
-            if "beta" in key:
-                new_key = key.replace("beta", "bias")
-            if new_key:
-                old_keys.append(key)
-                new_keys.append(new_key)
-        for old_key, new_key in zip(old_keys, new_keys):
-            state_dict[new_key] = state_dict.pop(old_key)
-
         # Retrieve missing & unexpected_keys
         model_state_dict = model.state_dict()
         expected_keys = list(model_state_dict.keys())
-        loaded_keys = list(state_dict.keys())
+        if state_dict is not None:
+            loaded_keys = list(state_dict.keys())
+        else:
+            loaded_keys = sharded_metadata["all_checkpoint_keys"]
+        loaded_keys = [_fix_key(key) for key in loaded_keys]
         prefix = model.base_model_prefix
 
         has_prefix_module = any(s.startswith(prefix) for s in loaded_keys)
@@ -1506,28 +1908,6 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         missing_keys = list(set(expected_keys) - set(loaded_keys))
         unexpected_keys = list(set(loaded_keys) - set(expected_keys))
 
-        # Mistmatched keys contains tuples key/shape1/shape2 of weights in the checkpoint that have a shape not
-        # matching the weights in the model.
-        mismatched_keys = []
-        if ignore_mismatched_sizes:
-            for checkpoint_key in loaded_keys:
-                model_key = checkpoint_key
-                if remove_prefix_from_model:
-                    # The model key starts with `prefix` but `checkpoint_key` doesn't so we add it.
-                    model_key = f"{prefix}.{checkpoint_key}"
-                elif add_prefix_to_model:
-                    # The model key doesn't start with `prefix` but `checkpoint_key` does so we remove it.
-                    model_key = ".".join(checkpoint_key.split(".")[1:])
-
-                if (
-                    model_key in model_state_dict
-                    and state_dict[checkpoint_key].shape != model_state_dict[model_key].shape
-                ):
-                    mismatched_keys.append(
-                        (checkpoint_key, state_dict[checkpoint_key].shape, model_state_dict[model_key].shape)
-                    )
-                    del state_dict[checkpoint_key]
-
         # Some models may have keys that are not in the state by design, removing them before needlessly warning
         # the user.
         if cls._keys_to_ignore_on_load_missing is not None:
@@ -1538,7 +1918,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             for pat in cls._keys_to_ignore_on_load_unexpected:
                 unexpected_keys = [k for k in unexpected_keys if re.search(pat, k) is None]
 
-        if _fast_init:
+        # The parameters of a model created on the meta device are only initialized after loading, when we know which
+        # ones are still missing
+        on_meta_device = low_cpu_mem_usage and any(param.device.type == "meta" for param in model.parameters())
+        if _fast_init and not on_meta_device:
             # retrieve unintialized modules and initialize
             uninitialized_modules = model.retrieve_modules_from_names(
                 missing_keys, add_prefix=add_prefix_to_model, remove_prefix=remove_prefix_from_model
@@ -1546,35 +1929,6 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             for module in uninitialized_modules:
                 model._init_weights(module)
 
-        # copy state_dict so _load_from_state_dict can modify it
-        metadata = getattr(state_dict, "_metadata", None)
-        state_dict = state_dict.copy()
-        if metadata is not None:
-            state_dict._metadata = metadata
-
-        error_msgs = []
-
-        # PyTorch's `_load_from_state_dict` does not copy parameters in a module's descendants
-        # so we need to apply the function recursively.
-        def load(module: nn.Module, prefix=""):
-            local_metadata = {} if metadata is None else metadata.get(prefix[:-1], {})
-            args = (state_dict, prefix, local_metadata, True, [], [], error_msgs)
-            if is_deepspeed_zero3_enabled():
-                import deepspeed
-
-                # because zero3 puts placeholders in model params, this context
-                # manager gathers (unpartitions) the params of the current layer, then loads from
-                # the state dict and then re-partitions them again
-                with deepspeed.zero.GatheredParameters(list(module.parameters(recurse=False)), modifier_rank=0):
-                    if torch.distributed.get_rank() == 0:
-                        module._load_from_state_dict(*args)
-            else:
-                module._load_from_state_dict(*args)
-
-            for name, child in module._modules.items():
-                if child is not None:
-                    load(child, prefix + name + ".")
-
         # Make sure we are able to load base models as well as derived models (with heads)
         start_prefix = ""
         model_to_load = model
@@ -1588,7 +1942,58 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                     "properly saved?"
                 )
 
-        load(model_to_load, prefix=start_prefix)
+        def _find_mismatched_keys(state_dict):
+            # Mistmatched keys contains tuples key/shape1/shape2 of weights in the checkpoint that have a shape not
+            # matching the weights in the model.
+            mismatched_keys = []
+            if ignore_mismatched_sizes:
+                for checkpoint_key in list(state_dict.keys()):
+                    model_key = checkpoint_key
+                    if remove_prefix_from_model:
+                        # The model key starts with `prefix` but `checkpoint_key` doesn't so we add it.
+                        model_key = f"{prefix}.{checkpoint_key}"
+                    elif add_prefix_to_model:
+                        # The model key doesn't start with `prefix` but `checkpoint_key` does so we remove it.
+                        model_key = ".".join(checkpoint_key.split(".")[1:])
+
+                    if (
+                        model_key in model_state_dict
+                        and state_dict[checkpoint_key].shape != model_state_dict[model_key].shape
+                    ):
+                        mismatched_keys.append(
+                            (checkpoint_key, state_dict[checkpoint_key].shape, model_state_dict[model_key].shape)
+                        )
+                        del state_dict[checkpoint_key]
+            return mismatched_keys
+
+        # With `low_cpu_mem_usage`, the parameters of the model are replaced by the weights of the checkpoint instead of
+        # receiving a copy of them.
+        load_fn = _load_state_dict_into_meta_model if low_cpu_mem_usage else _load_state_dict_into_model
+        if low_cpu_mem_usage:
+            shared_parameters = _find_shared_parameters(model)
+
+        if state_dict is not None:
+            # Whole checkpoint
+            state_dict = _fix_state_dict_keys(state_dict)
+            mismatched_keys = _find_mismatched_keys(state_dict)
+            error_msgs = load_fn(model_to_load, state_dict, start_prefix)
+        else:
+            # Sharded checkpoint: the shards are loaded one at a time, each being freed before the next one is loaded
+            # so that only the model and one shard are in memory at once.
+            mismatched_keys = []
+            error_msgs = []
+            for shard_file in resolved_archive_file:
+                state_dict = _fix_state_dict_keys(load_state_dict(shard_file))
+                mismatched_keys += _find_mismatched_keys(state_dict)
+                error_msgs += load_fn(model_to_load, state_dict, start_prefix)
+                del state_dict
+
+        if low_cpu_mem_usage:
+            _restore_shared_parameters(shared_parameters)
+        if on_meta_device:
+            # Tied weights are only loaded once, then only the weights missing from the checkpoint are initialized
+            model.tie_weights()
+            _init_meta_parameters(model)
 
         if len(error_msgs) > 0:
             error_msg = "\n\t".join(error_msgs)
@@ -1652,72 +2057,6 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
 
         return retrieved_modules
 
-    @classmethod
-    def _load_state_dict_into_model_low_mem(cls, model, loaded_state_dict_keys, resolved_archive_file):
-        """
-        This is an experimental function that loads the model using ~1.x model size CPU memory
-
-        Before it gets called we do:
-
-        1. save which state_dict keys we have
-        2. drop state_dict before model is created, since the latter takes 1x model size memory
-
-        Here then we continue:
-
-        3. switch to the meta device all params/buffers that are going to be replaced from the loaded state_dict
-        4. load state_dict 2nd time
-        5. replace the params/buffers from the state_dict
-
-        Currently, it doesn't handle missing_keys, unexpected_keys, mismatched_keys. It can't handle deepspeed.
-        """
-
-        require_version_core("torch>=1.9")
-        if is_deepspeed_zero3_enabled():
-            raise ValueError("low_cpu_mem_usage arg cannot be used with DeepSpeed ZeRO-3")
-
-        # a helper util to find the last sub-module and the param/buffer name
-        def find_submodule_and_param_name(model, long_key):
-            split_key = long_key.split(".")
-            submodule = model
-            while len(split_key) > 1:
-                if hasattr(submodule, split_key[0]):
-                    submodule = getattr(submodule, split_key[0])
-                    del split_key[0]
-                else:
-                    submodule = None
-                    break
-            return submodule, split_key[0]
-
-        # dematerialize param storage for keys that are going to be replaced by state_dict, by
-        # putting those on the meta device
-        for k in loaded_state_dict_keys:
-            submodule, param_name = find_submodule_and_param_name(model, k)
-            if submodule is not None:
-                # selectively switch to the meta device only those params/buffers that will
-                # be next replaced from state_dict. This a complex way to do p.to_("meta")
-                # since we have no in-place to_ for tensors.
-                new_val = getattr(submodule, param_name)
-                if isinstance(new_val, torch.nn.Parameter):
-                    # isinstance returns False for Params on meta device, so switch after the check
-                    new_val = torch.nn.Parameter(new_val.to("meta"))
-                else:
-                    new_val = new_val.to("meta")
-                setattr(submodule, param_name, new_val)
-
-        # only now can load state_dict
-        state_dict = torch.load(resolved_archive_file, map_location="cpu")
-
-        # materialize state_dict entries one by one on CPU
-        for k in loaded_state_dict_keys:
-            submodule, param_name = find_submodule_and_param_name(model, k)
-            if submodule is not None:
-                new_val = state_dict[k]
-                if isinstance(getattr(submodule, param_name), torch.nn.Parameter):
-                    new_val = torch.nn.Parameter(new_val)
-                setattr(submodule, param_name, new_val)
-
-        del state_dict
-
 
 # To update the docstring, we need to copy the method, otherwise we change the original docstring.
 PreTrainedModel.push_to_hub = copy_func(PreTrainedModel.push_to_hub)
@@ -1740,10 +2079,10 @@ class Conv1D(nn.Module):
     def __init__(self, nf, nx):
         super().__init__()
         self.nf = nf
-        w = torch.empty(nx, nf)
-        nn.init.normal_(w, std=0.02)
-        self.weight = nn.Parameter(w)
+        self.weight = nn.Parameter(torch.empty(nx, nf))
         self.bias = nn.Parameter(torch.zeros(nf))
+        # initialized once registered, to be free on the meta device
+        nn.init.normal_(self.weight, std=0.02)
 
     def forward(self, x):
         size_out = x.size()[:-1] + (self.nf,)
@@ -512,6 +512,9 @@ class BeitPreTrainedModel(PreTrainedModel):
         elif isinstance(module, nn.LayerNorm):
             module.bias.data.zero_()
             module.weight.data.fill_(1.0)
+        elif isinstance(module, BeitLayer) and module.lambda_1 is not None:
+            module.lambda_1.data.fill_(self.config.layer_scale_init_value)
+            module.lambda_2.data.fill_(self.config.layer_scale_init_value)
 
     def _set_gradient_checkpointing(self, module, value=False):
         if isinstance(module, BeitEncoder):
@@ -378,6 +378,7 @@ class CLIPPreTrainedModel(PreTrainedModel):
                 module.visual_projection.weight,
                 std=module.vision_embed_dim ** -0.5 * self.config.initializer_factor,
             )
+            module.logit_scale.data.fill_(self.config.logit_scale_init_value)
 
         if isinstance(module, nn.LayerNorm):
             module.bias.data.zero_()
@@ -345,7 +345,7 @@ class PretrainedFSMTModel(PreTrainedModel):
             if module.bias is not None:
                 module.bias.data.zero_()
         elif isinstance(module, SinusoidalPositionalEmbedding):
-            pass
+            module.make_weight(*module.weight.shape, module.padding_idx)
         elif isinstance(module, nn.Embedding):
             module.weight.data.normal_(mean=0.0, std=std)
             if module.padding_idx is not None:
@@ -22,7 +22,7 @@ from typing import TYPE_CHECKING, List, Optional, Tuple
 
 import regex as re
 
-from ...tokenization_utils import AddedToken, PreTrainedTokenizer
+from ...tokenization_utils import AddedToken, BPECache, PreTrainedTokenizer
 from ...utils import logging
 
 
@@ -34,6 +34,7 @@ logger = logging.get_logger(__name__)
 VOCAB_FILES_NAMES = {
     "vocab_file": "vocab.json",
     "merges_file": "merges.txt",
+    "bpe_warm_start_file": "bpe_warm_start.json",
 }
 
 PRETRAINED_VOCAB_FILES_MAP = {
@@ -146,6 +147,19 @@ class GPT2Tokenizer(PreTrainedTokenizer):
         add_prefix_space (:obj:`bool`, `optional`, defaults to :obj:`False`):
             Whether or not to add an initial space to the input. This allows to treat the leading word just as any
             other word. (GPT2 tokenizer detect beginning of words by the preceding space).
+        bpe_cache_size (:obj:`int`, `optional`, defaults to 50000):
+            The maximum number of words whose BPE merges are cached, the least recently used ones being evicted
+            first. :obj:`None` means the cache is unbounded. The cache, which counts its hits and misses, is available
+            as :obj:`tokenizer.cache` (see :class:`~transformers.tokenization_utils.BPECache`).
+        share_bpe_cache (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether or not to share the cache of BPE merges with the other instances of this tokenizer class loaded
+            from the same merges file.
+        bpe_warm_start_file (:obj:`str`, `optional`):
+            Path to a JSON list of (byte-level encoded) words, most frequent first, whose BPE merges are precomputed
+            to warm up the cache. The list is kept in :obj:`tokenizer.bpe_warm_start` and saved alongside the
+            vocabulary.
+            Setting :obj:`tokenizer.bpe_warm_start = tokenizer.cache.most_recent()` before saving a tokenizer that has
+            processed representative text creates one.
     """
 
     vocab_files_names = VOCAB_FILES_NAMES
@@ -162,6 +176,9 @@ class GPT2Tokenizer(PreTrainedTokenizer):
         bos_token="<|endoftext|>",
         eos_token="<|endoftext|>",
         add_prefix_space=False,
+        bpe_cache_size=50000,
+        share_bpe_cache=False,
+        bpe_warm_start_file=None,
         **kwargs
     ):
         bos_token = AddedToken(bos_token, lstrip=False, rstrip=False) if isinstance(bos_token, str) else bos_token
@@ -173,6 +190,9 @@ class GPT2Tokenizer(PreTrainedTokenizer):
             bos_token=bos_token,
             eos_token=eos_token,
             add_prefix_space=add_prefix_space,
+            bpe_cache_size=bpe_cache_size,
+            share_bpe_cache=share_bpe_cache,
+            bpe_warm_start_file=bpe_warm_start_file,
             **kwargs,
         )
 
@@ -186,7 +206,16 @@ class GPT2Tokenizer(PreTrainedTokenizer):
             bpe_merges = merges_handle.read().split("\n")[1:-1]
         bpe_merges = [tuple(merge.split()) for merge in bpe_merges]
         self.bpe_ranks = dict(zip(bpe_merges, range(len(bpe_merges))))
-        self.cache = {}
+        if share_bpe_cache:
+            cache_key = (self.__class__.__name__, os.path.realpath(merges_file))
+            self.cache = BPECache.shared(cache_key, max_size=bpe_cache_size)
+        else:
+            self.cache = BPECache(max_size=bpe_cache_size)
+        self.bpe_warm_start = None
+        if bpe_warm_start_file is not None:
+            with open(bpe_warm_start_file, encoding="utf-8") as warm_start_handle:
+                self.bpe_warm_start = json.load(warm_start_handle)
+            self.cache.warm_start(self.bpe_warm_start, self.bpe)
         self.add_prefix_space = add_prefix_space
 
         # Should have added re.IGNORECASE so BPE merges can happen for capitalized versions of contractions
@@ -200,8 +229,9 @@ class GPT2Tokenizer(PreTrainedTokenizer):
         return dict(self.encoder, **self.added_tokens_encoder)
 
     def bpe(self, token):
-        if token in self.cache:
-            return self.cache[token]
+        word = self.cache.get(token)
+        if word is not None:
+            return word
         word = tuple(token)
         pairs = get_pairs(word)
 
@@ -245,10 +275,9 @@ class GPT2Tokenizer(PreTrainedTokenizer):
         """Tokenize a string."""
         bpe_tokens = []
         for token in re.findall(self.pat, text):
-            token = "".join(
-                self.byte_encoder[b] for b in token.encode("utf-8")
-            )  # Maps all our bytes to unicode strings, avoiding control tokens of the BPE (spaces in our case)
-            bpe_tokens.extend(bpe_token for bpe_token in self.bpe(token).split(" "))
+            # Maps all our bytes to unicode strings, avoiding control tokens of the BPE (spaces in our case)
+            token = token.encode("utf-8").decode("latin-1").translate(self.byte_encoder)
+            bpe_tokens.extend(self.bpe(token).split(" "))
         return bpe_tokens
 
     def _convert_token_to_id(self, token):
@@ -292,7 +321,17 @@ class GPT2Tokenizer(PreTrainedTokenizer):
                 writer.write(" ".join(bpe_tokens) + "\n")
                 index += 1
 
-        return vocab_file, merge_file
+        if self.bpe_warm_start is None:
+            return vocab_file, merge_file
+
+        warm_start_file = os.path.join(
+            save_directory,
+            (filename_prefix + "-" if filename_prefix else "") + VOCAB_FILES_NAMES["bpe_warm_start_file"],
+        )
+        with open(warm_start_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.bpe_warm_start, ensure_ascii=False))
+
+        return vocab_file, merge_file, warm_start_file
 
     def prepare_for_tokenization(self, text, is_split_into_words=False, **kwargs):
         add_prefix_space = kwargs.pop("add_prefix_space", self.add_prefix_space)
@@ -20,7 +20,11 @@ from ..roberta.tokenization_roberta import RobertaTokenizer
 logger = logging.get_logger(__name__)
 
 
-VOCAB_FILES_NAMES = {"vocab_file": "vocab.json", "merges_file": "merges.txt"}
+VOCAB_FILES_NAMES = {
+    "vocab_file": "vocab.json",
+    "merges_file": "merges.txt",
+    "bpe_warm_start_file": "bpe_warm_start.json",
+}
 
 PRETRAINED_VOCAB_FILES_MAP = {
     "vocab_file": {
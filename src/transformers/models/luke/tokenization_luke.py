@@ -1533,7 +1533,7 @@ class LukeTokenizer(RobertaTokenizer):
         return encoded_inputs
 
     def save_vocabulary(self, save_directory: str, filename_prefix: Optional[str] = None) -> Tuple[str]:
-        vocab_file, merge_file = super().save_vocabulary(save_directory, filename_prefix)
+        files = super().save_vocabulary(save_directory, filename_prefix)
 
         entity_vocab_file = os.path.join(
             save_directory, (filename_prefix + "-" if filename_prefix else "") + VOCAB_FILES_NAMES["entity_vocab_file"]
@@ -1542,4 +1542,4 @@ class LukeTokenizer(RobertaTokenizer):
         with open(entity_vocab_file, "w", encoding="utf-8") as f:
             f.write(json.dumps(self.entity_vocab, ensure_ascii=False))
 
-        return vocab_file, merge_file, entity_vocab_file
+        return files + (entity_vocab_file,)
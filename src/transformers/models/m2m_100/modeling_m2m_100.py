@@ -535,6 +535,8 @@ class M2M100PreTrainedModel(PreTrainedModel):
             module.weight.data.normal_(mean=0.0, std=std)
             if module.padding_idx is not None:
                 module.weight.data[module.padding_idx].zero_()
+        elif isinstance(module, M2M100SinusoidalPositionalEmbedding):
+            module.make_weights(module.weights.shape[0], module.embedding_dim, module.padding_idx)
 
     def _set_gradient_checkpointing(self, module, value=False):
         if isinstance(module, (M2M100Decoder, M2M100Encoder)):
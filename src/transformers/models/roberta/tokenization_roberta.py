@@ -26,6 +26,7 @@ logger = logging.get_logger(__name__)
 VOCAB_FILES_NAMES = {
     "vocab_file": "vocab.json",
     "merges_file": "merges.txt",
+    "bpe_warm_start_file": "bpe_warm_start.json",
 }
 
 PRETRAINED_VOCAB_FILES_MAP = {
@@ -546,6 +546,8 @@ class Speech2TextPreTrainedModel(PreTrainedModel):
             module.weight.data.normal_(mean=0.0, std=std)
             if module.padding_idx is not None:
                 module.weight.data[module.padding_idx].zero_()
+        elif isinstance(module, Speech2TextSinusoidalPositionalEmbedding):
+            module.make_weights(module.weights.shape[0], module.embedding_dim, module.padding_idx)
 
     def _set_gradient_checkpointing(self, module, value=False):
         if isinstance(module, (Speech2TextDecoder, Speech2TextEncoder)):
@@ -18,6 +18,7 @@ import json
 import os
 import pickle
 import sys
+import time
 import warnings
 from abc import ABC, abstractmethod
 from collections import UserDict
@@ -100,6 +101,19 @@ def _pad(items, key, padding_value, padding_side):
         return [item[key] for item in items]
 
 
+def _input_length(item):
+    for key, value in item.items():
+        if key.startswith("input_") and isinstance(value, torch.Tensor) and value.dim() in [2, 3]:
+            return value.shape[1]
+    return 0
+
+
+def _num_padded_tokens(lengths, batch_size):
+    return sum(
+        max(lengths[i : i + batch_size]) * len(lengths[i : i + batch_size]) for i in range(0, len(lengths), batch_size)
+    )
+
+
 def pad_collate_fn(tokenizer, feature_extractor):
     padding_side = "right"
     if tokenizer is None and feature_extractor is None:
@@ -667,6 +681,11 @@ PIPELINE_INIT_ARGS = r"""
             When the pipeline will use `DataLoader` (when passing a dataset, on GPU for a Pytorch model), the size of
             the batch to use, for inference this is not always beneficial, please read `Batching with pipelines
             <https://huggingface.co/transformers/main_classes/pipelines.html#pipeline-batching>`_ .
+        group_by_length (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            When batching a list or dataset of inputs with a Pytorch model, whether or not to preprocess all the inputs
+            first and batch them by decreasing length, to minimize padding. The outputs are returned in the order of
+            the inputs once they have all been computed, and the padding and throughput of the run are logged and
+            stored in the :obj:`batching_stats` attribute of the pipeline.
         args_parser (:class:`~transformers.pipelines.ArgumentHandler`, `optional`):
             Reference to the object in charge of parsing supplied pipeline parameters.
         device (:obj:`int`, `optional`, defaults to -1):
@@ -852,6 +871,7 @@ class Pipeline(_ScikitCompat):
             self.model.config.update(task_specific_params.get(task))
 
         self.call_count = 0
+        self.batching_stats = None
         self._preprocess_params, self._forward_params, self._postprocess_params = self._sanitize_parameters(**kwargs)
 
     def save_pretrained(self, save_directory: str):
@@ -1033,19 +1053,75 @@ class Pipeline(_ScikitCompat):
         return model_outputs
 
     def get_iterator(
-        self, inputs, num_workers: int, batch_size: int, preprocess_params, forward_params, postprocess_params
+        self,
+        inputs,
+        num_workers: int,
+        batch_size: int,
+        preprocess_params,
+        forward_params,
+        postprocess_params,
+        group_by_length: bool = False,
     ):
         if "TOKENIZERS_PARALLELISM" not in os.environ:
             logger.info("Disabling tokenizer parallelism, we're using DataLoader multithreading already")
             os.environ["TOKENIZERS_PARALLELISM"] = "false"
         dataset = PipelineDataset(inputs, self.preprocess, preprocess_params)
+        if group_by_length and batch_size > 1:
+            return self.get_length_grouped_iterator(
+                dataset, num_workers, batch_size, forward_params, postprocess_params
+            )
         collate_fn = no_collate_fn if batch_size == 1 else pad_collate_fn(self.tokenizer, self.feature_extractor)
         dataloader = DataLoader(dataset, num_workers=num_workers, batch_size=batch_size, collate_fn=collate_fn)
         model_iterator = PipelineIterator(dataloader, self.forward, forward_params, loader_batch_size=batch_size)
         final_iterator = PipelineIterator(model_iterator, self.postprocess, postprocess_params)
         return final_iterator
 
-    def __call__(self, inputs, *args, num_workers=0, batch_size=1, **kwargs):
+    def get_length_grouped_iterator(
+        self, dataset: "Dataset", num_workers: int, batch_size: int, forward_params, postprocess_params
+    ):
+        """
+        Preprocesses all the items of :obj:`dataset`, runs them in batches of :obj:`batch_size` items sorted by
+        decreasing length, with the longest batch first so that an OOM happens sooner rather than later, and returns an
+        iterator over the outputs in the order of :obj:`dataset`. The padding and throughput of the run are logged and
+        stored in :obj:`batching_stats`.
+        """
+        start_time = time.time()
+        loader = DataLoader(dataset, num_workers=num_workers, batch_size=1, collate_fn=no_collate_fn)
+        processed = [item for item in loader]
+        lengths = [_input_length(item) for item in processed]
+        order = sorted(range(len(processed)), key=lambda i: lengths[i], reverse=True)
+
+        collate_fn = pad_collate_fn(self.tokenizer, self.feature_extractor)
+        dataloader = DataLoader([processed[i] for i in order], batch_size=batch_size, collate_fn=collate_fn)
+        model_iterator = PipelineIterator(dataloader, self.forward, forward_params, loader_batch_size=batch_size)
+        final_iterator = PipelineIterator(model_iterator, self.postprocess, postprocess_params)
+        outputs = [None] * len(processed)
+        for i, output in zip(order, final_iterator):
+            outputs[i] = output
+        run_time = time.time() - start_time
+
+        num_tokens = sum(lengths)
+        num_padded_tokens = _num_padded_tokens([lengths[i] for i in order], batch_size)
+        num_padded_tokens_without_grouping = _num_padded_tokens(lengths, batch_size)
+        self.batching_stats = {
+            "num_inputs": len(processed),
+            "num_batches": len(dataloader),
+            "padding_ratio": 1 - num_tokens / num_padded_tokens if num_padded_tokens > 0 else 0.0,
+            "padding_ratio_without_grouping": (
+                1 - num_tokens / num_padded_tokens_without_grouping if num_padded_tokens_without_grouping > 0 else 0.0
+            ),
+            "run_time": run_time,
+            "inputs_per_second": len(processed) / run_time if run_time > 0 else float("inf"),
+        }
+        logger.info(
+            f"Ran {len(processed)} inputs grouped by length in {len(dataloader)} batches in {run_time:.2f}s "
+            f"({self.batching_stats['inputs_per_second']:.1f} inputs/s). "
+            f"{self.batching_stats['padding_ratio']:.1%} of the batched tokens are padding "
+            f"({self.batching_stats['padding_ratio_without_grouping']:.1%} without grouping by length)."
+        )
+        return iter(outputs)
+
+    def __call__(self, inputs, *args, num_workers=0, batch_size=1, group_by_length=False, **kwargs):
         if args:
             logger.warning(f"Ignoring args : {args}")
         preprocess_params, forward_params, postprocess_params = self._sanitize_parameters(**kwargs)
@@ -1064,7 +1140,13 @@ class Pipeline(_ScikitCompat):
         if isinstance(inputs, list):
             if self.framework == "pt":
                 final_iterator = self.get_iterator(
-                    inputs, num_workers, batch_size, preprocess_params, forward_params, postprocess_params
+                    inputs,
+                    num_workers,
+                    batch_size,
+                    preprocess_params,
+                    forward_params,
+                    postprocess_params,
+                    group_by_length=group_by_length,
                 )
                 outputs = [output for output in final_iterator]
                 return outputs
@@ -1072,7 +1154,13 @@ class Pipeline(_ScikitCompat):
                 return self.run_multi(inputs, preprocess_params, forward_params, postprocess_params)
         elif Dataset is not None and isinstance(inputs, Dataset):
             return self.get_iterator(
-                inputs, num_workers, batch_size, preprocess_params, forward_params, postprocess_params
+                inputs,
+                num_workers,
+                batch_size,
+                preprocess_params,
+                forward_params,
+                postprocess_params,
+                group_by_length=group_by_length,
             )
         else:
             return self.run_single(inputs, preprocess_params, forward_params, postprocess_params)
@@ -4,6 +4,7 @@ from ..file_utils import add_end_docstrings, is_tf_available, is_torch_available
 from ..tokenization_utils import TruncationStrategy
 from ..utils import logging
 from .base import PIPELINE_INIT_ARGS, Pipeline
+from .text_generation import _stream_generated_text
 
 
 if is_tf_available():
@@ -138,6 +139,24 @@ class Text2TextGenerationPipeline(Pipeline):
             return [result]
         return result
 
+    def stream(self, text_inputs: str, timeout=None, **kwargs):
+        """
+        Generate the output text, yielding it as soon as each token is generated. Only supported for PyTorch models,
+        a single input text, and greedy search, sampling or beam search.
+
+        Args:
+            text_inputs (:obj:`str`):
+                Input text for the encoder.
+            timeout (:obj:`float`, `optional`):
+                Maximum number of seconds to wait for the next piece of text.
+            kwargs:
+                Same keyword arguments as :meth:`~transformers.Text2TextGenerationPipeline.__call__`.
+
+        Return:
+            A generator of :obj:`str`: The pieces of the generated text.
+        """
+        return _stream_generated_text(self, text_inputs, timeout=timeout, **kwargs)
+
     def preprocess(self, inputs, truncation=TruncationStrategy.DO_NOT_TRUNCATE, **kwargs):
         inputs = self._parse_and_tokenize(inputs, truncation=truncation, **kwargs)
         return inputs
@@ -1,8 +1,10 @@
 import enum
+from threading import Thread
 
 from transformers import MODEL_FOR_CAUSAL_LM_MAPPING, TF_MODEL_FOR_CAUSAL_LM_MAPPING
 
 from ..file_utils import add_end_docstrings
+from ..generation_streamers import TextIteratorStreamer
 from .base import PIPELINE_INIT_ARGS, Pipeline
 
 
@@ -12,6 +14,34 @@ class ReturnType(enum.Enum):
     FULL_TEXT = 2
 
 
+def _stream_generated_text(pipeline, inputs, timeout=None, **kwargs):
+    """
+    Runs :obj:`pipeline` on :obj:`inputs` in a background thread and yields the generated text as it is produced.
+    """
+    if pipeline.framework != "pt":
+        raise ValueError("Streaming generation is only supported with PyTorch models.")
+    if not isinstance(inputs, str):
+        raise ValueError(f"Streaming generation only supports a single string input, got {type(inputs)}.")
+
+    streamer = TextIteratorStreamer(pipeline.tokenizer, skip_prompt=True, timeout=timeout, skip_special_tokens=True)
+    errors = []
+
+    def generate():
+        try:
+            pipeline(inputs, streamer=streamer, **kwargs)
+        except Exception as e:
+            errors.append(e)
+            # unblock the consumer, the error is raised once the thread is joined
+            streamer.end()
+
+    thread = Thread(target=generate)
+    thread.start()
+    yield from streamer
+    thread.join()
+    if len(errors) > 0:
+        raise errors[0]
+
+
 @add_end_docstrings(PIPELINE_INIT_ARGS)
 class TextGenerationPipeline(Pipeline):
     """
@@ -170,6 +200,25 @@ class TextGenerationPipeline(Pipeline):
         """
         return super().__call__(text_inputs, **kwargs)
 
+    def stream(self, text_inputs: str, timeout=None, **kwargs):
+        """
+        Complete the prompt, yielding the new text as soon as each token is generated. Only supported for PyTorch
+        models, a single prompt, and greedy search, sampling or beam search.
+
+        Args:
+            text_inputs (:obj:`str`):
+                The prompt to complete.
+            timeout (:obj:`float`, `optional`):
+                Maximum number of seconds to wait for the next piece of text.
+            kwargs:
+                Same keyword arguments as :meth:`~transformers.TextGenerationPipeline.__call__`.
+
+        Return:
+            A generator of :obj:`str`: The pieces of the generated text. Joined, they equal the ``generated_text``
+            returned with ``return_full_text=False``, up to tokenization space clean up.
+        """
+        return _stream_generated_text(self, text_inputs, timeout=timeout, **kwargs)
+
     def preprocess(self, prompt_text, prefix="", handle_long_generation=None, **generate_kwargs):
         inputs = self.tokenizer(
             prefix + prompt_text, padding=False, add_special_tokens=False, return_tensors=self.framework
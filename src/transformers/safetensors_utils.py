@@ -0,0 +1,184 @@
+# coding=utf-8
+# Copyright 2021 The HuggingFace Inc. team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Reading and writing of pickle-free tensor files, in the layout of the `safetensors` format:
+
+- 8 bytes: the size :obj:`N` of the header, as a little-endian unsigned 64-bit integer,
+- :obj:`N` bytes: a JSON header mapping each tensor name to its :obj:`dtype`, :obj:`shape` and :obj:`data_offsets`
+  (begin and end in the data buffer), with optional string metadata under :obj:`"__metadata__"`. It is padded with
+  spaces so that the data buffer starts on an 8-byte boundary,
+- the data buffer: the raw little-endian bytes of each tensor, one after the other.
+
+Tensors are written by decreasing item size, so each of them is aligned on its own item size in the file. This lets
+:func:`load_file` return views of a memory map of the file instead of copies: loading is almost free, the weights
+live in the page cache and are shared between all the processes reading the same file.
+"""
+
+import json
+import struct
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from .file_utils import is_torch_available
+
+
+if is_torch_available():
+    import torch
+
+
+# BF16 has no numpy equivalent, its bytes are read as int16 and reinterpreted by the framework.
+_DTYPE_TO_NUMPY = {
+    "F64": np.float64,
+    "F32": np.float32,
+    "F16": np.float16,
+    "BF16": np.int16,
+    "I64": np.int64,
+    "I32": np.int32,
+    "I16": np.int16,
+    "I8": np.int8,
+    "U8": np.uint8,
+    "BOOL": np.bool_,
+}
+_NUMPY_TO_DTYPE = {np.dtype(v): k for k, v in _DTYPE_TO_NUMPY.items() if k != "BF16"}
+_HEADER_ALIGNMENT = 8
+
+
+def _to_numpy(tensor):
+    """
+    Returns the little-endian bytes of :obj:`tensor` as a numpy array, together with its dtype name in the header.
+    """
+    if is_torch_available() and isinstance(tensor, torch.Tensor):
+        tensor = tensor.detach().cpu().contiguous()
+        if tensor.dtype == torch.bfloat16:
+            return tensor.view(torch.int16).numpy(), "BF16"
+        tensor = tensor.numpy()
+    # `np.ascontiguousarray` would turn scalars into arrays of shape (1,)
+    array = np.asarray(tensor)
+    if not array.flags.c_contiguous:
+        array = array.copy()
+    if array.dtype.byteorder == ">":
+        array = array.astype(array.dtype.newbyteorder("<"))
+    dtype = _NUMPY_TO_DTYPE.get(array.dtype.newbyteorder("="))
+    if dtype is None:
+        raise ValueError(f"Tensors of dtype {array.dtype} can't be saved.")
+    return array, dtype
+
+
+def save_file(
+    tensors: Dict[str, Union[np.ndarray, "torch.Tensor"]], filename: str, metadata: Optional[Dict[str, str]] = None
+):
+    """
+    Saves a dictionary of tensors in :obj:`filename`.
+
+    Args:
+        tensors (:obj:`Dict[str, Union[np.ndarray, torch.Tensor]]`):
+            The tensors to save, by name.
+        filename (:obj:`str`):
+            The file to write.
+        metadata (:obj:`Dict[str, str]`, `optional`):
+            Text metadata saved in the header of the file.
+    """
+    arrays = {name: _to_numpy(tensor) for name, tensor in tensors.items()}
+    # Biggest items first in the data buffer: every tensor then starts at a multiple of its item size. The header keeps
+    # the order of `tensors`, which is the order `load_file` returns them in.
+    names = sorted(arrays, key=lambda name: (-arrays[name][0].itemsize, name))
+    data_offsets = {}
+    offset = 0
+    for name in names:
+        data_offsets[name] = [offset, offset + arrays[name][0].nbytes]
+        offset += arrays[name][0].nbytes
+
+    header = {}
+    if metadata is not None:
+        header["__metadata__"] = {str(k): str(v) for k, v in metadata.items()}
+    for name, (array, dtype) in arrays.items():
+        header[name] = {"dtype": dtype, "shape": list(array.shape), "data_offsets": data_offsets[name]}
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    header_bytes += b" " * (-len(header_bytes) % _HEADER_ALIGNMENT)
+    with open(filename, "wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name in names:
+            array = arrays[name][0]
+            if array.nbytes > 0:
+                f.write(memoryview(array.reshape(-1)).cast("B"))
+
+
+def _read_header(filename: str):
+    with open(filename, "rb") as f:
+        header_size_bytes = f.read(8)
+        if len(header_size_bytes) != 8:
+            raise ValueError(f"{filename} is not a valid tensor file: it is too small to contain a header.")
+        (header_size,) = struct.unpack("<Q", header_size_bytes)
+        header_bytes = f.read(header_size)
+    if len(header_bytes) != header_size:
+        raise ValueError(f"{filename} is not a valid tensor file: its header is truncated.")
+    try:
+        header = json.loads(header_bytes)
+    except ValueError:
+        raise ValueError(f"{filename} is not a valid tensor file: its header can't be decoded.")
+    return header, 8 + header_size
+
+
+def read_header(filename: str) -> Dict:
+    """
+    Reads the header of the tensor file :obj:`filename`, without reading the tensors.
+
+    Returns:
+        :obj:`Dict`: The :obj:`dtype`, :obj:`shape` and :obj:`data_offsets` of each tensor by name, and the text
+        metadata under :obj:`"__metadata__"` if there is some.
+    """
+    return _read_header(filename)[0]
+
+
+def load_file(filename: str, return_tensors: str = "pt") -> Dict:
+    """
+    Loads the tensors of :obj:`filename` as views of a memory map of the file.
+
+    The map is copy-on-write: the tensors can be modified in place without changing the file, and only the modified
+    pages then stop being shared with the other processes using the file.
+
+    Args:
+        filename (:obj:`str`):
+            The file to load.
+        return_tensors (:obj:`str`, `optional`, defaults to :obj:`"pt"`):
+            :obj:`"pt"` to return PyTorch tensors or :obj:`"np"` to return numpy arrays (tensors saved as BF16 are
+            then returned as their int16 bytes).
+
+    Returns:
+        :obj:`Dict`: The tensors by name.
+    """
+    if return_tensors not in ["pt", "np"]:
+        raise ValueError(f"`return_tensors` should be 'pt' or 'np', got {return_tensors}.")
+
+    header, data_start = _read_header(filename)
+    header.pop("__metadata__", None)
+    buffer = np.memmap(filename, dtype=np.uint8, mode="c") if len(header) > 0 else None
+
+    tensors = {}
+    for name, info in header.items():
+        if info["dtype"] not in _DTYPE_TO_NUMPY:
+            raise ValueError(f"Tensor {name} of {filename} has the unsupported dtype {info['dtype']}.")
+        begin, end = info["data_offsets"]
+        array = buffer[data_start + begin : data_start + end].view(_DTYPE_TO_NUMPY[info["dtype"]])
+        array = array.reshape(info["shape"])
+        if return_tensors == "pt":
+            tensor = torch.from_numpy(array)
+            tensors[name] = tensor.view(torch.bfloat16) if info["dtype"] == "BF16" else tensor
+        else:
+            tensors[name] = array
+    return tensors
@@ -18,8 +18,12 @@
 """
 import bisect
 import itertools
+import math
+import multiprocessing
 import re
+import threading
 import unicodedata
+import weakref
 from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple, Union, overload
 
@@ -49,6 +53,11 @@ SPECIAL_TOKENS_MAP_FILE = "special_tokens_map.json"
 ADDED_TOKENS_FILE = "added_tokens.json"
 TOKENIZER_CONFIG_FILE = "tokenizer_config.json"
 
+# Process pools used to encode batches with `num_proc`, by tokenizer id. Each worker receives a copy of the tokenizer
+# once, when the pool starts.
+_encode_pools = {}
+_worker_tokenizer = None
+
 
 class Trie:
     """
@@ -254,6 +263,142 @@ class Trie:
         return tokens
 
 
+class BPECache:
+    """
+    Least-recently-used cache of the BPE merges of the words seen by a tokenizer (used by :obj:`GPT2Tokenizer` and
+    the tokenizers copied from it). Once it holds :obj:`max_size` words, adding a new one evicts the word that was
+    looked up least recently. The number of lookups answered by the cache (:obj:`hits`) or not (:obj:`misses`) are
+    counted.
+
+    Args:
+        max_size (:obj:`int`, `optional`):
+            The maximum number of words kept in the cache. :obj:`None` means the cache is unbounded and :obj:`0`
+            disables caching.
+    """
+
+    # Caches shared by several tokenizers, freed once no tokenizer uses them
+    _shared_caches = weakref.WeakValueDictionary()
+    _shared_caches_lock = threading.Lock()
+
+    def __init__(self, max_size: Optional[int] = None):
+        if max_size is not None and max_size < 0:
+            raise ValueError(f"`max_size` has to be a non-negative integer or `None`, but is {max_size}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, key: Any, max_size: Optional[int] = None) -> "BPECache":
+        """
+        Returns the cache shared by all the callers using the same :obj:`key`, creating it with :obj:`max_size` if it
+        does not exist yet (the size of an existing cache is left untouched).
+
+        Tokenizers use their class name and the path of their merges file as :obj:`key`, so that instances loaded
+        from the same files share their cache.
+        """
+        with cls._shared_caches_lock:
+            cache = cls._shared_caches.get(key)
+            if cache is None:
+                cache = cls(max_size=max_size)
+                cls._shared_caches[key] = cache
+            return cache
+
+    def get(self, token: str) -> Optional[str]:
+        """
+        Returns the cached BPE merges of :obj:`token` or :obj:`None` if :obj:`token` is not in the cache.
+        """
+        # Lookups don't take the lock: each operation on the OrderedDict is atomic, and the counters are only stats
+        word = self._data.get(token)
+        if word is None:
+            self.misses += 1
+            return None
+        try:
+            self._data.move_to_end(token)
+        except KeyError:
+            # evicted by another thread in the meantime
+            pass
+        self.hits += 1
+        return word
+
+    def __setitem__(self, token: str, word: str):
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._data[token] = word
+            self._data.move_to_end(token)
+            if self.max_size is not None and len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __getitem__(self, token: str) -> str:
+        return self._data[token]
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def most_recent(self, num_tokens: Optional[int] = None) -> List[str]:
+        """
+        Returns the :obj:`num_tokens` most recently looked up words of the cache (all of them if :obj:`None`), most
+        recent first. This is a good approximation of the most frequent words, to save as a warm start (see
+        :meth:`warm_start`).
+        """
+        with self._lock:
+            tokens = list(reversed(self._data.keys()))
+        return tokens if num_tokens is None else tokens[:num_tokens]
+
+    def warm_start(self, tokens: List[str], bpe):
+        """
+        Fills an empty cache with the BPE merges of :obj:`tokens` computed with the function :obj:`bpe`. The words
+        are expected to be sorted by decreasing frequency: only the first :obj:`max_size` ones are added, and the
+        most frequent ones are evicted last. Does nothing if the cache is not empty, which is the case for a shared
+        cache that another tokenizer already filled.
+        """
+        if len(self._data) > 0:
+            return
+        if self.max_size is not None:
+            tokens = tokens[: self.max_size]
+        for token in reversed(tokens):
+            self[token] = bpe(token)
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def _init_encode_worker(tokenizer):
+    global _worker_tokenizer
+    _worker_tokenizer = tokenizer
+
+
+def _encode_worker(batch_text_or_text_pairs, is_split_into_words, kwargs):
+    return _worker_tokenizer._batch_get_input_ids(
+        batch_text_or_text_pairs, is_split_into_words=is_split_into_words, **kwargs
+    )
+
+
+def _close_encode_pool(tokenizer_id):
+    pool_state = _encode_pools.pop(tokenizer_id, None)
+    if pool_state is not None:
+        pool_state[1].terminate()
+
+
 def _is_whitespace(char):
     """Checks whether `char` is a whitespace character."""
     # \t, \n, and \r are technically control characters but we treat them
@@ -330,6 +475,10 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
 
     This class also contain the added tokens in a unified way on top of all tokenizers so we don't have to handle the
     specific vocabulary augmentation methods of the various underlying dictionary structures (BPE, sentencepiece...).
+
+    Large batches can be tokenized in several processes by passing :obj:`num_proc` when encoding them (e.g.
+    :obj:`tokenizer(texts, num_proc=4)`). The processes are started on the first such call, each with a copy of the
+    tokenizer, and reused by the next ones until tokens are added to the tokenizer.
     """
 
     def __init__(self, **kwargs):
@@ -676,8 +825,67 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         return_offsets_mapping: bool = False,
         return_length: bool = False,
         verbose: bool = True,
+        num_proc: Optional[int] = None,
         **kwargs
     ) -> BatchEncoding:
+        if return_offsets_mapping:
+            raise NotImplementedError(
+                "return_offset_mapping is not available when using Python tokenizers. "
+                "To use this feature, change your tokenizer to one deriving from "
+                "transformers.PreTrainedTokenizerFast."
+            )
+
+        if num_proc is not None and num_proc > 1 and len(batch_text_or_text_pairs) > 1:
+            # Contiguous shards, several per process to balance the load, so that the order of the batch is kept
+            num_shards = min(4 * num_proc, len(batch_text_or_text_pairs))
+            shard_size = math.ceil(len(batch_text_or_text_pairs) / num_shards)
+            shards = [
+                (batch_text_or_text_pairs[i : i + shard_size], is_split_into_words, kwargs)
+                for i in range(0, len(batch_text_or_text_pairs), shard_size)
+            ]
+            input_ids = list(itertools.chain(*self._get_encode_pool(num_proc).starmap(_encode_worker, shards)))
+        else:
+            input_ids = self._batch_get_input_ids(
+                batch_text_or_text_pairs, is_split_into_words=is_split_into_words, **kwargs
+            )
+
+        batch_outputs = self._batch_prepare_for_model(
+            input_ids,
+            add_special_tokens=add_special_tokens,
+            padding_strategy=padding_strategy,
+            truncation_strategy=truncation_strategy,
+            max_length=max_length,
+            stride=stride,
+            pad_to_multiple_of=pad_to_multiple_of,
+            return_attention_mask=return_attention_mask,
+            return_token_type_ids=return_token_type_ids,
+            return_overflowing_tokens=return_overflowing_tokens,
+            return_special_tokens_mask=return_special_tokens_mask,
+            return_length=return_length,
+            return_tensors=return_tensors,
+            verbose=verbose,
+        )
+
+        return BatchEncoding(batch_outputs)
+
+    def _batch_get_input_ids(
+        self,
+        batch_text_or_text_pairs: Union[
+            List[TextInput],
+            List[TextInputPair],
+            List[PreTokenizedInput],
+            List[PreTokenizedInputPair],
+            List[EncodedInput],
+            List[EncodedInputPair],
+        ],
+        is_split_into_words: bool = False,
+        **kwargs
+    ) -> List[Tuple[List[int], Optional[List[int]]]]:
+        """
+        Tokenizes and converts to ids each sequence or pair of sequences of a batch (the part of
+        :meth:`_batch_encode_plus` run in several processes with :obj:`num_proc`).
+        """
+
         def get_input_ids(text):
             if isinstance(text, str):
                 tokens = self.tokenize(text, **kwargs)
@@ -697,13 +905,6 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
                     "Input is not valid. Should be a string, a list/tuple of strings or a list/tuple of integers."
                 )
 
-        if return_offsets_mapping:
-            raise NotImplementedError(
-                "return_offset_mapping is not available when using Python tokenizers. "
-                "To use this feature, change your tokenizer to one deriving from "
-                "transformers.PreTrainedTokenizerFast."
-            )
-
         input_ids = []
         for ids_or_pair_ids in batch_text_or_text_pairs:
             if not isinstance(ids_or_pair_ids, (list, tuple)):
@@ -717,24 +918,26 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
             second_ids = get_input_ids(pair_ids) if pair_ids is not None else None
             input_ids.append((first_ids, second_ids))
 
-        batch_outputs = self._batch_prepare_for_model(
-            input_ids,
-            add_special_tokens=add_special_tokens,
-            padding_strategy=padding_strategy,
-            truncation_strategy=truncation_strategy,
-            max_length=max_length,
-            stride=stride,
-            pad_to_multiple_of=pad_to_multiple_of,
-            return_attention_mask=return_attention_mask,
-            return_token_type_ids=return_token_type_ids,
-            return_overflowing_tokens=return_overflowing_tokens,
-            return_special_tokens_mask=return_special_tokens_mask,
-            return_length=return_length,
-            return_tensors=return_tensors,
-            verbose=verbose,
-        )
+        return input_ids
 
-        return BatchEncoding(batch_outputs)
+    def _get_encode_pool(self, num_proc: int) -> "multiprocessing.pool.Pool":
+        """
+        Returns the pool of :obj:`num_proc` processes encoding the batches of this tokenizer, (re)starting it if it
+        doesn't exist yet, has another number of processes or if tokens were added since it started.
+        """
+        pool_key = (num_proc, len(self), tuple(self.unique_no_split_tokens))
+        pool_state = _encode_pools.get(id(self))
+        if pool_state is not None and pool_state[0] == pool_key:
+            return pool_state[1]
+
+        if pool_state is not None:
+            pool_state[1].terminate()
+        else:
+            # Stops the processes when the tokenizer is deleted
+            weakref.finalize(self, _close_encode_pool, id(self))
+        pool = multiprocessing.Pool(num_proc, initializer=_init_encode_worker, initargs=(self,))
+        _encode_pools[id(self)] = (pool_key, pool)
+        return pool
 
     @add_end_docstrings(ENCODE_KWARGS_DOCSTRING, ENCODE_PLUS_ADDITIONAL_KWARGS_DOCSTRING)
     def _batch_prepare_for_model(
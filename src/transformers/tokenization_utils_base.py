@@ -45,7 +45,7 @@ from .file_utils import (
     _is_torch,
     _is_torch_device,
     add_end_docstrings,
-    cached_path,
+    cached_paths,
     copy_func,
     get_list_of_files,
     hf_bucket_url,
@@ -1684,34 +1684,31 @@ class PreTrainedTokenizerBase(SpecialTokensMixin, PushToHubMixin):
         # Get files from url, cache, or disk depending on the case
         resolved_vocab_files = {}
         unresolved_files = []
-        for file_id, file_path in vocab_files.items():
-            if file_path is None:
+        # Download the files that are not available locally concurrently
+        remote_files = {file_id: file_path for file_id, file_path in vocab_files.items() if file_path is not None}
+        cached_files = cached_paths(
+            remote_files.values(),
+            return_exceptions=True,
+            cache_dir=cache_dir,
+            force_download=force_download,
+            proxies=proxies,
+            resume_download=resume_download,
+            local_files_only=local_files_only,
+            use_auth_token=use_auth_token,
+            user_agent=user_agent,
+        )
+        cached_files = dict(zip(remote_files.keys(), cached_files))
+        for file_id in vocab_files.keys():
+            resolved_file = cached_files.get(file_id)
+            if isinstance(resolved_file, FileNotFoundError) and local_files_only:
+                unresolved_files.append(file_id)
+            elif isinstance(resolved_file, requests.exceptions.HTTPError) and "404 Client Error" in str(resolved_file):
+                logger.debug(resolved_file)
                 resolved_vocab_files[file_id] = None
+            elif isinstance(resolved_file, Exception):
+                raise resolved_file
             else:
-                try:
-                    resolved_vocab_files[file_id] = cached_path(
-                        file_path,
-                        cache_dir=cache_dir,
-                        force_download=force_download,
-                        proxies=proxies,
-                        resume_download=resume_download,
-                        local_files_only=local_files_only,
-                        use_auth_token=use_auth_token,
-                        user_agent=user_agent,
-                    )
-
-                except FileNotFoundError as error:
-                    if local_files_only:
-                        unresolved_files.append(file_id)
-                    else:
-                        raise error
-
-                except requests.exceptions.HTTPError as err:
-                    if "404 Client Error" in str(err):
-                        logger.debug(err)
-                        resolved_vocab_files[file_id] = None
-                    else:
-                        raise err
+                resolved_vocab_files[file_id] = resolved_file
 
         if len(unresolved_files) > 0:
             logger.info(
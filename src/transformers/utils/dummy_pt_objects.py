@@ -67,6 +67,16 @@ class BeamSearchScorer:
         requires_backends(self, ["torch"])
 
 
+class ContinuousBatchingScheduler:
+    def __init__(self, *args, **kwargs):
+        requires_backends(self, ["torch"])
+
+
+class GenerationRequest:
+    def __init__(self, *args, **kwargs):
+        requires_backends(self, ["torch"])
+
+
 class ForcedBOSTokenLogitsProcessor:
     def __init__(self, *args, **kwargs):
         requires_backends(self, ["torch"])
@@ -186,6 +196,16 @@ class TopPLogitsWarper:
         requires_backends(self, ["torch"])
 
 
+class StaticCache:
+    def __init__(self, *args, **kwargs):
+        requires_backends(self, ["torch"])
+
+
+class StaticCacheLayer:
+    def __init__(self, *args, **kwargs):
+        requires_backends(self, ["torch"])
+
+
 class MaxLengthCriteria:
     def __init__(self, *args, **kwargs):
         requires_backends(self, ["torch"])
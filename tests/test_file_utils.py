@@ -13,9 +13,18 @@
 # limitations under the License.
 
 import contextlib
+import http.server
 import importlib
 import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
 import unittest
+from hashlib import sha1, sha256
+from unittest.mock import patch
 
 import requests
 import transformers
@@ -26,6 +35,7 @@ from transformers.file_utils import (
     CONFIG_NAME,
     WEIGHTS_NAME,
     ContextManagers,
+    cached_paths,
     filename_to_url,
     get_from_cache,
     hf_bucket_url,
@@ -111,6 +121,178 @@ class GetFromCacheTests(unittest.TestCase):
         self.assertEqual(metadata, (url, f'"{PINNED_SHA256}"'))
 
 
+class _FileServerHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_headers(self):
+        server = self.server
+        server.requests.append((self.command, self.path, self.headers.get("Range")))
+        if self.path not in server.files:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        content, etag = server.files[self.path]
+        start, end = 0, len(content)
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match is not None:
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else len(content)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(content)}")
+        else:
+            self.send_response(200)
+        self.send_header("ETag", f'"{etag}"')
+        self.send_header("Content-Length", str(end - start))
+        self.end_headers()
+        return content[start:end]
+
+    def do_HEAD(self):
+        self._send_headers()
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            body = self._send_headers()
+            if body is None:
+                return
+            time.sleep(server.delay)
+            if (self.path, self.headers.get("Range")) in server.drops:
+                # Close the connection in the middle of the body, once
+                server.drops.remove((self.path, self.headers.get("Range")))
+                self.wfile.write(body[: len(body) // 2])
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+class LocalServerDownloadTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FileServerHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.files = {}
+        self.server.drops = set()
+        self.server.requests = []
+        self.server.delay = 0
+        self.server.active = 0
+        self.server.max_active = 0
+
+    def add_file(self, name, content, etag=None):
+        if etag is None:
+            etag = sha256(content).hexdigest()
+        self.server.files[f"/{name}"] = (content, etag)
+        return f"{self.base_url}/{name}"
+
+    def ranges_requested(self, name):
+        return [r for method, path, r in self.server.requests if method == "GET" and path == f"/{name}"]
+
+    def test_download(self):
+        content = os.urandom(3000)
+        # Regular files on huggingface.co have the sha1 of their git blob as ETag
+        etag = sha1(f"blob {len(content)}\0".encode() + content).hexdigest()
+        url = self.add_file("config.json", content, etag=etag)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(get_from_cache(url, cache_dir=tmp_dir), "rb") as f:
+                self.assertEqual(f.read(), content)
+        self.assertEqual(self.ranges_requested("config.json"), [None])
+
+    @patch("transformers.file_utils.DOWNLOAD_CHUNK_SIZE", 100)
+    def test_download_resumes_after_dropped_connection(self):
+        content = os.urandom(3000)
+        url = self.add_file("vocab.txt", content)
+        self.server.drops.add(("/vocab.txt", None))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(get_from_cache(url, cache_dir=tmp_dir), "rb") as f:
+                self.assertEqual(f.read(), content)
+        self.assertEqual(self.ranges_requested("vocab.txt"), [None, "bytes=1500-"])
+
+    @patch("transformers.file_utils.DOWNLOAD_PART_SIZE", 1024)
+    @patch("transformers.file_utils.DOWNLOAD_CHUNK_SIZE", 128)
+    def test_download_in_parts(self):
+        content = os.urandom(5000)
+        url = self.add_file("pytorch_model.bin", content)
+        self.server.drops.add(("/pytorch_model.bin", "bytes=2048-3071"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(get_from_cache(url, cache_dir=tmp_dir), "rb") as f:
+                self.assertEqual(f.read(), content)
+            self.assertFalse(any(name.endswith((".incomplete", ".parts")) for name in os.listdir(tmp_dir)))
+
+        ranges = self.ranges_requested("pytorch_model.bin")
+        # A range request checks the server supports them, then each part is requested on its own
+        self.assertEqual(ranges[0], "bytes=0-0")
+        expected = ["bytes=0-1023", "bytes=1024-2047", "bytes=2048-3071", "bytes=3072-4095", "bytes=4096-4999"]
+        # Only the second half of the part dropped is requested again
+        self.assertCountEqual(ranges[1:], expected + ["bytes=2560-3071"])
+
+    @patch("transformers.file_utils.DOWNLOAD_PART_SIZE", 1024)
+    @patch("transformers.file_utils.DOWNLOAD_MAX_RETRIES", 0)
+    def test_resume_download_in_parts(self):
+        content = os.urandom(5000)
+        url = self.add_file("pytorch_model.bin", content)
+        self.server.drops.add(("/pytorch_model.bin", "bytes=2048-3071"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(requests.exceptions.RequestException):
+                get_from_cache(url, cache_dir=tmp_dir, resume_download=True)
+            parts_file = [name for name in os.listdir(tmp_dir) if name.endswith(".parts")]
+            self.assertEqual(len(parts_file), 1)
+            with open(os.path.join(tmp_dir, parts_file[0])) as f:
+                done = json.load(f)["done"]
+            self.assertNotIn(2, done)
+
+            self.server.requests = []
+            with open(get_from_cache(url, cache_dir=tmp_dir, resume_download=True), "rb") as f:
+                self.assertEqual(f.read(), content)
+            self.assertFalse(any(name.endswith((".incomplete", ".parts")) for name in os.listdir(tmp_dir)))
+
+        # Only the parts missing are downloaded again
+        expected = {i for i in range(5) if i not in done}
+        ranges = self.ranges_requested("pytorch_model.bin")[1:]
+        self.assertCountEqual(ranges, [f"bytes={i * 1024}-{min(i * 1024 + 1023, 4999)}" for i in expected])
+
+    def test_checksum_mismatch(self):
+        url = self.add_file("pytorch_model.bin", os.urandom(3000), etag=sha256(b"something else").hexdigest())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaisesRegex(EnvironmentError, "does not match its checksum"):
+                get_from_cache(url, cache_dir=tmp_dir)
+            self.assertEqual([name for name in os.listdir(tmp_dir) if not name.endswith(".lock")], [])
+
+    def test_cached_paths(self):
+        contents = [os.urandom(100) for _ in range(4)]
+        urls = [self.add_file(f"file_{i}.txt", content) for i, content in enumerate(contents)]
+        urls.insert(2, f"{self.base_url}/missing.txt")
+        self.server.delay = 0.2
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = cached_paths(urls, return_exceptions=True, cache_dir=tmp_dir)
+            self.assertIsInstance(paths.pop(2), requests.exceptions.HTTPError)
+            for path, content in zip(paths, contents):
+                with open(path, "rb") as f:
+                    self.assertEqual(f.read(), content)
+            with self.assertRaises(requests.exceptions.HTTPError):
+                cached_paths(urls, cache_dir=tmp_dir)
+        self.assertGreater(self.server.max_active, 1)
+
+
 class ContextManagerTests(unittest.TestCase):
     @unittest.mock.patch("sys.stdout", new_callable=io.StringIO)
     def test_no_context(self, mock_stdout):
@@ -76,39 +76,48 @@ class BeamSearchTester:
     def check_beam_hypotheses(self, input_ids, *args):
         # check that correct number of beam hypotheses is set in beam scorer
         beam_scorer = self.prepare_beam_scorer(do_early_stopping=True)
-        beam_hyp = beam_scorer._beam_hyps[0]
+        beam_hyps = beam_scorer._beam_hyps
 
-        self.parent.assertEqual(len(beam_scorer._beam_hyps), self.batch_size)
+        self.parent.assertEqual(beam_hyps.batch_size, self.batch_size)
 
         # check correct type
-        self.parent.assertTrue(isinstance(beam_hyp, BeamHypotheses))
+        self.parent.assertTrue(isinstance(beam_hyps, BeamHypotheses))
 
         # check that num_beams is correctly set
-        self.parent.assertEqual(beam_hyp.num_beams, self.num_beams)
+        self.parent.assertEqual(beam_hyps.num_beams, self.num_beams)
 
         # check for early stopping deactivated
-        for beam_idx in range(self.num_beams):
-            beam_hyp.add(input_ids[beam_idx], -10.0)
+        hyps = input_ids.view(self.batch_size, self.num_beams, -1)
+        beam_hyps.add(hyps, torch.full((self.batch_size, self.num_beams), -10.0, device=torch_device))
 
         # if early stopping True -> score does not matter
-        self.parent.assertTrue(beam_hyp.is_done(-10.0, 5))
+        self.parent.assertTrue(beam_hyps.is_done(torch.full((self.batch_size,), -10.0), 5).all())
 
         # re-init
         beam_scorer = self.prepare_beam_scorer(do_early_stopping=False)
-        beam_hyp = beam_scorer._beam_hyps[0]
-
-        # add `num_beams + 1` beams to change `worst_score`
-        for beam_idx in range(self.num_beams + 1):
-            beam_hyp.add(input_ids[beam_idx], -10.0 + float(beam_idx))
+        beam_hyps = beam_scorer._beam_hyps
+
+        # add `num_beams + 1` beams to the first batch to change its `worst_score`
+        mask = torch.zeros((self.batch_size, self.num_beams + 1), dtype=torch.bool, device=torch_device)
+        mask[0] = True
+        sum_logprobs = -10.0 + torch.arange(self.num_beams + 1, dtype=torch.float, device=torch_device)
+        beam_hyps.add(
+            input_ids[: self.num_beams + 1].unsqueeze(0).expand(self.batch_size, -1, -1),
+            sum_logprobs.unsqueeze(0).expand(self.batch_size, -1),
+            mask,
+        )
+        self.parent.assertListEqual(beam_hyps.num_hyps.tolist(), [self.num_beams] + [0] * (self.batch_size - 1))
 
         # -10.0 is removed => -9.0 is worst score
-        self.parent.assertAlmostEqual(beam_hyp.worst_score, -9.0 / (self.sequence_length ** beam_hyp.length_penalty))
+        self.parent.assertAlmostEqual(
+            beam_hyps.worst_score[0].item(), -9.0 / (self.sequence_length ** beam_hyps.length_penalty)
+        )
 
         # -5.0 is better than worst score => should not be finished
-        self.parent.assertFalse(beam_hyp.is_done(-5.0, self.sequence_length))
+        self.parent.assertFalse(beam_hyps.is_done(torch.full((self.batch_size,), -5.0), self.sequence_length)[0])
 
         # -20.0 is worse than worst score => should be finished
-        self.parent.assertTrue(beam_hyp.is_done(-20.0, self.sequence_length))
+        self.parent.assertTrue(beam_hyps.is_done(torch.full((self.batch_size,), -20.0), self.sequence_length)[0])
 
     def check_beam_scorer_update(self, input_ids, next_tokens, next_indices, next_scores):
         # check too many eos tokens
@@ -163,7 +172,8 @@ class BeamSearchTester:
         for batch_idx in range(self.batch_size):
             correct_idx = batch_idx * self.num_beams + next_indices[batch_idx, 1]
             self.parent.assertListEqual(
-                input_ids[correct_idx].tolist(), beam_scorer._beam_hyps[batch_idx].beams[0][-1].tolist()
+                input_ids[correct_idx].tolist(),
+                beam_scorer._beam_hyps.tokens[batch_idx, 0, : self.sequence_length].tolist(),
             )
 
     def check_beam_scores_finalize(self, input_ids, next_tokens, next_indices, next_scores):
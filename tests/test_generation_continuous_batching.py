@@ -0,0 +1,145 @@
+# coding=utf-8
+# Copyright 2021 The HuggingFace Team Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a clone of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import random
+import unittest
+
+from transformers import is_torch_available
+from transformers.testing_utils import require_torch, torch_device
+
+from .test_modeling_common import ids_tensor
+
+
+if is_torch_available():
+    import torch
+
+    from transformers import (
+        BartConfig,
+        BartForConditionalGeneration,
+        GPT2Config,
+        GPT2LMHeadModel,
+        LogitsProcessorList,
+        MinLengthLogitsProcessor,
+        NoRepeatNGramLogitsProcessor,
+    )
+    from transformers.generation_continuous_batching import ContinuousBatchingScheduler
+
+
+@require_torch
+class ContinuousBatchingSchedulerTest(unittest.TestCase):
+    vocab_size = 99
+
+    def _get_gpt2(self):
+        torch.manual_seed(0)
+        config = GPT2Config(
+            vocab_size=self.vocab_size,
+            n_embd=32,
+            n_layer=2,
+            n_head=4,
+            n_positions=64,
+            bos_token_id=1,
+            eos_token_id=2,
+            pad_token_id=0,
+        )
+        return GPT2LMHeadModel(config).to(torch_device).eval()
+
+    def _get_bart(self):
+        torch.manual_seed(0)
+        config = BartConfig(
+            vocab_size=self.vocab_size,
+            d_model=32,
+            encoder_layers=2,
+            decoder_layers=2,
+            encoder_attention_heads=4,
+            decoder_attention_heads=4,
+            encoder_ffn_dim=32,
+            decoder_ffn_dim=32,
+            max_position_embeddings=64,
+            bos_token_id=0,
+            pad_token_id=1,
+            eos_token_id=2,
+            decoder_start_token_id=2,
+            forced_bos_token_id=None,
+            forced_eos_token_id=None,
+        )
+        return BartForConditionalGeneration(config).to(torch_device).eval()
+
+    def _get_prompts(self, lengths):
+        rng = random.Random(0)
+        # the prompts avoid special tokens so that they are never padded or finished early
+        return [ids_tensor((1, length), self.vocab_size - 3, rng=rng)[0] + 3 for length in lengths]
+
+    def _check_matches_generate(self, model, prompts, max_new_tokens, max_batch_size):
+        scheduler = ContinuousBatchingScheduler(model, max_batch_size=max_batch_size)
+        request_ids = [
+            scheduler.add_request(prompt, max_new_tokens=max_new_tokens[i]) for i, prompt in enumerate(prompts)
+        ]
+
+        outputs = {request.request_id: request.sequences for request in scheduler}
+        self.assertEqual(set(outputs), set(request_ids))
+        self.assertFalse(scheduler.has_unfinished_requests())
+
+        for request_id, prompt, new_tokens in zip(request_ids, prompts, max_new_tokens):
+            max_length = new_tokens + (1 if model.config.is_encoder_decoder else prompt.shape[-1])
+            expected = model.generate(prompt[None], max_length=max_length, min_length=0, num_beams=1, do_sample=False)
+            self.assertListEqual(outputs[request_id].tolist(), expected[0].tolist())
+
+    def test_gpt2_matches_generate(self):
+        model = self._get_gpt2()
+        prompts = self._get_prompts([3, 7, 5, 2, 9])
+        self._check_matches_generate(model, prompts, max_new_tokens=[4, 10, 2, 7, 5], max_batch_size=2)
+
+    def test_bart_matches_generate(self):
+        model = self._get_bart()
+        prompts = self._get_prompts([3, 7, 5, 2])
+        self._check_matches_generate(model, prompts, max_new_tokens=[4, 8, 2, 6], max_batch_size=3)
+
+    def test_slots_are_refilled(self):
+        model = self._get_gpt2()
+        scheduler = ContinuousBatchingScheduler(model, max_batch_size=2)
+        for prompt, new_tokens in zip(self._get_prompts([4, 4, 4]), [1, 6, 3]):
+            scheduler.add_request(prompt, max_new_tokens=new_tokens)
+
+        finished = scheduler.step()
+        self.assertListEqual([request.request_id for request in finished], [0])
+        self.assertEqual(scheduler.num_running_requests, 1)
+        self.assertEqual(scheduler.num_waiting_requests, 1)
+
+        # the freed slot is taken by the waiting request on the next step
+        scheduler.step()
+        self.assertEqual(scheduler.num_running_requests, 2)
+        self.assertEqual(scheduler.num_waiting_requests, 0)
+
+        # requests can be queued while iterating
+        scheduler.add_request(self._get_prompts([2])[0], max_new_tokens=2)
+        self.assertListEqual(sorted(request.request_id for request in scheduler), [1, 2, 3])
+
+    def test_per_request_logits_processor(self):
+        model = self._get_gpt2()
+        prompt = self._get_prompts([5])[0]
+        logits_processor = LogitsProcessorList(
+            [NoRepeatNGramLogitsProcessor(2), MinLengthLogitsProcessor(12, model.config.eos_token_id)]
+        )
+
+        scheduler = ContinuousBatchingScheduler(model, max_batch_size=2)
+        scheduler.add_request(prompt, max_new_tokens=10, logits_processor=logits_processor)
+        scheduler.add_request(prompt, max_new_tokens=10)
+        outputs = {request.request_id: request.sequences.tolist() for request in scheduler}
+
+        expected = model.generate(prompt[None], max_length=15, min_length=12, no_repeat_ngram_size=2)
+        self.assertListEqual(outputs[0], expected[0].tolist())
+        expected = model.generate(prompt[None], max_length=15, min_length=0)
+        self.assertListEqual(outputs[1], expected[0].tolist())
@@ -41,6 +41,7 @@ if is_torch_available():
         TemperatureLogitsWarper,
         TopKLogitsWarper,
         TopPLogitsWarper,
+        _calc_banned_ngram_tokens,
     )
 
 
@@ -212,6 +213,27 @@ class LogitsProcessorTest(unittest.TestCase):
             torch.isinf(filtered_scores_3_gram).tolist(), [[False, False, False], [True, False, False]]
         )
 
+    def test_no_repeat_ngram_matches_python_implementation(self):
+        vocab_size = 5
+        num_hypos = 8
+
+        for ngram_size in [1, 2, 3, 4]:
+            no_repeat_proc = NoRepeatNGramLogitsProcessor(ngram_size)
+            for cur_len in [1, ngram_size - 1, ngram_size, 20]:
+                if cur_len < 1:
+                    continue
+                input_ids = ids_tensor((num_hypos, cur_len), vocab_size)
+                scores = self._get_uniform_logits(num_hypos, vocab_size)
+
+                filtered_scores = no_repeat_proc(input_ids, scores.clone())
+
+                banned_tokens = _calc_banned_ngram_tokens(ngram_size, input_ids, num_hypos, cur_len)
+                for hypo_idx, hypo_banned_tokens in enumerate(banned_tokens):
+                    self.assertSetEqual(
+                        set(torch.isinf(filtered_scores[hypo_idx]).nonzero().view(-1).tolist()),
+                        set(hypo_banned_tokens),
+                    )
+
     def test_encoder_no_repeat_ngram_dist_processor(self):
         vocab_size = 3
         num_beams = 2
@@ -299,6 +321,30 @@ class LogitsProcessorTest(unittest.TestCase):
         filtered_scores = no_bad_words_dist_proc(input_ids, scores.clone())
         self.assertTrue(torch.allclose(scores, filtered_scores, atol=1e-3))
 
+    def test_no_bad_words_multi_token_words(self):
+        vocab_size = 4
+        num_hypos = 16
+        eos_token_id = 3
+
+        input_ids = ids_tensor((num_hypos, 6), vocab_size)
+        bad_word_tokens = [[0, 1], [1, 1], [2, 0, 2], [0, 0, 1, 1], [1, 2, 0, 1, 2, 0, 1, 2], [2, 5]]
+        scores = self._get_uniform_logits(num_hypos, vocab_size)
+
+        no_bad_words_dist_proc = NoBadWordsLogitsProcessor(bad_words_ids=bad_word_tokens, eos_token_id=eos_token_id)
+        filtered_scores = no_bad_words_dist_proc(input_ids, scores.clone())
+
+        for hypo_idx, hypo_input_ids in enumerate(input_ids.tolist()):
+            # the last token of a bad word is banned if the hypothesis ends with its other tokens; words longer than
+            # the hypothesis and out-of-vocabulary tokens are ignored
+            expected = {
+                bad_word[-1]
+                for bad_word in bad_word_tokens
+                if bad_word[-1] < vocab_size
+                and len(bad_word) - 1 <= len(hypo_input_ids)
+                and hypo_input_ids[len(hypo_input_ids) - len(bad_word) + 1 :] == bad_word[:-1]
+            }
+            self.assertSetEqual(set(torch.isinf(filtered_scores[hypo_idx]).nonzero().view(-1).tolist()), expected)
+
     def test_processor_list(self):
         batch_size = 4
         sequence_length = 10
@@ -0,0 +1,99 @@
+# coding=utf-8
+# Copyright 2021 The HuggingFace Team Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a clone of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from transformers import is_torch_available
+from transformers.testing_utils import require_torch, torch_device
+
+from .test_modeling_common import ids_tensor
+
+
+if is_torch_available():
+    import torch
+
+    from transformers import BartConfig, BartForConditionalGeneration, GPT2Config, GPT2LMHeadModel, StaticCache
+
+
+@require_torch
+class StaticCacheTest(unittest.TestCase):
+    def _get_model(self):
+        torch.manual_seed(0)
+        config = GPT2Config(vocab_size=99, n_embd=32, n_layer=2, n_head=4, n_positions=64)
+        return GPT2LMHeadModel(config).to(torch_device).eval()
+
+    def test_forward_matches_dynamic_cache(self):
+        model = self._get_model()
+        input_ids = ids_tensor((2, 7), 99)
+        cache = StaticCache(model.config, batch_size=2, max_length=10, device=torch_device)
+        key_ptr = cache[0].key_cache.data_ptr()
+        self.assertFalse(cache)
+
+        with torch.no_grad():
+            outputs = model(input_ids[:, :5], use_cache=True)
+            static_outputs = model(input_ids[:, :5], past_key_values=cache, use_cache=True)
+            self.assertIs(static_outputs.past_key_values, cache)
+            self.assertEqual(cache.get_seq_length(), 5)
+
+            for i in range(5, 7):
+                outputs = model(input_ids[:, i : i + 1], past_key_values=outputs.past_key_values, use_cache=True)
+                static_outputs = model(input_ids[:, i : i + 1], past_key_values=cache, use_cache=True)
+                self.assertTrue(torch.allclose(outputs.logits, static_outputs.logits, atol=1e-5))
+
+        # the keys and values were written in the preallocated buffers
+        self.assertEqual(cache[0].key_cache.data_ptr(), key_ptr)
+        self.assertTrue(torch.allclose(cache[1][0], outputs.past_key_values[1][0]))
+        self.assertTrue(torch.allclose(cache[1][1], outputs.past_key_values[1][1]))
+
+    def test_reorder_cache(self):
+        model = self._get_model()
+        cache = StaticCache(model.config, batch_size=3, max_length=10, device=torch_device)
+        with torch.no_grad():
+            model(ids_tensor((3, 4), 99), past_key_values=cache, use_cache=True)
+        keys = cache[0][0].clone()
+        first_buffer = cache[0].key_cache.data_ptr()
+
+        beam_idx = torch.tensor([2, 0, 0], device=torch_device)
+        self.assertIs(model._reorder_cache(cache, beam_idx), cache)
+        self.assertTrue(torch.equal(cache[0][0], keys[beam_idx]))
+        second_buffer = cache[0].key_cache.data_ptr()
+        self.assertNotEqual(first_buffer, second_buffer)
+
+        # the two buffers are swapped back and forth
+        model._reorder_cache(cache, beam_idx)
+        self.assertEqual(cache[0].key_cache.data_ptr(), first_buffer)
+
+    def test_max_length_exceeded(self):
+        model = self._get_model()
+        cache = StaticCache(model.config, batch_size=1, max_length=4, device=torch_device)
+        with self.assertRaises(ValueError):
+            model(ids_tensor((1, 5), 99), past_key_values=cache, use_cache=True)
+
+    def test_unsupported_model(self):
+        torch.manual_seed(0)
+        config = BartConfig(
+            vocab_size=99,
+            d_model=16,
+            encoder_layers=1,
+            decoder_layers=1,
+            encoder_attention_heads=2,
+            decoder_attention_heads=2,
+            encoder_ffn_dim=16,
+            decoder_ffn_dim=16,
+        )
+        model = BartForConditionalGeneration(config).to(torch_device).eval()
+        with self.assertRaises(ValueError):
+            model.generate(ids_tensor((1, 5), 99), use_static_cache=True)
@@ -0,0 +1,152 @@
+# coding=utf-8
+# Copyright 2021 The HuggingFace Team Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a clone of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from transformers import BaseStreamer, GPT2Tokenizer, TextStreamer, is_torch_available
+from transformers.models.gpt2.tokenization_gpt2 import VOCAB_FILES_NAMES, bytes_to_unicode
+from transformers.testing_utils import require_torch, torch_device
+
+from .test_modeling_common import ids_tensor
+
+
+if is_torch_available():
+    import torch
+
+    from transformers import GPT2Config, GPT2LMHeadModel, TextGenerationPipeline
+
+
+class RecordingStreamer(BaseStreamer):
+    def __init__(self):
+        self.values = []
+        self.ended = False
+
+    def put(self, value):
+        self.values.append(value.tolist())
+
+    def end(self):
+        self.ended = True
+
+
+class TextStreamerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdirname = tempfile.mkdtemp()
+
+        # a byte-level vocabulary where multi-byte characters are split across several tokens
+        byte_encoder = bytes_to_unicode()
+        vocab = [byte_encoder[i] for i in range(256)] + ["Ġh", "Ġhe", "Ġhel", "<|endoftext|>"]
+        merges = ["#version: 0.2", "Ġ h", "Ġh e", "Ġhe l", ""]
+        with open(os.path.join(self.tmpdirname, VOCAB_FILES_NAMES["vocab_file"]), "w", encoding="utf-8") as fp:
+            fp.write(json.dumps(dict(zip(vocab, range(len(vocab))))) + "\n")
+        with open(os.path.join(self.tmpdirname, VOCAB_FILES_NAMES["merges_file"]), "w", encoding="utf-8") as fp:
+            fp.write("\n".join(merges))
+        self.tokenizer = GPT2Tokenizer.from_pretrained(self.tmpdirname)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdirname)
+
+    def _stream(self, token_ids, **kwargs):
+        chunks = []
+        streamer = TextStreamer(self.tokenizer, on_text=lambda text, stream_end: chunks.append(text), **kwargs)
+        for token_id in token_ids:
+            streamer.put([token_id])
+        streamer.end()
+        return chunks
+
+    def test_incremental_decoding_matches_decode(self):
+        text = " hello wörld, ça va? 你好 🤗 hel"
+        token_ids = self.tokenizer(text).input_ids
+        chunks = self._stream(token_ids)
+
+        self.assertEqual("".join(chunks), self.tokenizer.decode(token_ids))
+        # partial UTF-8 characters are held back until the next token completes them
+        for chunk in chunks:
+            self.assertNotIn("\ufffd", chunk)
+
+    def test_skip_prompt(self):
+        streamer_chunks = []
+        streamer = TextStreamer(
+            self.tokenizer, skip_prompt=True, on_text=lambda text, stream_end: streamer_chunks.append(text)
+        )
+        streamer.put([self.tokenizer(" hel").input_ids])
+        for token_id in self.tokenizer(" wörld").input_ids:
+            streamer.put([token_id])
+        streamer.end()
+        self.assertEqual("".join(streamer_chunks), " wörld")
+
+    def test_batch_not_supported(self):
+        streamer = TextStreamer(self.tokenizer)
+        with self.assertRaises(ValueError):
+            streamer.put([[1, 2], [3, 4]])
+
+    @require_torch
+    def test_text_generation_pipeline_stream(self):
+        torch.manual_seed(0)
+        config = GPT2Config(vocab_size=len(self.tokenizer), n_embd=32, n_layer=2, n_head=4, n_positions=64)
+        model = GPT2LMHeadModel(config).eval()
+        text_generator = TextGenerationPipeline(model=model, tokenizer=self.tokenizer)
+
+        chunks = list(text_generator.stream(" hello", do_sample=False, max_new_tokens=10))
+        outputs = text_generator(" hello", do_sample=False, max_new_tokens=10, return_tensors=True)
+        new_tokens = outputs["generated_token_ids"][0][len(self.tokenizer(" hello").input_ids) :]
+        self.assertEqual("".join(chunks), self.tokenizer.decode(new_tokens, skip_special_tokens=True))
+
+
+@require_torch
+class GenerationStreamingTest(unittest.TestCase):
+    def _get_model(self):
+        torch.manual_seed(0)
+        config = GPT2Config(vocab_size=99, n_embd=32, n_layer=2, n_head=4, n_positions=64, eos_token_id=2)
+        return GPT2LMHeadModel(config).to(torch_device).eval()
+
+    def _check_streamed_tokens(self, **generate_kwargs):
+        model = self._get_model()
+        input_ids = ids_tensor((1, 5), 99)
+        streamer = RecordingStreamer()
+
+        torch.manual_seed(0)
+        output = model.generate(input_ids, streamer=streamer, max_length=20, **generate_kwargs)
+        torch.manual_seed(0)
+        expected = model.generate(input_ids, max_length=20, **generate_kwargs)
+
+        self.assertListEqual(output.tolist(), expected.tolist())
+        self.assertTrue(streamer.ended)
+        self.assertListEqual(streamer.values[0], input_ids.tolist())
+        streamed = sum(streamer.values[1:], [])
+        self.assertListEqual(input_ids[0].tolist() + streamed, output[0].tolist())
+        return streamer
+
+    def test_greedy_search(self):
+        streamer = self._check_streamed_tokens(do_sample=False)
+        # one call per generated token
+        self.assertTrue(all(len(value) == 1 for value in streamer.values[1:]))
+
+    def test_sample(self):
+        self._check_streamed_tokens(do_sample=True, top_k=10)
+
+    def test_beam_search(self):
+        self._check_streamed_tokens(do_sample=False, num_beams=3)
+
+    def test_unsupported_modes(self):
+        model = self._get_model()
+        input_ids = ids_tensor((1, 5), 99)
+        with self.assertRaises(ValueError):
+            model.generate(input_ids, streamer=RecordingStreamer(), num_beams=2, num_beam_groups=2)
+        with self.assertRaises(ValueError):
+            model.generate(input_ids, streamer=RecordingStreamer(), num_beams=2, num_return_sequences=2)
@@ -25,8 +25,10 @@ if is_torch_available():
     import torch
 
     from transformers import (
+        BartConfig,
         BartForConditionalGeneration,
         BartTokenizer,
+        GPT2Config,
         GPT2LMHeadModel,
         GPT2Tokenizer,
         top_k_top_p_filtering,
@@ -960,6 +962,30 @@ class GenerationTesterMixin:
 
             self.assertIsNotNone(output_ids_generate)
 
+    def test_static_cache_generate(self):
+        for model_class in self.all_generative_model_classes:
+            if not model_class.supports_static_cache:
+                continue
+            config, input_ids, attention_mask, max_length = self._get_input_ids_and_config()
+            model = model_class(config).to(torch_device).eval()
+            # generate enough tokens to go through a few beam reorderings
+            max_length = input_ids.shape[-1] + 10
+
+            for generate_kwargs in [{}, {"num_beams": 2}, {"do_sample": True, "num_return_sequences": 2}]:
+                torch.manual_seed(0)
+                output = model.generate(
+                    input_ids, attention_mask=attention_mask, max_length=max_length, **generate_kwargs
+                )
+                torch.manual_seed(0)
+                output_static = model.generate(
+                    input_ids,
+                    attention_mask=attention_mask,
+                    max_length=max_length,
+                    use_static_cache=True,
+                    **generate_kwargs,
+                )
+                self.assertListEqual(output_static.tolist(), output.tolist())
+
     def test_group_beam_search_generate(self):
         for model_class in self.all_generative_model_classes:
             config, input_ids, attention_mask, max_length = self._get_input_ids_and_config()
@@ -1680,3 +1706,64 @@ class GenerationIntegrationTests(unittest.TestCase):
         # max_new_tokens and max_length serve the same purpose and should not be used together.
         with self.assertWarns(UserWarning):
             gpt2_model.generate(decoder_input_ids=input_ids, max_new_tokens=10, max_length=20)
+
+
+@require_torch
+class AssistedGenerationTest(unittest.TestCase):
+    def _get_gpt2(self, n_layer):
+        config = GPT2Config(vocab_size=99, n_embd=32, n_layer=n_layer, n_head=4, eos_token_id=2, pad_token_id=2)
+        return GPT2LMHeadModel(config).to(torch_device).eval()
+
+    def _get_bart(self, layers):
+        config = BartConfig(
+            vocab_size=99,
+            d_model=32,
+            encoder_layers=layers,
+            decoder_layers=layers,
+            encoder_attention_heads=4,
+            decoder_attention_heads=4,
+            encoder_ffn_dim=32,
+            decoder_ffn_dim=32,
+        )
+        return BartForConditionalGeneration(config).to(torch_device).eval()
+
+    def _check_same_as_greedy(self, model, assistant_model, input_ids):
+        generate_kwargs = {"max_length": 30, "no_repeat_ngram_size": 3, "output_scores": True}
+        output = model.generate(input_ids, return_dict_in_generate=True, **generate_kwargs)
+        for num_assistant_tokens in [1, 4]:
+            assisted_output = model.generate(
+                input_ids,
+                assistant_model=assistant_model,
+                num_assistant_tokens=num_assistant_tokens,
+                return_dict_in_generate=True,
+                **generate_kwargs,
+            )
+            self.assertListEqual(assisted_output.sequences.tolist(), output.sequences.tolist())
+            self.assertEqual(len(assisted_output.scores), len(output.scores))
+            for assisted_scores, scores in zip(assisted_output.scores, output.scores):
+                self.assertTrue(torch.allclose(assisted_scores, scores, atol=1e-4))
+
+    def test_decoder_only(self):
+        torch.manual_seed(0)
+        model = self._get_gpt2(3)
+        input_ids = torch.tensor([[5, 17, 42, 8]], device=torch_device)
+        # the model always agrees with itself, and rarely with another random model
+        self._check_same_as_greedy(model, model, input_ids)
+        self._check_same_as_greedy(model, self._get_gpt2(1), input_ids)
+
+    def test_encoder_decoder(self):
+        torch.manual_seed(0)
+        model = self._get_bart(2)
+        input_ids = torch.tensor([[0, 5, 17, 42, 8, 2]], device=torch_device)
+        self._check_same_as_greedy(model, model, input_ids)
+        self._check_same_as_greedy(model, self._get_bart(1), input_ids)
+
+    def test_unsupported_generation(self):
+        torch.manual_seed(0)
+        model = self._get_gpt2(1)
+        with self.assertRaises(ValueError):
+            model.generate(torch.ones((2, 4), dtype=torch.long, device=torch_device), assistant_model=model)
+        with self.assertRaises(ValueError):
+            model.generate(
+                torch.ones((1, 4), dtype=torch.long, device=torch_device), assistant_model=model, num_beams=2
+            )
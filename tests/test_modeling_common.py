@@ -20,7 +20,9 @@ import json
 import os
 import os.path
 import random
+import sys
 import tempfile
+import time
 import unittest
 import warnings
 from typing import Dict, List, Tuple
@@ -31,7 +33,16 @@ import transformers
 from huggingface_hub import HfApi, Repository
 from requests.exceptions import HTTPError
 from transformers import AutoModel, AutoModelForSequenceClassification, is_torch_available, logging
-from transformers.file_utils import WEIGHTS_NAME, is_flax_available, is_torch_fx_available
+from transformers.file_utils import (
+    CONFIG_NAME,
+    SAFE_WEIGHTS_INDEX_NAME,
+    SAFE_WEIGHTS_NAME,
+    WEIGHTS_INDEX_NAME,
+    WEIGHTS_NAME,
+    convert_file_size_to_int,
+    is_flax_available,
+    is_torch_fx_available,
+)
 from transformers.models.auto import get_values
 from transformers.testing_utils import (
     ENDPOINT_STAGING,
@@ -39,6 +50,7 @@ from transformers.testing_utils import (
     USER,
     CaptureLogger,
     TestCasePlus,
+    execute_subprocess_async,
     is_pt_flax_cross_test,
     is_pt_tf_cross_test,
     is_staging_test,
@@ -73,6 +85,7 @@ if is_torch_available():
         T5Config,
         T5ForConditionalGeneration,
     )
+    from transformers.modeling_utils import shard_checkpoint
 
 if is_flax_available():
     import jax.numpy as jnp
@@ -179,6 +192,57 @@ class ModelTesterMixin:
                 max_diff = np.amax(np.abs(out_1 - out_2))
                 self.assertLessEqual(max_diff, 1e-5)
 
+    def test_save_load_low_cpu_mem_usage(self):
+        config, inputs_dict = self.model_tester.prepare_config_and_inputs_for_common()
+        base_class = MODEL_MAPPING.get(config.__class__, None)
+
+        if isinstance(base_class, tuple):
+            base_class = base_class[0]
+
+        for model_class in self.all_model_classes:
+            model = model_class(config)
+
+            with tempfile.TemporaryDirectory() as tmpdirname:
+                model.save_pretrained(tmpdirname)
+                new_model = model_class.from_pretrained(tmpdirname, low_cpu_mem_usage=True)
+
+            # all the parameters are materialized from the checkpoint
+            for name, param in new_model.named_parameters():
+                self.assertNotEqual(param.device.type, "meta", msg=f"{name} is not materialized")
+            new_state_dict = new_model.state_dict()
+            self.assertListEqual(list(new_state_dict.keys()), list(model.state_dict().keys()))
+            for key, value in model.state_dict().items():
+                self.assertTrue(torch.equal(value, new_state_dict[key]), msg=f"{key} not identical")
+
+            if base_class is None or model_class == base_class:
+                continue
+
+            # the weights missing from the checkpoint are initialized like without `low_cpu_mem_usage`
+            class CopyClass(model_class):
+                pass
+
+            model_class_copy = CopyClass
+            model_class_copy._keys_to_ignore_on_load_missing = []
+            model_class_copy._init_weights = self._mock_init_weights
+
+            model = base_class(config)
+            state_dict = model.state_dict()
+            # buffers and constant parameters are created with the model, only trainable parameters are initialized
+            del state_dict[random.choice([name for name, param in model.named_parameters() if param.requires_grad])]
+
+            with tempfile.TemporaryDirectory() as tmpdirname:
+                model.save_pretrained(tmpdirname)
+                torch.save(state_dict, os.path.join(tmpdirname, WEIGHTS_NAME))
+
+                model_low_mem = model_class_copy.from_pretrained(tmpdirname, low_cpu_mem_usage=True)
+                model_fast_init = model_class_copy.from_pretrained(tmpdirname)
+
+            for name, param in model_low_mem.named_parameters():
+                self.assertNotEqual(param.device.type, "meta", msg=f"{name} is not materialized")
+            for key, value in model_fast_init.state_dict().items():
+                max_diff = (value - model_low_mem.state_dict()[key]).abs().sum().item()
+                self.assertLessEqual(max_diff, 1e-3, msg=f"{key} not identical")
+
     def test_save_load_keys_to_ignore_on_save(self):
         config, inputs_dict = self.model_tester.prepare_config_and_inputs_for_common()
 
@@ -2078,6 +2142,214 @@ class ModelUtilsTest(TestCasePlus):
         model = AutoModel.from_pretrained(TINY_T5, torch_dtype=torch.float16)
         self.assertEqual(model.dtype, torch.float16)
 
+    def test_shard_checkpoint(self):
+        # This is the model we will use, total size 340,000 bytes.
+        model = torch.nn.Sequential(
+            torch.nn.Linear(100, 200, bias=False),  # size 80,000
+            torch.nn.Linear(200, 200, bias=False),  # size 160,000
+            torch.nn.Linear(200, 100, bias=False),  # size 80,000
+            torch.nn.Linear(100, 50, bias=False),  # size 20,000
+        )
+        state_dict = model.state_dict()
+
+        with self.subTest("No shard when max size is bigger than model size"):
+            shards, index = shard_checkpoint(state_dict)
+            self.assertIsNone(index)
+            self.assertDictEqual(shards, {WEIGHTS_NAME: state_dict})
+
+        with self.subTest("Test sharding, no weights bigger than max size"):
+            shards, index = shard_checkpoint(state_dict, max_shard_size="300kB")
+            # Split is first two layers then last two.
+            self.assertDictEqual(
+                index,
+                {
+                    "metadata": {"total_size": 340000},
+                    "weight_map": {
+                        "0.weight": "pytorch_model-00001-of-00002.bin",
+                        "1.weight": "pytorch_model-00001-of-00002.bin",
+                        "2.weight": "pytorch_model-00002-of-00002.bin",
+                        "3.weight": "pytorch_model-00002-of-00002.bin",
+                    },
+                },
+            )
+
+            shard1 = {"0.weight": state_dict["0.weight"], "1.weight": state_dict["1.weight"]}
+            shard2 = {"2.weight": state_dict["2.weight"], "3.weight": state_dict["3.weight"]}
+            self.assertDictEqual(
+                shards, {"pytorch_model-00001-of-00002.bin": shard1, "pytorch_model-00002-of-00002.bin": shard2}
+            )
+
+        with self.subTest("Test sharding with weights bigger than max size"):
+            shards, index = shard_checkpoint(state_dict, max_shard_size="100kB")
+            # Split is first layer, second layer then last 2.
+            self.assertDictEqual(
+                index,
+                {
+                    "metadata": {"total_size": 340000},
+                    "weight_map": {
+                        "0.weight": "pytorch_model-00001-of-00003.bin",
+                        "1.weight": "pytorch_model-00002-of-00003.bin",
+                        "2.weight": "pytorch_model-00003-of-00003.bin",
+                        "3.weight": "pytorch_model-00003-of-00003.bin",
+                    },
+                },
+            )
+
+            shard1 = {"0.weight": state_dict["0.weight"]}
+            shard2 = {"1.weight": state_dict["1.weight"]}
+            shard3 = {"2.weight": state_dict["2.weight"], "3.weight": state_dict["3.weight"]}
+            self.assertDictEqual(
+                shards,
+                {
+                    "pytorch_model-00001-of-00003.bin": shard1,
+                    "pytorch_model-00002-of-00003.bin": shard2,
+                    "pytorch_model-00003-of-00003.bin": shard3,
+                },
+            )
+
+        with self.assertRaises(ValueError):
+            shard_checkpoint(state_dict, max_shard_size="100 parameters")
+
+    def test_checkpoint_sharding_local(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=5, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # We use the same folder for various sizes to make sure a new save erases the old checkpoint.
+            for max_size in ["50kB", "50kiB", "100kB", "100kiB", "200kB", "200kiB"]:
+                model.save_pretrained(tmp_dir, max_shard_size=max_size)
+
+                # Get each shard file and its size
+                shard_to_size = {}
+                for shard in os.listdir(tmp_dir):
+                    if shard.endswith(".bin"):
+                        shard_file = os.path.join(tmp_dir, shard)
+                        shard_to_size[shard_file] = os.path.getsize(shard_file)
+
+                index_file = os.path.join(tmp_dir, WEIGHTS_INDEX_NAME)
+                # Check there is an index but no regular weight file
+                self.assertTrue(os.path.isfile(index_file))
+                self.assertFalse(os.path.isfile(os.path.join(tmp_dir, WEIGHTS_NAME)))
+
+                # Check a file is bigger than max_size only when it has a single weight
+                for shard_file, size in shard_to_size.items():
+                    max_size_int = convert_file_size_to_int(max_size)
+                    # Note: pickle adds some junk so the weight of the file can end up being slightly bigger than
+                    # the size asked for (since we count parameters)
+                    if size >= max_size_int + 50000:
+                        state_dict = torch.load(shard_file)
+                        self.assertEqual(len(state_dict), 1)
+
+                # Check the index and the shard files found match
+                with open(index_file, "r", encoding="utf-8") as f:
+                    index = json.loads(f.read())
+
+                all_shards = set(index["weight_map"].values())
+                shards_found = set(f for f in os.listdir(tmp_dir) if f.endswith(".bin"))
+                self.assertSetEqual(all_shards, shards_found)
+
+                # Finally, check the model can be reloaded
+                new_model = BertModel.from_pretrained(tmp_dir)
+                for p1, p2 in zip(model.parameters(), new_model.parameters()):
+                    self.assertTrue(torch.allclose(p1, p2))
+
+            # Saving without sharding removes the shards and the index
+            model.save_pretrained(tmp_dir)
+            self.assertListEqual(sorted(f for f in os.listdir(tmp_dir) if "pytorch_model" in f), [WEIGHTS_NAME])
+
+    def test_checkpoint_sharding_low_cpu_mem_usage(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=5, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model.save_pretrained(tmp_dir, max_shard_size="20kB")
+            new_model = BertModel.from_pretrained(tmp_dir, low_cpu_mem_usage=True)
+            for (k1, p1), (k2, p2) in zip(model.state_dict().items(), new_model.state_dict().items()):
+                self.assertEqual(k1, k2)
+                self.assertTrue(torch.equal(p1, p2))
+
+    def test_low_cpu_mem_usage_load_time(self):
+        # With `low_cpu_mem_usage`, the model is created on the meta device: its weights are neither allocated nor
+        # randomly initialized before being replaced by the ones of the checkpoint.
+        config = BertConfig(
+            vocab_size=1000, hidden_size=512, num_hidden_layers=8, num_attention_heads=8, intermediate_size=2048
+        )
+
+        load_times = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            BertModel(config).save_pretrained(tmp_dir)
+            for low_cpu_mem_usage in [False, True]:
+                times = []
+                for _ in range(3):
+                    start = time.perf_counter()
+                    BertModel.from_pretrained(tmp_dir, low_cpu_mem_usage=low_cpu_mem_usage)
+                    times.append(time.perf_counter() - start)
+                load_times[low_cpu_mem_usage] = min(times)
+
+            # the weights are materialized directly in the requested dtype
+            model = BertModel.from_pretrained(tmp_dir, low_cpu_mem_usage=True, torch_dtype=torch.float16)
+            self.assertEqual(model.dtype, torch.float16)
+
+        self.assertLess(load_times[True], load_times[False] / 1.5)
+
+    def test_safe_serialization(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=5, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for max_shard_size in ["10GB", "20kB"]:
+                model.save_pretrained(tmp_dir, safe_serialization=True, max_shard_size=max_shard_size)
+                self.assertFalse(os.path.isfile(os.path.join(tmp_dir, WEIGHTS_NAME)))
+                if max_shard_size == "10GB":
+                    self.assertTrue(os.path.isfile(os.path.join(tmp_dir, SAFE_WEIGHTS_NAME)))
+                else:
+                    self.assertTrue(os.path.isfile(os.path.join(tmp_dir, SAFE_WEIGHTS_INDEX_NAME)))
+
+                for low_cpu_mem_usage in [False, True]:
+                    new_model = BertModel.from_pretrained(tmp_dir, low_cpu_mem_usage=low_cpu_mem_usage)
+                    for (k1, p1), (k2, p2) in zip(model.state_dict().items(), new_model.state_dict().items()):
+                        self.assertEqual(k1, k2)
+                        self.assertTrue(torch.equal(p1, p2))
+
+            # Saving in the other format removes the safetensors checkpoint
+            model.save_pretrained(tmp_dir)
+            self.assertListEqual(
+                sorted(f for f in os.listdir(tmp_dir) if f.endswith((".bin", ".safetensors", ".json"))),
+                [CONFIG_NAME, WEIGHTS_NAME],
+            )
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "ru_maxrss is reported in kilobytes on Linux only")
+    def test_checkpoint_sharding_peak_memory(self):
+        # Loading a sharded checkpoint only holds one shard in memory on top of the model, while loading a regular
+        # checkpoint holds a full copy of the weights.
+        config = BertConfig(
+            vocab_size=1000, hidden_size=512, num_hidden_layers=8, num_attention_heads=8, intermediate_size=2048
+        )
+        model = BertModel(config)
+        model_size = sum(p.numel() * p.element_size() for p in model.state_dict().values())
+        del model
+        load_script = (
+            "import resource, sys; from transformers import BertModel; BertModel.from_pretrained(sys.argv[1]); "
+            "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)"
+        )
+
+        peak_memory = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for max_shard_size in ["10GB", "10MB"]:
+                BertModel(config).save_pretrained(tmp_dir, max_shard_size=max_shard_size)
+                result = execute_subprocess_async(
+                    [sys.executable, "-c", load_script, tmp_dir], env=self.get_env(), echo=False, quiet=True
+                )
+                peak_memory[max_shard_size] = int(result.stdout[-1])
+
+        self.assertLess(peak_memory["10MB"], peak_memory["10GB"] - model_size // 2)
+
 
 if is_torch_available():
 
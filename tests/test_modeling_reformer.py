@@ -44,6 +44,7 @@ if is_torch_available():
         ReformerModelWithLMHead,
         ReformerTokenizer,
     )
+    from transformers.models.reformer.modeling_reformer import AxialPositionEmbeddings
 
 
 class ReformerModelTester:
@@ -589,6 +590,16 @@ class ReformerTesterMixin:
         # reformer cannot resize embeddings that easily
         return
 
+    # overwrite from test_modeling_common
+    def _mock_init_weights(self, module):
+        if hasattr(module, "weight") and module.weight is not None:
+            module.weight.data.fill_(3)
+        if hasattr(module, "bias") and module.bias is not None:
+            module.bias.data.fill_(3)
+        if isinstance(module, AxialPositionEmbeddings):
+            for weight in module.weights:
+                weight.data.fill_(3)
+
 
 @require_torch
 class ReformerLocalAttnModelTest(ReformerTesterMixin, GenerationTesterMixin, ModelTesterMixin, unittest.TestCase):
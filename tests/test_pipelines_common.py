@@ -253,6 +253,28 @@ class CommonPipelineTest(unittest.TestCase):
         for output in text_classifier(dataset):
             self.assertEqual(output, {"label": ANY(str), "score": ANY(float)})
 
+    @require_torch
+    def test_pipeline_group_by_length(self):
+        text_classifier = pipeline(
+            task="text-classification", model="Narsil/tiny-distilbert-sequence-classification", framework="pt"
+        )
+        texts = ["This is a test", "This restaurant is great, the food is delicious and the staff friendly", "Awful"]
+        texts = texts * 3
+
+        outputs = text_classifier(texts, batch_size=2)
+        grouped_outputs = text_classifier(texts, batch_size=2, group_by_length=True)
+
+        # the outputs are in the order of the inputs
+        self.assertEqual(len(grouped_outputs), len(texts))
+        for output, grouped_output in zip(outputs, grouped_outputs):
+            self.assertEqual(output["label"], grouped_output["label"])
+            self.assertAlmostEqual(output["score"], grouped_output["score"], places=4)
+
+        stats = text_classifier.batching_stats
+        self.assertEqual(stats["num_inputs"], len(texts))
+        self.assertEqual(stats["num_batches"], 5)
+        self.assertLess(stats["padding_ratio"], stats["padding_ratio_without_grouping"])
+
 
 @is_pipeline_test
 class PipelinePadTest(unittest.TestCase):
@@ -43,6 +43,10 @@ class Text2TextGenerationPipelineTests(unittest.TestCase, metaclass=PipelineTest
         with self.assertRaises(ValueError):
             generator(4)
 
+        if generator.framework == "pt":
+            chunks = list(generator.stream("Something there", max_length=5))
+            self.assertEqual(chunks, [ANY(str)] * len(chunks))
+
     @require_torch
     def test_small_model_pt(self):
         generator = pipeline("text2text-generation", model="patrickvonplaten/t5-tiny-random", framework="pt")
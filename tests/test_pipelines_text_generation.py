@@ -113,6 +113,10 @@ class TextGenerationPipelineTests(unittest.TestCase, metaclass=PipelineTestCaseM
         self.assertEqual(outputs, [{"generated_text": ANY(str)}])
         self.assertTrue(outputs[0]["generated_text"].startswith("This is a test"))
 
+        if text_generator.framework == "pt":
+            chunks = list(text_generator.stream("This is a test", max_new_tokens=5))
+            self.assertEqual(chunks, [ANY(str)] * len(chunks))
+
         # Empty prompt is slighly special
         # it requires BOS token to exist.
         # Special case for Pegasus which will always append EOS so will
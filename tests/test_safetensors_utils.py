@@ -0,0 +1,115 @@
+# Copyright 2021 The HuggingFace Team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from transformers import is_torch_available
+from transformers.safetensors_utils import load_file, read_header, save_file
+from transformers.testing_utils import require_torch
+
+
+if is_torch_available():
+    import torch
+
+
+class SafetensorsUtilsTest(unittest.TestCase):
+    def test_save_load_numpy(self):
+        arrays = {
+            "int8": np.arange(3, dtype=np.int8),
+            "float64": np.random.randn(2, 3),
+            "float16": np.random.randn(5).astype(np.float16),
+            "bool": np.array(True),
+            "empty": np.zeros((0, 4), dtype=np.float32),
+            "transposed": np.random.randn(3, 4).astype(np.float32).T,
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "model.safetensors")
+            save_file(arrays, filename, metadata={"format": "np"})
+            loaded = load_file(filename, return_tensors="np")
+
+            self.assertListEqual(list(loaded.keys()), list(arrays.keys()))
+            for name, array in arrays.items():
+                self.assertEqual(loaded[name].dtype, array.dtype)
+                self.assertEqual(loaded[name].shape, array.shape)
+                self.assertTrue(np.array_equal(loaded[name], array))
+                # the arrays are views of the file, not copies
+                if array.size > 0:
+                    self.assertIsInstance(loaded[name], np.memmap)
+
+            self.assertDictEqual(read_header(filename)["__metadata__"], {"format": "np"})
+
+    def test_layout(self):
+        arrays = {"a": np.arange(3, dtype=np.int8), "b": np.arange(2, dtype=np.int64)}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "model.safetensors")
+            save_file(arrays, filename)
+            with open(filename, "rb") as f:
+                data = f.read()
+
+        (header_size,) = struct.unpack("<Q", data[:8])
+        self.assertEqual((8 + header_size) % 8, 0)
+        header = json.loads(data[8 : 8 + header_size])
+        # the data buffer starts with the biggest items, so that every tensor is aligned
+        self.assertDictEqual(
+            header,
+            {
+                "a": {"dtype": "I8", "shape": [3], "data_offsets": [16, 19]},
+                "b": {"dtype": "I64", "shape": [2], "data_offsets": [0, 16]},
+            },
+        )
+        self.assertEqual(data[8 + header_size :], struct.pack("<qqbbb", 0, 1, 0, 1, 2))
+
+    def test_errors(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "model.safetensors")
+            with self.assertRaises(ValueError):
+                save_file({"complex": np.zeros(2, dtype=np.complex64)}, filename)
+
+            with open(filename, "wb") as f:
+                f.write(struct.pack("<Q", 100) + b"{}")
+            with self.assertRaises(ValueError):
+                load_file(filename)
+
+            save_file({"a": np.zeros(2)}, filename)
+            with self.assertRaises(ValueError):
+                load_file(filename, return_tensors="tf")
+
+    @require_torch
+    def test_save_load_torch(self):
+        tensors = {
+            "float32": torch.randn(2, 3),
+            "bfloat16": torch.randn(4).bfloat16(),
+            "int64": torch.arange(5),
+            "bool": torch.tensor([True, False]),
+            "transposed": torch.randn(3, 4).t(),
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "model.safetensors")
+            save_file(tensors, filename)
+            loaded = load_file(filename)
+
+            self.assertListEqual(list(loaded.keys()), list(tensors.keys()))
+            for name, tensor in tensors.items():
+                self.assertEqual(loaded[name].dtype, tensor.dtype)
+                self.assertTrue(torch.equal(loaded[name], tensor))
+
+            # the mapping is copy-on-write: modifying a tensor doesn't modify the file
+            loaded["float32"].zero_()
+            self.assertTrue(torch.equal(load_file(filename)["float32"], tensors["float32"]))
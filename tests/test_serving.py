@@ -0,0 +1,89 @@
+# coding=utf-8
+# Copyright 2021 The HuggingFace Team Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a clone of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+
+from transformers.commands.serving import DynamicBatcher
+
+
+class DummyTokenizer:
+    pad_token_id = 0
+    padding_side = "right"
+
+
+class DummyPipeline:
+    """
+    Returns the length of each input, and records the inputs of each of its calls.
+    """
+
+    tokenizer = DummyTokenizer()
+    feature_extractor = None
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs, batch_size=1):
+        self.calls.append(inputs)
+        if isinstance(inputs, list):
+            return [len(text) for text in inputs]
+        return len(inputs)
+
+
+class DynamicBatcherTest(unittest.TestCase):
+    def _run_requests(self, batcher, requests):
+        async def run():
+            await batcher.start()
+            outputs = await asyncio.gather(*[batcher(inputs) for inputs in requests])
+            await batcher.stop()
+            return outputs
+
+        return asyncio.get_event_loop().run_until_complete(run())
+
+    def test_batches_concurrent_requests(self):
+        pipeline = DummyPipeline()
+        batcher = DynamicBatcher(pipeline, max_batch_size=4, max_wait_time=1.0)
+        requests = ["a", ["bb", "ccc"], "dddd", "eeeee", ["ffffff"]]
+        outputs = self._run_requests(batcher, requests)
+
+        self.assertListEqual(outputs, [1, [2, 3], 4, 5, [6]])
+        self.assertListEqual(pipeline.calls, [["a", "bb", "ccc", "dddd"], ["eeeee", "ffffff"]])
+
+        metrics = batcher.metrics()
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["num_requests"], 5)
+        self.assertDictEqual(metrics["batch_size_histogram"], {4: 1, 2: 1})
+        self.assertLessEqual(metrics["latency"]["p50"], metrics["latency"]["max"])
+
+    def test_no_batching(self):
+        pipeline = DummyPipeline()
+        batcher = DynamicBatcher(pipeline, max_batch_size=1)
+        outputs = self._run_requests(batcher, ["a", ["bb", "ccc"]])
+
+        # each request is a call of the pipeline
+        self.assertListEqual(outputs, [1, [2, 3]])
+        self.assertListEqual(pipeline.calls, ["a", ["bb", "ccc"]])
+
+    def test_pipeline_error(self):
+        pipeline = DummyPipeline()
+        batcher = DynamicBatcher(pipeline, max_batch_size=2, max_wait_time=1.0)
+        with self.assertRaises(TypeError):
+            self._run_requests(batcher, ["a", 1])
+
+    def test_no_padding(self):
+        pipeline = DummyPipeline()
+        pipeline.tokenizer = None
+        with self.assertRaises(ValueError):
+            DynamicBatcher(pipeline, max_batch_size=2)
@@ -64,3 +64,18 @@ class CTRLTokenizationTest(TokenizerTesterMixin, unittest.TestCase):
 
         input_bpe_tokens = [0, 1, 2, 4, 5, 1, 0, 3, 6]
         self.assertListEqual(tokenizer.convert_tokens_to_ids(input_tokens), input_bpe_tokens)
+
+    def test_batch_encode_plus_num_proc(self):
+        tokenizer = self.get_tokenizer(pad_token="<unk>")
+        texts = ["adapt react readapt apt", "react", "apt adapt", "readapt adapter", "adapt"] * 4
+
+        for kwargs in [
+            {},
+            {"padding": True},
+            {"max_length": 3, "truncation": True, "return_overflowing_tokens": True},
+        ]:
+            self.assertDictEqual(dict(tokenizer(texts, num_proc=2, **kwargs)), dict(tokenizer(texts, **kwargs)))
+
+        # the processes are restarted with the new tokenizer when tokens are added
+        tokenizer.add_tokens(["adapter"])
+        self.assertDictEqual(dict(tokenizer(texts, num_proc=2)), dict(tokenizer(texts)))
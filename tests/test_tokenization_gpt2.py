@@ -178,3 +178,36 @@ class GPT2TokenizationTest(TokenizerTesterMixin, unittest.TestCase):
     # tokenizer has no padding token
     def test_padding_different_model_input_name(self):
         pass
+
+    def test_bpe_cache(self):
+        tokenizer = GPT2Tokenizer(self.vocab_file, self.merges_file, bpe_cache_size=2, **self.special_tokens_map)
+        tokens = tokenizer.tokenize("lower newer lower", add_prefix_space=True)
+        self.assertListEqual(tokens, ["\u0120low", "er", "\u0120", "n", "e", "w", "er", "\u0120low", "er"])
+        self.assertEqual(tokenizer.cache.hits, 1)
+        self.assertEqual(tokenizer.cache.misses, 2)
+
+        # the least recently used word is evicted
+        tokenizer.tokenize("wider", add_prefix_space=True)
+        self.assertEqual(len(tokenizer.cache), 2)
+        self.assertListEqual(tokenizer.cache.most_recent(), ["\u0120wider", "\u0120lower"])
+
+        # tokenizers loaded from the same files can share their cache
+        tokenizer = GPT2Tokenizer(self.vocab_file, self.merges_file, share_bpe_cache=True)
+        other_tokenizer = GPT2Tokenizer(self.vocab_file, self.merges_file, share_bpe_cache=True)
+        self.assertIs(tokenizer.cache, other_tokenizer.cache)
+        self.assertIsNot(tokenizer.cache, GPT2Tokenizer(self.vocab_file, self.merges_file).cache)
+
+    def test_bpe_warm_start(self):
+        tokenizer = self.get_tokenizer()
+        tokenizer.tokenize("lower newer wider", add_prefix_space=True)
+        tokenizer.bpe_warm_start = tokenizer.cache.most_recent(2)
+
+        tokenizer.save_pretrained(self.tmpdirname)
+        self.assertTrue(os.path.isfile(os.path.join(self.tmpdirname, VOCAB_FILES_NAMES["bpe_warm_start_file"])))
+
+        tokenizer = self.get_tokenizer()
+        self.assertListEqual(tokenizer.bpe_warm_start, ["\u0120wider", "\u0120newer"])
+        self.assertListEqual(tokenizer.cache.most_recent(), ["\u0120wider", "\u0120newer"])
+        self.assertEqual(tokenizer.cache.misses, 0)
+        self.assertListEqual(tokenizer.tokenize("newer", add_prefix_space=True), ["\u0120", "n", "e", "w", "er"])
+        self.assertEqual(tokenizer.cache.hits, 1)